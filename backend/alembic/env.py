@@ -15,10 +15,12 @@ from app.core.config import settings
 from app.models.user import User
 from app.models.production_line import ProductionLine
 from app.models.machine import Machine
-from app.models.failure import Failure
+from app.models.failure import Failure, FAILURE_FTS_TABLE
 from app.models.solution import Solution
-from app.models.manual import Manual
+from app.models.manual import Manual, MANUAL_FTS_TABLE
+from app.models.manual_chunk import ManualChunk
 from app.models.kpi import KPI
+from app.models.table_version import TableVersion
 
 # this is the Alembic Config object
 config = context.config
@@ -34,12 +36,30 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+# Tablas virtuales FTS5 de SQLite y sufijos de sus tablas internas (shadow tables)
+FTS_TABLES = (FAILURE_FTS_TABLE, MANUAL_FTS_TABLE)
+FTS5_SHADOW_SUFFIXES = ("data", "idx", "content", "docsize", "config")
+
+
+def is_fts_table(name: str) -> bool:
+    base, _, suffix = name.rpartition("_")
+    return name in FTS_TABLES or (base in FTS_TABLES and suffix in FTS5_SHADOW_SUFFIXES)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Ignora las tablas FTS5 de SQLite (gestionadas por migraciones manuales)"""
+    if type_ == "table" and reflected and is_fts_table(name):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -58,7 +78,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,170 @@
+"""baseline
+
+Esquema inicial tal y como lo creaba Base.metadata.create_all antes de
+existir migraciones. Bases de datos existentes: alembic stamp 4a1a23d64472
+
+Revision ID: 4a1a23d64472
+Revises: 
+Create Date: 2026-10-18 20:05:07.822488+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a1a23d64472'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('production_lines',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_production_lines_id'), 'production_lines', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=True),
+    sa.Column('role', sa.Enum('ADMIN', 'TECHNICIAN', 'OPERATOR', 'VIEWER', name='userrole'), nullable=False),
+    sa.Column('subscription_tier', sa.Enum('FREE', 'BASIC', 'PREMIUM', 'ENTERPRISE', name='subscriptiontier'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('machines',
+    sa.Column('code', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('machine_type', sa.String(length=100), nullable=False, comment='Tipo: etiquetadora, encajadora, llenadora, etc.'),
+    sa.Column('manufacturer', sa.String(length=255), nullable=True),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('installation_date', sa.Date(), nullable=True),
+    sa.Column('specifications', sa.JSON(), nullable=True, comment='Especificaciones técnicas en formato JSON'),
+    sa.Column('production_line_id', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['production_line_id'], ['production_lines.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_machines_code'), 'machines', ['code'], unique=True)
+    op.create_index(op.f('ix_machines_id'), 'machines', ['id'], unique=False)
+    op.create_index(op.f('ix_machines_production_line_id'), 'machines', ['production_line_id'], unique=False)
+    op.create_table('failures',
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('machine_id', sa.Integer(), nullable=False),
+    sa.Column('reported_by', sa.Integer(), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED', name='failurestatus'), nullable=False),
+    sa.Column('severity', sa.Enum('LOW', 'MEDIUM', 'HIGH', 'CRITICAL', name='failureseverity'), nullable=False),
+    sa.Column('reported_at', sa.DateTime(), nullable=False),
+    sa.Column('resolved_at', sa.DateTime(), nullable=True),
+    sa.Column('downtime_minutes', sa.Integer(), nullable=True, comment='Tiempo de inactividad en minutos'),
+    sa.Column('images', sa.JSON(), nullable=True, comment='Rutas de imágenes asociadas'),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['assigned_to'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['machine_id'], ['machines.id'], ),
+    sa.ForeignKeyConstraint(['reported_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_failures_id'), 'failures', ['id'], unique=False)
+    op.create_index(op.f('ix_failures_machine_id'), 'failures', ['machine_id'], unique=False)
+    op.create_index(op.f('ix_failures_reported_by'), 'failures', ['reported_by'], unique=False)
+    op.create_index(op.f('ix_failures_severity'), 'failures', ['severity'], unique=False)
+    op.create_index(op.f('ix_failures_status'), 'failures', ['status'], unique=False)
+    op.create_table('kpis',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('production_line_id', sa.Integer(), nullable=True),
+    sa.Column('machine_id', sa.Integer(), nullable=True),
+    sa.Column('total_failures', sa.Integer(), nullable=True),
+    sa.Column('open_failures', sa.Integer(), nullable=True),
+    sa.Column('resolved_failures', sa.Integer(), nullable=True),
+    sa.Column('average_resolution_time_minutes', sa.Float(), nullable=True),
+    sa.Column('mtbf', sa.Float(), nullable=True),
+    sa.Column('mttr', sa.Float(), nullable=True),
+    sa.Column('availability_percentage', sa.Float(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['machine_id'], ['machines.id'], ),
+    sa.ForeignKeyConstraint(['production_line_id'], ['production_lines.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_kpis_id'), 'kpis', ['id'], unique=False)
+    op.create_table('manuals',
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('manual_type', sa.Enum('MAINTENANCE', 'OPERATION', 'TROUBLESHOOTING', 'SAFETY', name='manualtype'), nullable=False),
+    sa.Column('machine_id', sa.Integer(), nullable=False),
+    sa.Column('file_url', sa.String(length=500), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['machine_id'], ['machines.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_manuals_id'), 'manuals', ['id'], unique=False)
+    op.create_table('solutions',
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('failure_id', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('time_spent_minutes', sa.Integer(), nullable=True),
+    sa.Column('was_successful', sa.Boolean(), nullable=True),
+    sa.Column('ai_suggested', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['failure_id'], ['failures.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_solutions_id'), 'solutions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solutions_id'), table_name='solutions')
+    op.drop_table('solutions')
+    op.drop_index(op.f('ix_manuals_id'), table_name='manuals')
+    op.drop_table('manuals')
+    op.drop_index(op.f('ix_kpis_id'), table_name='kpis')
+    op.drop_table('kpis')
+    op.drop_index(op.f('ix_failures_status'), table_name='failures')
+    op.drop_index(op.f('ix_failures_severity'), table_name='failures')
+    op.drop_index(op.f('ix_failures_reported_by'), table_name='failures')
+    op.drop_index(op.f('ix_failures_machine_id'), table_name='failures')
+    op.drop_index(op.f('ix_failures_id'), table_name='failures')
+    op.drop_table('failures')
+    op.drop_index(op.f('ix_machines_production_line_id'), table_name='machines')
+    op.drop_index(op.f('ix_machines_id'), table_name='machines')
+    op.drop_index(op.f('ix_machines_code'), table_name='machines')
+    op.drop_table('machines')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_production_lines_id'), table_name='production_lines')
+    op.drop_table('production_lines')
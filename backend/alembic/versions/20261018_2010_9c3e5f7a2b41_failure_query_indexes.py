@@ -0,0 +1,100 @@
+"""failure query indexes
+
+Índices compuestos y parciales para los accesos más frecuentes a failures,
+búsqueda de texto completo y columnas/índices de la tabla kpis
+
+Revision ID: 9c3e5f7a2b41
+Revises: 4a1a23d64472
+Create Date: 2026-10-18 20:10:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5f7a2b41'
+down_revision = '4a1a23d64472'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_WHERE = sa.text("status IN ('OPEN', 'IN_PROGRESS')")
+
+SEARCH_DOCUMENT = sa.text("to_tsvector('spanish'::regconfig, title || ' ' || description)")
+
+SQLITE_FTS_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS failures_fts USING fts5("
+    "title, description, content='failures', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS failures_fts_ai AFTER INSERT ON failures BEGIN "
+    "INSERT INTO failures_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS failures_fts_ad AFTER DELETE ON failures BEGIN "
+    "INSERT INTO failures_fts(failures_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS failures_fts_au AFTER UPDATE OF title, description ON failures BEGIN "
+    "INSERT INTO failures_fts(failures_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO failures_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO failures_fts(failures_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS failures_fts_au",
+    "DROP TRIGGER IF EXISTS failures_fts_ad",
+    "DROP TRIGGER IF EXISTS failures_fts_ai",
+    "DROP TABLE IF EXISTS failures_fts",
+]
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    # failures: listado/rangos por fecha e histórico por máquina (keyset por id)
+    op.create_index('ix_failures_reported_at_id', 'failures', ['reported_at', 'id'], unique=False)
+    op.create_index('ix_failures_machine_reported_at_id', 'failures', ['machine_id', 'reported_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_failures_machine_id'), table_name='failures')
+
+    # failures: filtros combinados de estado y severidad
+    op.create_index('ix_failures_status_severity', 'failures', ['status', 'severity'], unique=False)
+    op.drop_index(op.f('ix_failures_status'), table_name='failures')
+
+    # failures: índice parcial de averías activas
+    op.create_index(
+        'ix_failures_active_machine_reported_at', 'failures', ['machine_id', 'reported_at'],
+        unique=False, postgresql_where=ACTIVE_WHERE, sqlite_where=ACTIVE_WHERE
+    )
+
+    # failures: búsqueda de texto completo
+    if dialect_name == 'postgresql':
+        op.create_index('ix_failures_search', 'failures', [SEARCH_DOCUMENT], unique=False, postgresql_using='gin')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_UPGRADE:
+            op.execute(statement)
+
+    # kpis: tiempo de inactividad y búsqueda de buckets por día
+    op.add_column('kpis', sa.Column('total_downtime_minutes', sa.Integer(), nullable=True))
+    op.create_index('ix_kpis_date_machine', 'kpis', ['date', 'machine_id'], unique=False)
+    op.create_index('ix_kpis_date_line', 'kpis', ['date', 'production_line_id'], unique=False)
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    op.drop_index('ix_kpis_date_line', table_name='kpis')
+    op.drop_index('ix_kpis_date_machine', table_name='kpis')
+    with op.batch_alter_table('kpis') as batch_op:
+        batch_op.drop_column('total_downtime_minutes')
+
+    if dialect_name == 'postgresql':
+        op.drop_index('ix_failures_search', table_name='failures')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_DOWNGRADE:
+            op.execute(statement)
+
+    op.drop_index('ix_failures_active_machine_reported_at', table_name='failures')
+    op.create_index(op.f('ix_failures_status'), 'failures', ['status'], unique=False)
+    op.drop_index('ix_failures_status_severity', table_name='failures')
+    op.create_index(op.f('ix_failures_machine_id'), 'failures', ['machine_id'], unique=False)
+    op.drop_index('ix_failures_machine_reported_at_id', table_name='failures')
+    op.drop_index('ix_failures_reported_at_id', table_name='failures')
@@ -0,0 +1,38 @@
+"""manual files
+
+Metadatos del fichero de cada manual (tipo, nombre, tamaño, versión y
+etiquetas) e índice por máquina para el listado
+
+Revision ID: b7d2e4f81c05
+Revises: 9c3e5f7a2b41
+Create Date: 2026-10-18 20:15:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f81c05'
+down_revision = '9c3e5f7a2b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('manuals', sa.Column('file_type', sa.String(length=20), nullable=True))
+    op.add_column('manuals', sa.Column('file_name', sa.String(length=255), nullable=True))
+    op.add_column('manuals', sa.Column('file_size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('manuals', sa.Column('version', sa.String(length=50), nullable=True))
+    op.add_column('manuals', sa.Column('tags', sa.JSON(), nullable=True))
+    op.create_index('ix_manuals_machine_id', 'manuals', ['machine_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_manuals_machine_id', table_name='manuals')
+    with op.batch_alter_table('manuals') as batch_op:
+        batch_op.drop_column('tags')
+        batch_op.drop_column('version')
+        batch_op.drop_column('file_size_bytes')
+        batch_op.drop_column('file_name')
+        batch_op.drop_column('file_type')
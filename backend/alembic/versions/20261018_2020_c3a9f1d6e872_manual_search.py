@@ -0,0 +1,72 @@
+"""manual search
+
+Búsqueda de texto completo sobre manuales: índice GIN sobre el tsvector
+ponderado (título, descripción, contenido) en PostgreSQL y tabla FTS5
+sincronizada por triggers en SQLite
+
+Revision ID: c3a9f1d6e872
+Revises: b7d2e4f81c05
+Create Date: 2026-10-18 20:20:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a9f1d6e872'
+down_revision = 'b7d2e4f81c05'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_DOCUMENT = sa.text(
+    "(setweight(to_tsvector('spanish'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(description, '')), 'B')) || "
+    "setweight(to_tsvector('spanish'::regconfig, coalesce(content, '')), 'C')"
+)
+
+SQLITE_FTS_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS manuals_fts USING fts5("
+    "title, description, content, content='manuals', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS manuals_fts_ai AFTER INSERT ON manuals BEGIN "
+    "INSERT INTO manuals_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS manuals_fts_ad AFTER DELETE ON manuals BEGIN "
+    "INSERT INTO manuals_fts(manuals_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS manuals_fts_au AFTER UPDATE OF title, description, content ON manuals BEGIN "
+    "INSERT INTO manuals_fts(manuals_fts, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    "INSERT INTO manuals_fts(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    "INSERT INTO manuals_fts(manuals_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS manuals_fts_au",
+    "DROP TRIGGER IF EXISTS manuals_fts_ad",
+    "DROP TRIGGER IF EXISTS manuals_fts_ai",
+    "DROP TABLE IF EXISTS manuals_fts",
+]
+
+
+def upgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'postgresql':
+        op.create_index('ix_manuals_search', 'manuals', [SEARCH_DOCUMENT], unique=False, postgresql_using='gin')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect_name = op.get_bind().dialect.name
+
+    if dialect_name == 'postgresql':
+        op.drop_index('ix_manuals_search', table_name='manuals')
+    elif dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_DOWNGRADE:
+            op.execute(statement)
@@ -0,0 +1,50 @@
+"""manual chunks
+
+Texto extraído de los manuales por página (manual_chunks) y estado de la
+extracción en manuals
+
+Revision ID: d5e8a2b4f913
+Revises: c3a9f1d6e872
+Create Date: 2026-10-18 20:25:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a2b4f913'
+down_revision = 'c3a9f1d6e872'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('manuals', sa.Column('extraction_status', sa.String(length=20), nullable=True))
+    op.add_column('manuals', sa.Column('extracted_digest', sa.String(length=64), nullable=True))
+    op.add_column('manuals', sa.Column('page_count', sa.Integer(), nullable=True))
+
+    op.create_table('manual_chunks',
+    sa.Column('manual_id', sa.Integer(), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['manual_id'], ['manuals.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('manual_id', 'page_number', name='uq_manual_chunks_manual_page')
+    )
+    op.create_index(op.f('ix_manual_chunks_id'), 'manual_chunks', ['id'], unique=False)
+
+    # Manuales con fichero subidos antes de la extracción: se procesan al arrancar
+    op.execute("UPDATE manuals SET extraction_status = 'pending' WHERE file_url LIKE 'manuals/%'")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_manual_chunks_id'), table_name='manual_chunks')
+    op.drop_table('manual_chunks')
+    with op.batch_alter_table('manuals') as batch_op:
+        batch_op.drop_column('page_count')
+        batch_op.drop_column('extracted_digest')
+        batch_op.drop_column('extraction_status')
@@ -0,0 +1,25 @@
+"""solutions failure index
+
+Índice de solutions por avería (sugerencias de soluciones de averías parecidas)
+
+Revision ID: e1f4b7c9a256
+Revises: d5e8a2b4f913
+Create Date: 2026-10-18 20:30:00.000000+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4b7c9a256'
+down_revision = 'd5e8a2b4f913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_solutions_failure_id'), 'solutions', ['failure_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solutions_failure_id'), table_name='solutions')
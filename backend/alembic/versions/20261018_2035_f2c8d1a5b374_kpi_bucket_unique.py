@@ -0,0 +1,54 @@
+"""kpi bucket unique
+
+Índices únicos parciales por bucket de kpis (día + máquina, día + línea y
+día global) para escribir los KPIs con INSERT ... ON CONFLICT DO UPDATE
+
+Revision ID: f2c8d1a5b374
+Revises: e1f4b7c9a256
+Create Date: 2026-10-18 20:35:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d1a5b374'
+down_revision = 'e1f4b7c9a256'
+branch_labels = None
+depends_on = None
+
+
+MACHINE_BUCKET_WHERE = sa.text("machine_id IS NOT NULL")
+LINE_BUCKET_WHERE = sa.text("machine_id IS NULL AND production_line_id IS NOT NULL")
+GLOBAL_BUCKET_WHERE = sa.text("machine_id IS NULL AND production_line_id IS NULL")
+
+# Buckets duplicados por inserciones concurrentes: se conserva el más reciente
+DELETE_DUPLICATE_BUCKETS = (
+    "DELETE FROM kpis WHERE id NOT IN ("
+    "SELECT MAX(id) FROM kpis GROUP BY date, machine_id, "
+    "CASE WHEN machine_id IS NULL THEN production_line_id END)"
+)
+
+
+def upgrade() -> None:
+    op.execute(DELETE_DUPLICATE_BUCKETS)
+
+    op.create_index(
+        'uq_kpis_machine_bucket', 'kpis', ['date', 'machine_id'], unique=True,
+        postgresql_where=MACHINE_BUCKET_WHERE, sqlite_where=MACHINE_BUCKET_WHERE
+    )
+    op.create_index(
+        'uq_kpis_line_bucket', 'kpis', ['date', 'production_line_id'], unique=True,
+        postgresql_where=LINE_BUCKET_WHERE, sqlite_where=LINE_BUCKET_WHERE
+    )
+    op.create_index(
+        'uq_kpis_global_bucket', 'kpis', ['date'], unique=True,
+        postgresql_where=GLOBAL_BUCKET_WHERE, sqlite_where=GLOBAL_BUCKET_WHERE
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_kpis_global_bucket', table_name='kpis')
+    op.drop_index('uq_kpis_line_bucket', table_name='kpis')
+    op.drop_index('uq_kpis_machine_bucket', table_name='kpis')
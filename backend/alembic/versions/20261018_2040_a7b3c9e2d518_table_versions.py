@@ -0,0 +1,36 @@
+"""table versions
+
+Versión por tabla para los ETag de los listados (se incrementa en cada
+escritura en lugar de calcular COUNT(*) y max(updated_at) en cada lectura)
+
+Revision ID: a7b3c9e2d518
+Revises: f2c8d1a5b374
+Create Date: 2026-10-18 20:40:00.000000+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b3c9e2d518'
+down_revision = 'f2c8d1a5b374'
+branch_labels = None
+depends_on = None
+
+
+VERSIONED_TABLES = ("failures", "machines", "production_lines", "users", "solutions")
+
+
+def upgrade() -> None:
+    table_versions = op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [{'table_name': name, 'version': 0} for name in VERSIONED_TABLES])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
@@ -0,0 +1,32 @@
+"""failure reliability index
+
+Índice de averías por máquina y fecha que cubre las columnas de las
+métricas de fiabilidad (estado, resolved_at y downtime_minutes); sustituye
+a ix_failures_machine_reported_at_id, que es su prefijo
+
+Revision ID: b8e4d2f6c713
+Revises: a7b3c9e2d518
+Create Date: 2026-10-18 20:45:00.000000+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4d2f6c713'
+down_revision = 'a7b3c9e2d518'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_failures_machine_reliability', 'failures',
+        ['machine_id', 'reported_at', 'id', 'status', 'resolved_at', 'downtime_minutes'], unique=False
+    )
+    op.drop_index('ix_failures_machine_reported_at_id', table_name='failures')
+
+
+def downgrade() -> None:
+    op.create_index('ix_failures_machine_reported_at_id', 'failures', ['machine_id', 'reported_at', 'id'], unique=False)
+    op.drop_index('ix_failures_machine_reliability', table_name='failures')
@@ -0,0 +1,26 @@
+"""solutions updated_at index
+
+Índice de solutions por (updated_at, id): el índice de averías parecidas
+carga las soluciones creadas o marcadas como exitosas desde la última lectura
+
+Revision ID: c5f9a3e7d124
+Revises: b8e4d2f6c713
+Create Date: 2026-10-18 20:50:00.000000+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f9a3e7d124'
+down_revision = 'b8e4d2f6c713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_solutions_updated_at_id', 'solutions', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_solutions_updated_at_id', table_name='solutions')
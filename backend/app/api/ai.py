@@ -0,0 +1,28 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_db, get_current_active_user
+from app.models.user import User
+from app.schemas.solution import SimilarFailure, SolutionSuggestionRequest
+from app.services.similarity_service import SimilarityService
+
+router = APIRouter(prefix="/ai", tags=["ai"])
+
+
+@router.post("/suggest-solution", response_model=List[SimilarFailure])
+async def suggest_solution(
+    request: SolutionSuggestionRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Sugerir soluciones para una avería nueva (aún sin registrar)
+
+    Devuelve las averías históricas más parecidas por título y descripción
+    (BM25 sobre un índice local en memoria) que tienen soluciones aplicadas
+    con éxito, con esas soluciones. No consulta servicios externos.
+    """
+    return await SimilarityService.similar_failures(
+        db, request.title, request.description, limit=request.limit
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db, get_current_active_user
 from app.schemas import (
@@ -11,26 +11,26 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_create: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Registrar un nuevo usuario
     """
-    return AuthService.create_user(db, user_create)
+    return await AuthService.create_user(db, user_create)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     user_login: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Login con email y contraseña
     Retorna access_token y refresh_token
     """
-    user = AuthService.authenticate_user(
+    user = await AuthService.authenticate_user(
         db,
         email=user_login.email,
         password=user_login.password
@@ -47,18 +47,18 @@ def login(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
+async def refresh_token(
     token_refresh: TokenRefresh,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Renovar el access token usando el refresh token
     """
-    return AuthService.refresh_access_token(db, token_refresh.refresh_token)
+    return await AuthService.refresh_access_token(db, token_refresh.refresh_token)
 
 
 @router.get("/me", response_model=User)
-def get_current_user_info(
+async def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -68,7 +68,7 @@ def get_current_user_info(
 
 
 @router.post("/logout")
-def logout(
+async def logout(
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -0,0 +1,72 @@
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.dependencies import get_db, get_current_user_for_stream
+from app.core.events import event_broker, RESYNC
+from app.schemas import CurrentUser
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def _event_stream(request: Request):
+    """
+    Entrega los eventos del broker al cliente, con un comentario de heartbeat
+    periódico para que proxies y balanceadores no cierren la conexión
+    """
+    subscription = event_broker.subscribe()
+    try:
+        # Reintento del EventSource tras un corte (ms)
+        yield "retry: 5000\n\n"
+
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+
+            if frame is RESYNC:
+                # El cliente iba retrasado y se descartaron eventos: debe recargar
+                yield "event: resync\ndata: {}\n\n"
+                break
+
+            yield frame
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@router.get("/failures")
+async def stream_failure_events(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user_for_stream)
+):
+    """
+    Stream Server-Sent Events con los cambios de averías
+
+    Eventos: failure.created, failure.updated, failure.resolved (con la avería
+    como en POST/PUT /failures), failure.deleted (id y machine_id) y
+    failure.imported (número de averías importadas, el cliente debe recargar).
+    Al conectar el cliente carga la lista una vez y después aplica los deltas;
+    si recibe `resync` debe recargar. EventSource no admite cabeceras, por lo
+    que el token puede enviarse en ?access_token=
+    """
+    # La conexión usada para autenticar vuelve al pool antes de abrir el stream
+    await db.close()
+
+    return StreamingResponse(
+        _event_stream(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # sin buffering en nginx
+        }
+    )
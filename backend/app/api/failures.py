@@ -1,26 +1,156 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
+import asyncio
+from typing import List, Optional, Set
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, with_expression
+from sqlalchemy import and_, desc, func, case, select, tuple_
 from datetime import datetime
 
-from app.core.dependencies import get_db, get_current_active_user
+from app.core.body_limit import LimitedBodyRoute, max_body_size, MULTIPART_OVERHEAD_BYTES
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.dependencies import get_db, get_current_active_user, require_manager
+from app.core.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.core.events import event_broker
+from app.core.etag import weak_etag, etag_matches, not_modified, set_etag
+from app.core.storage import store_image, generated_thumbnail, UnsupportedFile, FileTooLarge
+from app.core.thumbnails import thumbnail_worker
 from app.models.user import User
 from app.models.failure import Failure, FailureStatus, FailureSeverity
 from app.models.machine import Machine
 from app.models.production_line import ProductionLine
+from app.models.solution import Solution
+from app.models.table_version import table_versions
 from app.schemas.failure import (
     Failure as FailureSchema,
     FailureCreate,
     FailureUpdate,
-    FailureWithDetails
+    FailureWithDetails,
+    FailureImportResult
 )
+from app.schemas.solution import SimilarFailure
+from app.services.kpi_service import KPIService
+from app.services.search_service import SearchService
+from app.services.import_service import FailureImportService, IMPORT_CONTENT_TYPES
+from app.services.similarity_service import SimilarityService
+
+router = APIRouter(route_class=LimitedBodyRoute)
+
+# Esperas de miniaturas en curso (referencia para que no se recojan antes de terminar)
+_thumbnail_tasks: Set[asyncio.Task] = set()
+
+
+async def _paginate(
+    db: AsyncSession,
+    query,
+    response: Response,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    keyset: bool = True
+):
+    """
+    Pagina averías ordenadas por (reported_at, id) descendente
+
+    Con cursor usa paginación keyset (coste constante a cualquier profundidad),
+    sin cursor mantiene skip/limit. Si la página está completa se devuelve
+    el cursor de la siguiente en la cabecera X-Next-Cursor.
+    keyset=False (orden por relevancia) solo admite skip/limit: sin cabecera.
+    """
+    query = query.order_by(desc(Failure.reported_at), desc(Failure.id))
+
+    if cursor:
+        reported_at, failure_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Failure.reported_at, Failure.id) < tuple_(reported_at, failure_id))
+    else:
+        query = query.offset(skip)
+
+    failures = (await db.scalars(query.limit(limit))).all()
+
+    if keyset and len(failures) == limit:
+        last = failures[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.reported_at, last.id)
+
+    return failures
+
+
+def _with_details(query):
+    """
+    Carga máquina, línea y reportero en la misma consulta (JOINs)
+    para evitar una consulta adicional por cada avería, y has_solution
+    con una subconsulta EXISTS (índice de solutions.failure_id)
+    """
+    return query.options(
+        joinedload(Failure.machine).joinedload(Machine.production_line),
+        joinedload(Failure.reporter),
+        with_expression(
+            Failure.has_solution,
+            select(Solution.id).where(Solution.failure_id == Failure.id).exists()
+        )
+    )
+
+
+def _failure_etag(failure: Failure) -> str:
+    """ETag del detalle de una avería (incluye máquina, línea, reportero y has_solution)"""
+    machine = failure.machine
+    line = machine.production_line if machine else None
+    return weak_etag(
+        failure.id,
+        failure.updated_at,
+        machine.updated_at if machine else None,
+        line.updated_at if line else None,
+        failure.reporter.updated_at if failure.reporter else None,
+        bool(failure.has_solution)
+    )
+
 
-router = APIRouter()
+# Campos de la respuesta que se leen tal cual del modelo ORM
+FAILURE_FIELDS = tuple(FailureSchema.model_fields)
+
+
+def _to_failure_with_details(failure: Failure) -> FailureWithDetails:
+    """
+    Construye FailureWithDetails a partir de las relaciones ya cargadas
+
+    Los atributos se leen una vez del modelo ORM y se validan una sola vez
+    (antes: model_validate + model_dump + FailureWithDetails(**dict)).
+    model_construct no compensa: en pydantic 2 es Python puro y resulta más
+    lento que la validación en pydantic-core.
+    """
+    data = {name: getattr(failure, name) for name in FAILURE_FIELDS}
+
+    # Información de la máquina
+    machine = failure.machine
+    if machine:
+        data['machine_code'] = machine.code
+        data['machine_name'] = machine.name
+
+        # Información de la línea de producción
+        line = machine.production_line
+        if line:
+            data['production_line_code'] = line.name
+
+    # Información del reportero
+    reporter = failure.reporter
+    if reporter:
+        data['reporter_name'] = reporter.full_name
+
+    # Miniaturas ya generadas de las imágenes subidas por la API
+    data['thumbnails'] = [
+        thumbnail for thumbnail in map(generated_thumbnail, failure.images or []) if thumbnail
+    ]
+
+    # Calculado en la consulta con EXISTS (ver _with_details)
+    data['has_solution'] = bool(failure.has_solution)
+
+    return FailureWithDetails.model_validate(data)
 
 
 @router.get("/", response_model=List[FailureWithDetails])
-def list_failures(
+async def list_failures(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     production_line_id: Optional[int] = None,
@@ -30,13 +160,17 @@ def list_failures(
     reported_after: Optional[datetime] = None,
     reported_before: Optional[datetime] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Listar todas las averías con filtros avanzados
+    Admite paginación por cursor (parámetro cursor, cabecera X-Next-Cursor)
+    Con search los resultados se ordenan por relevancia
+    Responde 304 si If-None-Match coincide con el ETag actual
     """
-    query = db.query(Failure)
+    query = select(Failure)
 
     # Filtro por línea de producción (join con machines)
     if production_line_id:
@@ -61,60 +195,42 @@ def list_failures(
     if reported_before:
         query = query.filter(Failure.reported_at <= reported_before)
 
-    # Búsqueda de texto
+    # Búsqueda de texto completo (ordenada por relevancia)
     if search:
-        query = query.filter(
-            or_(
-                Failure.title.ilike(f"%{search}%"),
-                Failure.description.ilike(f"%{search}%")
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La búsqueda de texto se pagina con skip/limit, no con cursor"
             )
-        )
+        query = SearchService.search_failures(db, query, search)
 
-    # Ordenar por fecha más reciente primero
-    query = query.order_by(desc(Failure.reported_at))
+    # Sin cambios desde la última consulta del cliente: 304 sin cargar ni serializar filas
+    # (versión de las averías y de las tablas de los detalles: lectura por clave primaria)
+    versions = await db.scalars(table_versions(Failure, Machine, ProductionLine, User, Solution))
+    etag = weak_etag(request.url.query, *versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    # Paginación
-    failures = query.offset(skip).limit(limit).all()
+    # Paginación por fecha más reciente primero
+    # (máquina, línea y reportero se cargan en la misma consulta)
+    failures = await _paginate(db, _with_details(query), response, skip, limit, cursor, keyset=not search)
 
-    # Enriquecer con información adicional
-    result = []
-    for failure in failures:
-        failure_dict = FailureSchema.model_validate(failure).model_dump()
-
-        # Información de la máquina
-        machine = db.query(Machine).filter(Machine.id == failure.machine_id).first()
-        if machine:
-            failure_dict['machine_code'] = machine.code
-            failure_dict['machine_name'] = machine.name
-
-            # Información de la línea de producción
-            line = db.query(ProductionLine).filter(ProductionLine.id == machine.production_line_id).first()
-            if line:
-                failure_dict['production_line_code'] = line.name
-
-        # Información del reportero
-        reporter = db.query(User).filter(User.id == failure.reported_by).first()
-        if reporter:
-            failure_dict['reporter_name'] = reporter.full_name
-
-        # TODO: Verificar si tiene solución cuando exista el modelo Solution
-        failure_dict['has_solution'] = False
-
-        result.append(FailureWithDetails(**failure_dict))
-
-    return result
+    return [_to_failure_with_details(failure) for failure in failures]
 
 
 @router.get("/{failure_id}", response_model=FailureWithDetails)
-def get_failure(
+async def get_failure(
     failure_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener detalle completo de una avería
     """
-    failure = db.query(Failure).filter(Failure.id == failure_id).first()
+    failure = await db.scalar(_with_details(select(Failure)).filter(Failure.id == failure_id))
 
     if not failure:
         raise HTTPException(
@@ -122,41 +238,25 @@ def get_failure(
             detail=f"Avería con ID {failure_id} no encontrada"
         )
 
-    failure_dict = FailureSchema.model_validate(failure).model_dump()
-
-    # Información de la máquina
-    machine = db.query(Machine).filter(Machine.id == failure.machine_id).first()
-    if machine:
-        failure_dict['machine_code'] = machine.code
-        failure_dict['machine_name'] = machine.name
-
-        # Información de la línea de producción
-        line = db.query(ProductionLine).filter(ProductionLine.id == machine.production_line_id).first()
-        if line:
-            failure_dict['production_line_code'] = line.name
+    etag = _failure_etag(failure)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    # Información del reportero
-    reporter = db.query(User).filter(User.id == failure.reported_by).first()
-    if reporter:
-        failure_dict['reporter_name'] = reporter.full_name
-
-    # TODO: Verificar si tiene solución
-    failure_dict['has_solution'] = False
-
-    return FailureWithDetails(**failure_dict)
+    return _to_failure_with_details(failure)
 
 
 @router.post("/", response_model=FailureSchema, status_code=status.HTTP_201_CREATED)
-def create_failure(
+async def create_failure(
     failure_data: FailureCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Registrar una nueva avería
     """
     # Verificar que la máquina existe
-    machine = db.query(Machine).filter(Machine.id == failure_data.machine_id).first()
+    machine = await db.get(Machine, failure_data.machine_id)
     if not machine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -171,23 +271,186 @@ def create_failure(
     )
 
     db.add(new_failure)
-    db.commit()
-    db.refresh(new_failure)
 
-    return FailureSchema.model_validate(new_failure)
+    # Actualizar los KPIs del día, máquina y línea afectados
+    await db.run_sync(KPIService.refresh_for_failure, new_failure)
+
+    await db.commit()
+    await db.refresh(new_failure)
+
+    result = FailureSchema.model_validate(new_failure)
+    await event_broker.publish("failure.created", result.model_dump(mode="json"))
+
+    return result
+
+
+@router.post("/import", response_model=FailureImportResult)
+async def import_failures(
+    request: Request,
+    refresh_kpis: bool = True,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_manager)  # Solo managers y admins
+):
+    """
+    Importación masiva de averías históricas
+
+    El cuerpo es un CSV con cabecera (Content-Type: text/csv) o un objeto JSON
+    por línea (application/x-ndjson) con machine_code, title, description,
+    severity, status, reported_at, resolved_at y downtime_minutes.
+    Se procesa en streaming y por lotes; las filas con error se devuelven en
+    `errors` sin detener la carga. Con refresh_kpis=false no se recalculan los
+    KPIs (cargas muy grandes: ejecutar después KPIService.rebuild).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    file_format = IMPORT_CONTENT_TYPES.get(content_type)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Formato no soportado; usar {', '.join(IMPORT_CONTENT_TYPES)}"
+        )
+
+    result = await FailureImportService.import_failures(
+        db,
+        request.stream(),
+        file_format,
+        reported_by=current_user.id,
+        refresh_kpis=refresh_kpis
+    )
+
+    if result.imported:
+        # Un único evento: los clientes recargan en lugar de recibir miles de deltas
+        await event_broker.publish("failure.imported", {"imported": result.imported})
+
+    return result
+
+
+def _image_upload_limit() -> int:
+    return settings.MAX_IMAGE_UPLOAD_MB * 1024 * 1024 * settings.MAX_IMAGE_UPLOAD_FILES + MULTIPART_OVERHEAD_BYTES
+
+
+async def _touch_when_thumbnails_ready(failure_id: int, thumbnails: List[asyncio.Future]) -> None:
+    """
+    Al terminar las miniaturas nuevas de una subida se actualiza updated_at
+    de la avería: los ETag del detalle y de los listados, que solo incluyen
+    las miniaturas ya generadas, cambian
+    """
+    results = await asyncio.gather(*thumbnails, return_exceptions=True)
+    if not any(result is True for result in results):
+        return
+    async with AsyncSessionLocal() as db:
+        failure = await db.get(Failure, failure_id)
+        if failure is not None:
+            failure.updated_at = datetime.utcnow()
+            await db.commit()
+
+
+@router.post("/{failure_id}/images", response_model=FailureSchema)
+@max_body_size(_image_upload_limit)
+async def upload_failure_images(
+    failure_id: int,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Subir fotos de una avería (multipart, campo files, JPEG/PNG/WebP)
+
+    Cada foto se guarda por su sha256 (una foto repetida no ocupa más disco)
+    y se añade a images; la miniatura se genera en segundo plano y aparece
+    en thumbnails cuando está lista. Las imágenes se sirven en
+    /uploads/<ruta> con caché inmutable. Un cuerpo mayor que
+    MAX_IMAGE_UPLOAD_FILES fotos de MAX_IMAGE_UPLOAD_MB se rechaza (413)
+    antes de leerlo.
+    """
+    if len(files) > settings.MAX_IMAGE_UPLOAD_FILES:
+        for upload in files:
+            await upload.close()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Se admiten como máximo {settings.MAX_IMAGE_UPLOAD_FILES} fotos por petición"
+        )
+
+    failure = await db.get(Failure, failure_id)
+
+    if not failure:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Avería con ID {failure_id} no encontrada"
+        )
+
+    stored = []
+    for upload in files:
+        try:
+            # Copia por trozos y hash en el threadpool: no bloquea el event loop
+            stored.append(await run_in_threadpool(store_image, upload.file))
+        except UnsupportedFile as exc:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"{upload.filename}: {exc}"
+            )
+        except FileTooLarge as exc:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{upload.filename}: {exc}"
+            )
+        finally:
+            await upload.close()
+
+    images = list(failure.images or [])
+    images.extend(image.path for image in stored if image.path not in images)
+    # Nueva lista para que SQLAlchemy detecte el cambio en la columna JSON
+    failure.images = images
+
+    await db.commit()
+    await db.refresh(failure)
+
+    thumbnails = [thumbnail for thumbnail in (thumbnail_worker.submit(image.path) for image in stored) if thumbnail]
+    if thumbnails:
+        task = asyncio.get_running_loop().create_task(_touch_when_thumbnails_ready(failure_id, thumbnails))
+        _thumbnail_tasks.add(task)
+        task.add_done_callback(_thumbnail_tasks.discard)
+
+    result = FailureSchema.model_validate(failure)
+    await event_broker.publish("failure.updated", result.model_dump(mode="json"))
+
+    return result
+
+
+@router.get("/{failure_id}/similar", response_model=List[SimilarFailure])
+async def get_similar_failures(
+    failure_id: int,
+    limit: int = Query(5, ge=1, le=20),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Averías históricas parecidas a esta con sus soluciones exitosas
+    Ordenadas de más a menos parecida (índice BM25 local, sin servicios externos)
+    """
+    failure = await db.get(Failure, failure_id)
+
+    if not failure:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Avería con ID {failure_id} no encontrada"
+        )
+
+    return await SimilarityService.similar_failures(
+        db, failure.title, failure.description, limit=limit, exclude=[failure_id]
+    )
 
 
 @router.put("/{failure_id}", response_model=FailureSchema)
-def update_failure(
+async def update_failure(
     failure_id: int,
     failure_data: FailureUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Actualizar una avería existente
     """
-    failure = db.query(Failure).filter(Failure.id == failure_id).first()
+    failure = await db.get(Failure, failure_id)
 
     if not failure:
         raise HTTPException(
@@ -199,24 +462,32 @@ def update_failure(
     update_data = failure_data.model_dump(exclude_unset=True)
 
     # Si se está resolviendo la avería, establecer la fecha
+    event = "failure.updated"
     if 'status' in update_data:
         if update_data['status'] in [FailureStatus.RESOLVED.value, FailureStatus.CLOSED.value]:
             if not failure.resolved_at:
                 update_data['resolved_at'] = datetime.utcnow()
+                event = "failure.resolved"
 
     for field, value in update_data.items():
         setattr(failure, field, value)
 
-    db.commit()
-    db.refresh(failure)
+    # Actualizar los KPIs del día, máquina y línea afectados
+    await db.run_sync(KPIService.refresh_for_failure, failure)
+
+    await db.commit()
+    await db.refresh(failure)
 
-    return FailureSchema.model_validate(failure)
+    result = FailureSchema.model_validate(failure)
+    await event_broker.publish(event, result.model_dump(mode="json"))
+
+    return result
 
 
 @router.delete("/{failure_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_failure(
+async def delete_failure(
     failure_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -230,7 +501,7 @@ def delete_failure(
             detail="Solo los administradores pueden eliminar averías"
         )
 
-    failure = db.query(Failure).filter(Failure.id == failure_id).first()
+    failure = await db.get(Failure, failure_id)
 
     if not failure:
         raise HTTPException(
@@ -238,25 +509,36 @@ def delete_failure(
             detail=f"Avería con ID {failure_id} no encontrada"
         )
 
-    db.delete(failure)
-    db.commit()
+    reported_at, machine_id = failure.reported_at, failure.machine_id
+    await db.delete(failure)
+    await db.flush()
+
+    # Actualizar los KPIs del día, máquina y línea afectados
+    await db.run_sync(KPIService.refresh_for, reported_at, machine_id)
+
+    await db.commit()
+
+    await event_broker.publish("failure.deleted", {"id": failure_id, "machine_id": machine_id})
 
     return None
 
 
 @router.get("/machine/{machine_id}/history", response_model=List[FailureSchema])
-def get_machine_failure_history(
+async def get_machine_failure_history(
     machine_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener histórico de averías de una máquina específica
+    Admite paginación por cursor (parámetro cursor, cabecera X-Next-Cursor)
     """
     # Verificar que la máquina existe
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = await db.get(Machine, machine_id)
     if not machine:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -264,31 +546,111 @@ def get_machine_failure_history(
         )
 
     # Obtener averías ordenadas por fecha
-    failures = db.query(Failure).filter(
-        Failure.machine_id == machine_id
-    ).order_by(desc(Failure.reported_at)).offset(skip).limit(limit).all()
+    failures = await _paginate(
+        db,
+        select(Failure).filter(Failure.machine_id == machine_id),
+        response, skip, limit, cursor
+    )
 
     return [FailureSchema.model_validate(f) for f in failures]
 
 
+def _count_where(condition):
+    """COUNT condicional portable (SUM(CASE ...))"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _summary_columns():
+    """
+    Columnas del resumen como agregados condicionales sobre una sola pasada
+    """
+    return (
+        func.count(Failure.id).label("total_failures"),
+        _count_where(Failure.status == FailureStatus.OPEN).label("open"),
+        _count_where(Failure.status == FailureStatus.IN_PROGRESS).label("in_progress"),
+        _count_where(Failure.status == FailureStatus.RESOLVED).label("resolved"),
+        _count_where(Failure.severity == FailureSeverity.CRITICAL).label("critical_pending"),
+    )
+
+
+def _summary_row_to_dict(row) -> dict:
+    return {
+        "total_failures": row.total_failures,
+        "open": row.open,
+        "in_progress": row.in_progress,
+        "resolved": row.resolved,
+        "critical_pending": row.critical_pending
+    }
+
+
+def _period_bucket(dialect_name: str, period: str):
+    """
+    Expresión SQL que trunca reported_at al inicio del día, semana (lunes) o mes
+    """
+    if dialect_name == "sqlite":
+        if period == "month":
+            return func.strftime("%Y-%m-01", Failure.reported_at)
+        if period == "week":
+            return func.date(Failure.reported_at, "-6 days", "weekday 1")
+        return func.date(Failure.reported_at)
+    # PostgreSQL
+    return func.date_trunc(period, Failure.reported_at)
+
+
 @router.get("/stats/summary")
-def get_failures_summary(
-    db: Session = Depends(get_db),
+async def get_failures_summary(
+    by_line: bool = False,
+    period: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    reported_after: Optional[datetime] = None,
+    reported_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener resumen de estadísticas de averías
+    Todos los contadores se calculan en una única consulta agregada.
+    Opcionalmente incluye desglose por línea (by_line) y por periodo (period: day, week, month)
     """
-    total = db.query(Failure).count()
-    open_failures = db.query(Failure).filter(Failure.status == FailureStatus.OPEN).count()
-    in_progress = db.query(Failure).filter(Failure.status == FailureStatus.IN_PROGRESS).count()
-    resolved = db.query(Failure).filter(Failure.status == FailureStatus.RESOLVED).count()
-    critical = db.query(Failure).filter(Failure.severity == FailureSeverity.CRITICAL).count()
-
-    return {
-        "total_failures": total,
-        "open": open_failures,
-        "in_progress": in_progress,
-        "resolved": resolved,
-        "critical_pending": critical
-    }
+    def apply_filters(query):
+        if reported_after:
+            query = query.filter(Failure.reported_at >= reported_after)
+        if reported_before:
+            query = query.filter(Failure.reported_at <= reported_before)
+        return query
+
+    row = (await db.execute(apply_filters(select(*_summary_columns())))).one()
+    summary = _summary_row_to_dict(row)
+
+    # Desglose por línea de producción
+    if by_line:
+        query = select(
+            ProductionLine.id, ProductionLine.name, *_summary_columns()
+        ).join(
+            Machine, Machine.production_line_id == ProductionLine.id
+        ).join(
+            Failure, Failure.machine_id == Machine.id
+        ).group_by(ProductionLine.id, ProductionLine.name).order_by(ProductionLine.name)
+
+        summary["by_line"] = [
+            {
+                "production_line_id": r[0],
+                "production_line_code": r[1],
+                **_summary_row_to_dict(r)
+            }
+            for r in (await db.execute(apply_filters(query))).all()
+        ]
+
+    # Desglose por periodo
+    if period:
+        bucket = _period_bucket(db.get_bind().dialect.name, period).label("period")
+        query = select(bucket, *_summary_columns()).group_by(bucket).order_by(bucket)
+
+        summary["by_period"] = [
+            {
+                "period": r[0].date().isoformat() if isinstance(r[0], datetime) else str(r[0]),
+                **_summary_row_to_dict(r)
+            }
+            for r in (await db.execute(apply_filters(query))).all()
+        ]
+
+    return summary
@@ -0,0 +1,62 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_db, get_current_active_user
+from app.models.user import User
+from app.schemas import KPI, DashboardKPIs
+from app.services.kpi_service import KPIService
+
+router = APIRouter(prefix="/kpi", tags=["kpi"])
+
+
+@router.get("/", response_model=List[KPI])
+async def list_kpis(
+    production_line_id: Optional[int] = None,
+    machine_id: Optional[int] = None,
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtener KPIs diarios (por máquina, por línea o globales)
+    """
+    return await db.run_sync(
+        KPIService.list_kpis,
+        production_line_id=production_line_id,
+        machine_id=machine_id,
+        period_start=period_start,
+        period_end=period_end
+    )
+
+
+@router.get("/dashboard", response_model=DashboardKPIs)
+async def get_dashboard_kpis(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtener KPIs globales del mes en curso para el dashboard
+    """
+    return await db.run_sync(KPIService.dashboard)
+
+
+@router.get("/line/{line_id}", response_model=List[KPI])
+async def get_line_kpis(
+    line_id: int,
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtener KPIs diarios de una línea de producción
+    """
+    return await db.run_sync(
+        KPIService.list_kpis,
+        production_line_id=line_id,
+        period_start=period_start,
+        period_end=period_end
+    )
@@ -1,12 +1,16 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import or_, select
 
 from app.core.dependencies import get_db, get_current_active_user, require_manager
+from app.core.etag import weak_etag, etag_matches, not_modified, set_etag
 from app.models.user import User
 from app.models.machine import Machine
 from app.models.production_line import ProductionLine
+from app.models.table_version import table_versions
 from app.schemas.machine import (
     Machine as MachineSchema,
     MachineCreate,
@@ -14,24 +18,29 @@ from app.schemas.machine import (
     MachineWithLine,
     MachineWithStats
 )
+from app.services.machine_service import MachineService
+from app.services.reliability_service import ReliabilityService
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[MachineWithLine])
-def list_machines(
+async def list_machines(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     production_line_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Listar todas las máquinas con filtros opcionales
+    Responde 304 si If-None-Match coincide con el ETag actual
     """
-    query = db.query(Machine)
+    query = select(Machine)
 
     # Filtros
     if production_line_id:
@@ -49,35 +58,32 @@ def list_machines(
             )
         )
 
-    # Paginación
-    machines = query.offset(skip).limit(limit).all()
-
-    # Enriquecer con información de la línea
-    result = []
-    for machine in machines:
-        machine_dict = MachineSchema.model_validate(machine).model_dump()
+    # ETag: versión de las tablas de máquinas y líneas (lectura por clave primaria)
+    versions = await db.scalars(table_versions(Machine, ProductionLine))
+    etag = weak_etag(request.url.query, *versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-        # Agregar información de la línea
-        line = db.query(ProductionLine).filter(ProductionLine.id == machine.production_line_id).first()
-        if line:
-            machine_dict['production_line_code'] = line.name
-            machine_dict['production_line_name'] = line.description or line.name
-
-        result.append(MachineWithLine(**machine_dict))
+    # Paginación
+    machines = (await db.scalars(query.offset(skip).limit(limit))).all()
 
-    return result
+    # Enriquecer con información de la línea (una sola consulta para toda la página)
+    return await db.run_sync(MachineService.enrich_with_lines, machines)
 
 
 @router.get("/{machine_id}", response_model=MachineWithLine)
-def get_machine(
+async def get_machine(
     machine_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener detalle de una máquina específica
     """
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = await db.get(Machine, machine_id, options=[joinedload(Machine.production_line)])
 
     if not machine:
         raise HTTPException(
@@ -85,21 +91,21 @@ def get_machine(
             detail=f"Máquina con ID {machine_id} no encontrada"
         )
 
-    machine_dict = MachineSchema.model_validate(machine).model_dump()
+    line = machine.production_line
+    etag = weak_etag(machine.id, machine.updated_at, line.updated_at if line else None)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    # Agregar información de la línea
-    line = db.query(ProductionLine).filter(ProductionLine.id == machine.production_line_id).first()
-    if line:
-        machine_dict['production_line_code'] = line.name
-        machine_dict['production_line_name'] = line.description or line.name
-
-    return MachineWithLine(**machine_dict)
+    # La línea ya viene en la misma consulta (joinedload): sin consulta IN adicional
+    lines = {line.id: line} if line else {}
+    return MachineWithLine(**MachineService.to_machine_with_line(machine, lines))
 
 
 @router.post("/", response_model=MachineSchema, status_code=status.HTTP_201_CREATED)
-def create_machine(
+async def create_machine(
     machine_data: MachineCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)  # Solo managers y admins
 ):
     """
@@ -107,9 +113,7 @@ def create_machine(
     Requiere rol: manager o admin
     """
     # Verificar que la línea de producción existe
-    line = db.query(ProductionLine).filter(
-        ProductionLine.id == machine_data.production_line_id
-    ).first()
+    line = await db.get(ProductionLine, machine_data.production_line_id)
 
     if not line:
         raise HTTPException(
@@ -118,7 +122,7 @@ def create_machine(
         )
 
     # Verificar que el código no esté duplicado
-    existing = db.query(Machine).filter(Machine.code == machine_data.code).first()
+    existing = await db.scalar(select(Machine).filter(Machine.code == machine_data.code))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,24 +132,24 @@ def create_machine(
     # Crear la máquina
     new_machine = Machine(**machine_data.model_dump())
     db.add(new_machine)
-    db.commit()
-    db.refresh(new_machine)
+    await db.commit()
+    await db.refresh(new_machine)
 
     return MachineSchema.model_validate(new_machine)
 
 
 @router.put("/{machine_id}", response_model=MachineSchema)
-def update_machine(
+async def update_machine(
     machine_id: int,
     machine_data: MachineUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)  # Solo managers y admins
 ):
     """
     Actualizar una máquina existente
     Requiere rol: manager o admin
     """
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = await db.get(Machine, machine_id)
 
     if not machine:
         raise HTTPException(
@@ -155,9 +159,7 @@ def update_machine(
 
     # Verificar línea de producción si se está actualizando
     if machine_data.production_line_id:
-        line = db.query(ProductionLine).filter(
-            ProductionLine.id == machine_data.production_line_id
-        ).first()
+        line = await db.get(ProductionLine, machine_data.production_line_id)
         if not line:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -166,7 +168,7 @@ def update_machine(
 
     # Verificar código único si se está actualizando
     if machine_data.code and machine_data.code != machine.code:
-        existing = db.query(Machine).filter(Machine.code == machine_data.code).first()
+        existing = await db.scalar(select(Machine).filter(Machine.code == machine_data.code))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -178,23 +180,23 @@ def update_machine(
     for field, value in update_data.items():
         setattr(machine, field, value)
 
-    db.commit()
-    db.refresh(machine)
+    await db.commit()
+    await db.refresh(machine)
 
     return MachineSchema.model_validate(machine)
 
 
 @router.delete("/{machine_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_machine(
+async def delete_machine(
     machine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)  # Solo managers y admins
 ):
     """
     Eliminar (soft delete) una máquina
     Requiere rol: manager o admin
     """
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = await db.get(Machine, machine_id)
 
     if not machine:
         raise HTTPException(
@@ -204,21 +206,24 @@ def delete_machine(
 
     # Soft delete: marcar como inactiva
     machine.is_active = False
-    db.commit()
+    await db.commit()
 
     return None
 
 
 @router.get("/{machine_id}/stats", response_model=MachineWithStats)
-def get_machine_stats(
+async def get_machine_stats(
     machine_id: int,
-    db: Session = Depends(get_db),
+    period_start: Optional[datetime] = None,
+    period_end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Obtener estadísticas de una máquina (failures, MTTR, MTBF)
+    Obtener estadísticas de una máquina (failures, MTTR, MTBF, disponibilidad)
+    MTTR y MTBF se expresan en horas
     """
-    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    machine = await db.get(Machine, machine_id)
 
     if not machine:
         raise HTTPException(
@@ -226,18 +231,16 @@ def get_machine_stats(
             detail=f"Máquina con ID {machine_id} no encontrada"
         )
 
-    machine_dict = MachineSchema.model_validate(machine).model_dump()
-
     # Agregar información de la línea
-    line = db.query(ProductionLine).filter(ProductionLine.id == machine.production_line_id).first()
-    if line:
-        machine_dict['production_line_code'] = line.name
-        machine_dict['production_line_name'] = line.description or line.name
-
-    # TODO: Calcular estadísticas reales cuando exista el modelo Failure
-    machine_dict['total_failures'] = 0
-    machine_dict['active_failures'] = 0
-    machine_dict['mttr'] = None
-    machine_dict['mtbf'] = None
+    lines = await db.run_sync(MachineService.get_lines_by_id, [machine])
+    machine_dict = MachineService.to_machine_with_line(machine, lines)
+
+    # Métricas de fiabilidad calculadas con una única consulta agregada
+    machine_dict.update(await db.run_sync(
+        ReliabilityService.compute,
+        machine_id=machine_id,
+        period_start=period_start,
+        period_end=period_end
+    ))
 
     return MachineWithStats(**machine_dict)
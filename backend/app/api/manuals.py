@@ -0,0 +1,306 @@
+import os
+from pathlib import Path
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, literal, select
+
+from app.core.body_limit import LimitedBodyRoute, max_body_size, MULTIPART_OVERHEAD_BYTES
+from app.core.config import settings
+from app.core.dependencies import get_db, get_current_active_user, get_current_user_for_stream, require_manager
+from app.core.etag import CACHE_CONTROL
+from app.core.files import serve_file
+from app.core.storage import (
+    store_document, absolute_path, StoredFile, UnsupportedFile, FileTooLarge,
+    DOCUMENT_TYPES, DOCUMENT_MEDIA_TYPES
+)
+from app.models.user import User
+from app.models.machine import Machine
+from app.models.manual import Manual, ManualType, ExtractionStatus
+from app.schemas import CurrentUser
+from app.schemas.manual import (
+    Manual as ManualSchema,
+    ManualWithDetails,
+    ManualSearchFilter,
+    ManualSearchResult
+)
+from app.services.manual_ingestion_service import ManualIngestionService
+from app.services.search_service import SearchService
+
+router = APIRouter(prefix="/manuals", tags=["manuals"], route_class=LimitedBodyRoute)
+
+
+def _manual_upload_limit() -> int:
+    return settings.MAX_MANUAL_UPLOAD_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+
+
+def _parse_tags(tags: Optional[str]) -> List[str]:
+    """Etiquetas separadas por comas (multipart no admite listas JSON)"""
+    if not tags:
+        return []
+    return list(dict.fromkeys(tag.strip() for tag in tags.split(",") if tag.strip()))
+
+
+async def _store_upload(file: UploadFile) -> StoredFile:
+    """Guarda el documento subido (415 / 413 si no se admite)"""
+    try:
+        # Copia por trozos y hash en el threadpool: no bloquea el event loop
+        return await run_in_threadpool(store_document, file.file, file.filename)
+    except UnsupportedFile as exc:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"{file.filename}: {exc}"
+        )
+    except FileTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{file.filename}: {exc}"
+        )
+    finally:
+        await file.close()
+
+
+def _set_file(manual: Manual, stored: StoredFile, filename: Optional[str]) -> None:
+    """Asocia el fichero almacenado al manual y deja pendiente la extracción de texto"""
+    manual.file_url = stored.path
+    manual.file_type = DOCUMENT_TYPES[Path(stored.path).suffix]
+    manual.file_name = Path(filename or "").name or None
+    manual.file_size_bytes = stored.size
+    manual.extraction_status = ExtractionStatus.PENDING.value
+
+
+async def _get_manual_or_404(db: AsyncSession, manual_id: int) -> Manual:
+    manual = await db.get(Manual, manual_id)
+    if not manual:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Manual con ID {manual_id} no encontrado"
+        )
+    return manual
+
+
+@router.get("/", response_model=List[ManualSchema])
+async def list_manuals(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    machine_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Listar manuales, opcionalmente de una máquina
+    """
+    query = select(Manual)
+    if machine_id is not None:
+        query = query.filter(Manual.machine_id == machine_id)
+
+    manuals = (await db.scalars(
+        query.order_by(desc(Manual.created_at), desc(Manual.id)).offset(skip).limit(limit)
+    )).all()
+
+    return [ManualSchema.model_validate(manual) for manual in manuals]
+
+
+@router.get("/search", response_model=List[ManualSearchResult])
+async def search_manuals(
+    filters: Annotated[ManualSearchFilter, Query()],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Buscar manuales por texto (título, descripción y contenido) con filtros
+
+    Con search los resultados se ordenan por relevancia sobre el índice de
+    texto completo (GIN en PostgreSQL, FTS5 en SQLite) e incluyen un
+    fragmento con los términos resaltados entre <mark> (HTML ya escapado).
+    tags exige todas las etiquetas indicadas (?tags=a&tags=b).
+    """
+    query = select(Manual)
+
+    # Filtro por línea de producción (join con machines)
+    if filters.production_line_id:
+        query = query.join(Machine, Machine.id == Manual.machine_id).filter(
+            Machine.production_line_id == filters.production_line_id
+        )
+
+    if filters.machine_id:
+        query = query.filter(Manual.machine_id == filters.machine_id)
+
+    if filters.file_type:
+        query = query.filter(Manual.file_type == filters.file_type.lower())
+
+    if filters.tags:
+        query = SearchService.filter_tags(db, query, filters.tags)
+
+    if filters.search:
+        query = SearchService.search_manuals(db, query, filters.search)
+    else:
+        query = query.add_columns(literal(None).label("score")).order_by(
+            desc(Manual.created_at), desc(Manual.id)
+        )
+
+    rows = (await db.execute(query.offset(filters.skip).limit(filters.limit))).all()
+
+    snippets = {}
+    if filters.search:
+        snippets = await SearchService.manual_snippets(db, filters.search, (manual.id for manual, _ in rows))
+
+    return [
+        ManualSearchResult.model_validate(manual).model_copy(
+            update={"score": score, "snippet": snippets.get(manual.id)}
+        )
+        for manual, score in rows
+    ]
+
+
+@router.get("/{manual_id}", response_model=ManualWithDetails)
+async def get_manual(
+    manual_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtener un manual con los datos de su máquina
+    """
+    manual = await _get_manual_or_404(db, manual_id)
+    machine = await db.get(Machine, manual.machine_id)
+
+    result = ManualWithDetails.model_validate(manual)
+    if machine:
+        result.machine_code = machine.code
+        result.machine_name = machine.name
+    return result
+
+
+@router.post("/", response_model=ManualSchema, status_code=status.HTTP_201_CREATED)
+@max_body_size(_manual_upload_limit)
+async def upload_manual(
+    title: str = Form(..., min_length=1, max_length=200),
+    machine_id: int = Form(...),
+    manual_type: ManualType = Form(ManualType.MAINTENANCE),
+    description: Optional[str] = Form(None),
+    version: Optional[str] = Form(None, max_length=50),
+    tags: Optional[str] = Form(None, description="Etiquetas separadas por comas"),
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """
+    Subir un manual (multipart, PDF/DOC/DOCX)
+
+    El fichero se copia por trozos y se guarda por su sha256 en manuals/,
+    fuera de la ruta pública /uploads: solo se descarga autenticado a
+    través de GET /manuals/{id}/file. El texto de los PDF se extrae en
+    segundo plano (extraction_status pasa de pending a done)
+    """
+    machine = await db.get(Machine, machine_id)
+    if not machine:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Máquina con ID {machine_id} no encontrada"
+        )
+
+    manual = Manual(
+        title=title,
+        description=description,
+        content="",
+        manual_type=manual_type,
+        machine_id=machine_id,
+        version=version,
+        tags=_parse_tags(tags),
+        created_by=current_user.id
+    )
+    _set_file(manual, await _store_upload(file), file.filename)
+    db.add(manual)
+    await db.commit()
+    await db.refresh(manual)
+
+    # Extracción del texto en segundo plano (rellena content y manual_chunks)
+    ManualIngestionService.schedule(manual.id)
+
+    return ManualSchema.model_validate(manual)
+
+
+@router.put("/{manual_id}/file", response_model=ManualSchema)
+@max_body_size(_manual_upload_limit)
+async def replace_manual_file(
+    manual_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_manager)
+):
+    """
+    Reemplazar el fichero de un manual (nueva versión del documento)
+
+    Volver a subir el mismo fichero no cambia nada: se identifica por su
+    sha256 y no se vuelve a extraer el texto
+    """
+    manual = await _get_manual_or_404(db, manual_id)
+    stored = await _store_upload(file)
+
+    if stored.path != manual.file_url:
+        _set_file(manual, stored, file.filename)
+        await db.commit()
+        await db.refresh(manual)
+        ManualIngestionService.schedule(manual.id)
+
+    return ManualSchema.model_validate(manual)
+
+
+@router.api_route("/{manual_id}/file", methods=["GET", "HEAD"])
+async def download_manual_file(
+    manual_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user_for_stream)
+) -> Response:
+    """
+    Descargar el fichero de un manual
+
+    - Range (un único rango) -> 206 con Content-Range: el visor de PDF abre
+      la primera página sin esperar al fichero completo y una descarga
+      cortada se reanuda donde quedó (If-Range evita mezclar versiones)
+    - ETag (sha256 del contenido) y Last-Modified -> 304 si no ha cambiado
+    - Se envía por trozos sin cargar el fichero en memoria; con
+      MANUALS_ACCEL_PREFIX lo envía nginx (X-Accel-Redirect + sendfile)
+
+    Admite el token en ?access_token= para abrir el enlace directamente
+    """
+    manual = await _get_manual_or_404(db, manual_id)
+    file_path, file_type = manual.file_url, manual.file_type
+    filename = manual.file_name or f"{manual.title}{Path(file_path or '').suffix}"
+
+    # La conexión vuelve al pool antes de enviar el fichero (puede tardar minutos)
+    await db.close()
+
+    if not file_path or not file_path.startswith("manuals/"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"El manual {manual_id} no tiene fichero"
+        )
+
+    path = absolute_path(file_path)
+    try:
+        stat = await run_in_threadpool(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Fichero del manual {manual_id} no encontrado"
+        )
+
+    accel_redirect = None
+    if settings.MANUALS_ACCEL_PREFIX:
+        accel_redirect = f"{settings.MANUALS_ACCEL_PREFIX.rstrip('/')}/{file_path}"
+
+    return serve_file(
+        request,
+        str(path),
+        stat,
+        # Almacenamiento por contenido: el nombre del fichero es su sha256 (ETag fuerte)
+        etag=f'"{path.stem}"',
+        media_type=DOCUMENT_MEDIA_TYPES.get(file_type, "application/octet-stream"),
+        filename=filename,
+        cache_control=CACHE_CONTROL,
+        accel_redirect=accel_redirect
+    )
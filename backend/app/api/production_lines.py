@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from uuid import UUID
 
 from app.core.dependencies import get_db, get_current_active_user, require_manager
+from app.core.etag import weak_etag, etag_matches, not_modified, set_etag
 from app.models.user import User
 from app.models.production_line import ProductionLine as ProductionLineModel
+from app.models.table_version import table_versions
 from app.schemas import (
     ProductionLine, ProductionLineCreate, ProductionLineUpdate,
     ProductionLineWithStats
@@ -15,35 +17,46 @@ router = APIRouter(prefix="/lines", tags=["production-lines"])
 
 
 @router.get("/", response_model=List[ProductionLine])
-def get_production_lines(
+async def get_production_lines(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     include_inactive: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener lista de líneas de producción
+    Responde 304 si If-None-Match coincide con el ETag actual
     """
-    query = db.query(ProductionLineModel)
+    query = select(ProductionLineModel)
 
     if not include_inactive:
         query = query.filter(ProductionLineModel.is_active == True)
 
-    lines = query.offset(skip).limit(limit).all()
+    versions = await db.scalars(table_versions(ProductionLineModel))
+    etag = weak_etag(request.url.query, *versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    lines = (await db.scalars(query.offset(skip).limit(limit))).all()
     return lines
 
 
 @router.get("/{line_id}", response_model=ProductionLine)
-def get_production_line(
-    line_id: UUID,
-    db: Session = Depends(get_db),
+async def get_production_line(
+    line_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Obtener una línea de producción por ID
     """
-    line = db.query(ProductionLineModel).filter(ProductionLineModel.id == line_id).first()
+    line = await db.get(ProductionLineModel, line_id)
 
     if not line:
         raise HTTPException(
@@ -51,13 +64,18 @@ def get_production_line(
             detail="Línea de producción no encontrada"
         )
 
+    etag = weak_etag(line.id, line.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     return line
 
 
 @router.post("/", response_model=ProductionLine, status_code=status.HTTP_201_CREATED)
-def create_production_line(
+async def create_production_line(
     line_create: ProductionLineCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
     """
@@ -65,9 +83,9 @@ def create_production_line(
     Requiere rol de manager o admin
     """
     # Verificar si el código ya existe
-    existing_line = db.query(ProductionLineModel).filter(
+    existing_line = await db.scalar(select(ProductionLineModel).filter(
         ProductionLineModel.code == line_create.code
-    ).first()
+    ))
 
     if existing_line:
         raise HTTPException(
@@ -77,24 +95,24 @@ def create_production_line(
 
     db_line = ProductionLineModel(**line_create.model_dump())
     db.add(db_line)
-    db.commit()
-    db.refresh(db_line)
+    await db.commit()
+    await db.refresh(db_line)
 
     return db_line
 
 
 @router.put("/{line_id}", response_model=ProductionLine)
-def update_production_line(
-    line_id: UUID,
+async def update_production_line(
+    line_id: int,
     line_update: ProductionLineUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
     """
     Actualizar una línea de producción
     Requiere rol de manager o admin
     """
-    db_line = db.query(ProductionLineModel).filter(ProductionLineModel.id == line_id).first()
+    db_line = await db.get(ProductionLineModel, line_id)
 
     if not db_line:
         raise HTTPException(
@@ -107,9 +125,9 @@ def update_production_line(
 
     # Si se actualiza el código, verificar que no exista
     if "code" in update_data and update_data["code"] != db_line.code:
-        existing_line = db.query(ProductionLineModel).filter(
+        existing_line = await db.scalar(select(ProductionLineModel).filter(
             ProductionLineModel.code == update_data["code"]
-        ).first()
+        ))
 
         if existing_line:
             raise HTTPException(
@@ -120,23 +138,23 @@ def update_production_line(
     for field, value in update_data.items():
         setattr(db_line, field, value)
 
-    db.commit()
-    db.refresh(db_line)
+    await db.commit()
+    await db.refresh(db_line)
 
     return db_line
 
 
 @router.delete("/{line_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_production_line(
-    line_id: UUID,
-    db: Session = Depends(get_db),
+async def delete_production_line(
+    line_id: int,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_manager)
 ):
     """
     Eliminar (desactivar) una línea de producción
     Requiere rol de manager o admin
     """
-    db_line = db.query(ProductionLineModel).filter(ProductionLineModel.id == line_id).first()
+    db_line = await db.get(ProductionLineModel, line_id)
 
     if not db_line:
         raise HTTPException(
@@ -146,6 +164,6 @@ def delete_production_line(
 
     # Soft delete - solo marcar como inactiva
     db_line.is_active = False
-    db.commit()
+    await db.commit()
 
     return None
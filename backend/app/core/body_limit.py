@@ -0,0 +1,61 @@
+from typing import Callable
+
+from fastapi import HTTPException, Request, status
+from fastapi.routing import APIRoute
+
+# Margen del multipart sobre el tamaño de los ficheros (cabeceras de cada parte y campos de texto)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def max_body_size(limit: Callable[[], int]):
+    """
+    Tamaño máximo del cuerpo de un endpoint (bytes, leído en cada petición)
+    Solo se aplica en los routers con route_class=LimitedBodyRoute
+    """
+    def decorator(endpoint):
+        endpoint.max_body_size = limit
+        return endpoint
+    return decorator
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"La petición supera {limit // (1024 * 1024)} MB"
+    )
+
+
+class LimitedBodyRoute(APIRoute):
+    """
+    Ruta que rechaza con 413 los cuerpos mayores que el max_body_size del
+    endpoint antes de que FastAPI lea el multipart (que vuelca los ficheros
+    a temporales en disco): por Content-Length sin leer nada y, si no lo
+    hay (chunked) o miente, en cuanto lo recibido lo supera
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        max_size = getattr(self.endpoint, "max_body_size", None)
+        if max_size is None:
+            return handler
+
+        async def limited_handler(request: Request):
+            limit = max_size()
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > limit:
+                raise _too_large(limit)
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large(limit)
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
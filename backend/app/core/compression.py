@@ -0,0 +1,139 @@
+import gzip
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    # Opcional: sin el paquete brotli solo se negocia gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Tipos de contenido que merece la pena comprimir (JSON, texto, CSV...)
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Por encima de este tamaño se comprime en el threadpool (zlib y brotli liberan el GIL)
+# para no bloquear el event loop varios milisegundos
+THREADPOOL_MIN_SIZE = 64 * 1024
+
+
+def accepted_encodings(header: str) -> set:
+    """Codificaciones aceptadas según Accept-Encoding (se descartan las de q=0)"""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(header: str):
+    """Brotli si el cliente lo admite y está instalado; si no, gzip; None sin compresión"""
+    accepted = accepted_encodings(header)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Comprime el cuerpo con la codificación negociada"""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith("text/event-stream")
+    )
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime con brotli o gzip (según Accept-Encoding)
+    las respuestas completas de al menos minimum_size bytes
+
+    Las respuestas en streaming (SSE, descargas por trozos) se envían sin
+    comprimir: comprimirlas retrasaría cada trozo y rompería las peticiones Range.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] not in ("http.response.start", "http.response.body"):
+                # p. ej. http.response.pathsend: el servidor envía el fichero tal cual
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Se retiene hasta ver el cuerpo: las cabeceras dependen de si se comprime
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start_message)
+
+            if message.get("more_body", False) or not _is_compressible(headers):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.minimum_size:
+                if len(body) >= THREADPOOL_MIN_SIZE:
+                    body = await anyio.to_thread.run_sync(
+                        compress, body, encoding, self.gzip_level, self.brotli_quality
+                    )
+                else:
+                    body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,7 +1,42 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Type
+from uuid import uuid4
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import Pool, NullPool, QueuePool, AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolMetrics, instrumented_pool_class, instrument_engine
+from app.core.request_stats import current_request_stats, QueryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+# Métricas de los pools de conexiones (expuestas en /metrics/pool)
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+def _pool_options(metrics: PoolMetrics, queue_pool: Type[Pool]) -> dict:
+    """
+    Opciones de pool para PostgreSQL según Settings
+
+    En modo PgBouncer la aplicación no mantiene conexiones propias (NullPool):
+    cada checkout abre una conexión contra PgBouncer, que es quien hace de pool.
+    """
+    if settings.DB_PGBOUNCER:
+        return {"poolclass": instrumented_pool_class(NullPool, metrics)}
+
+    return {
+        "poolclass": instrumented_pool_class(queue_pool, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
 
 # Crear engine de SQLAlchemy con configuración condicional
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -15,21 +50,114 @@ else:
     # PostgreSQL config
     engine = create_engine(
         settings.DATABASE_URL,
-        pool_pre_ping=True,
         echo=False,
+        **_pool_options(sync_pool_metrics, QueuePool)
     )
 
 # SessionLocal class para crear sesiones de base de datos
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(url: str) -> str:
+    """
+    Traduce una URL síncrona al driver asíncrono equivalente
+    postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://
+    """
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect == "postgresql":
+        return f"postgresql+asyncpg://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+# Engine asíncrono usado por los routers de la API: mientras una consulta
+# espera a la BD el event loop sigue atendiendo otras peticiones.
+# El engine síncrono se mantiene para scripts (init_db), Alembic y servicios batch.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+else:
+    connect_args = {}
+    if settings.DB_PGBOUNCER and ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+        # En modo transacción PgBouncer puede cambiar de servidor entre PREPARE
+        # y EXECUTE: sin caché de prepared statements y con nombres únicos
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        connect_args=connect_args,
+        **_pool_options(async_pool_metrics, AsyncAdaptedQueuePool)
+    )
+
+instrument_engine(engine, sync_pool_metrics)
+instrument_engine(async_engine.sync_engine, async_pool_metrics)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Con QUERY_BUDGET_PER_REQUEST > 0 (desarrollo/tests) la petición falla
+    al intentar superar el presupuesto de consultas
+    """
+    stats = current_request_stats()
+    budget = settings.QUERY_BUDGET_PER_REQUEST
+    if stats is not None and budget > 0 and stats.query_count >= budget:
+        raise QueryBudgetExceeded(
+            f"{stats.route} supera el presupuesto de {budget} consultas SQL por petición"
+        )
+
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Acumula la consulta en las estadísticas de la petición en curso
+    y registra las que superan SLOW_QUERY_THRESHOLD_MS
+    """
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = current_request_stats()
+    if stats is not None:
+        stats.record_query(elapsed)
+
+    threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold_ms > 0 and elapsed * 1000 >= threshold_ms:
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s",
+            elapsed * 1000,
+            stats.route if stats is not None else "fuera de petición",
+            " ".join(statement.split())
+        )
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+# Sin expire_on_commit: tras el commit los objetos se siguen pudiendo serializar
+# sin lanzar cargas implícitas (no permitidas fuera de un await)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class para los modelos
 Base = declarative_base()
 
 
-# Dependency para obtener la sesión de BD
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_pool_stats() -> dict:
+    """
+    Estado de los pools de conexiones (síncrono y asíncrono)
+    """
+    return {
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool)
+    }
@@ -1,39 +1,69 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import SessionLocal
-from app.models.user import User
+from app.core.database import AsyncSessionLocal
+from app.schemas import CurrentUser
 from app.services.auth_service import AuthService
 
 # Esquema de seguridad Bearer
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency para obtener la sesión de base de datos
+    Dependency para obtener la sesión asíncrona de base de datos (unidad de trabajo)
+
+    - Una única sesión por petición: FastAPI cachea la dependency, de modo que
+      get_current_user y el endpoint comparten la misma sesión.
+    - La conexión se pide al pool en la primera consulta: las peticiones
+      servidas desde caché o sin acceso a BD no ocupan conexión.
+    - Si el endpoint falla se hace rollback, y al terminar la conexión vuelve al pool.
+
+    Los servicios síncronos se invocan con `await db.run_sync(...)`
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
     """
     Dependency para obtener el usuario actual desde el token
+    Con la caché de usuarios no se consulta la BD (la sesión no llega a abrir conexión)
     """
     token = credentials.credentials
-    return AuthService.get_current_user_from_token(db, token)
+    return await AuthService.get_current_user_from_token(db, token)
+
+
+async def get_current_user_for_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None, description="Token de acceso (EventSource y enlaces de descarga no admiten cabeceras)"),
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """
+    Dependency de autenticación para streams (SSE) y descargas de ficheros
+    Acepta la cabecera Bearer o el token en ?access_token=
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await AuthService.get_current_user_from_token(db, token)
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """
     Dependency para obtener el usuario actual activo
     """
@@ -50,7 +80,7 @@ def require_role(allowed_roles: list[str]):
     Dependency factory para requerir roles específicos
     Uso: current_user: User = Depends(require_role(["admin", "manager"]))
     """
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    async def role_checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
         AuthService.check_role(current_user, allowed_roles)
         return current_user
 
@@ -62,7 +92,7 @@ def require_subscription(required_tier: str = "free"):
     Dependency factory para requerir nivel de suscripción
     Uso: current_user: User = Depends(require_subscription("pro"))
     """
-    def subscription_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    async def subscription_checker(current_user: CurrentUser = Depends(get_current_active_user)) -> CurrentUser:
         AuthService.check_subscription(current_user, required_tier)
         return current_user
 
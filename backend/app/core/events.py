@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+# Límite de NOTIFY en PostgreSQL (8000 bytes) con margen
+MAX_NOTIFY_PAYLOAD_BYTES = 7900
+
+# Marca que se entrega a un suscriptor que no consumió a tiempo sus eventos
+RESYNC = object()
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Serializa un evento en formato Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    """Cola de eventos de un cliente conectado"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, frame: str) -> bool:
+        """
+        Encola un evento sin bloquear; si la cola está llena se vacía y se deja
+        RESYNC para que el cliente recargue en lugar de perder deltas en silencio
+        """
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class EventBroker:
+    """
+    Pub/sub en proceso para los eventos de averías (fan-out a clientes SSE)
+
+    Cada evento se serializa una sola vez y se reparte a las colas de los
+    suscriptores. Con EVENTS_BACKEND=postgres se publica con NOTIFY y cada
+    worker lo recibe por LISTEN, de modo que llega a los clientes de todos
+    los procesos (LISTEN requiere conexión directa, no PgBouncer en modo transacción).
+    """
+
+    def __init__(self, backend: str, channel: str, queue_size: int):
+        self.backend = backend
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._listener = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Métricas
+        self.published_total = 0
+        self.resync_total = 0
+
+    @property
+    def uses_postgres(self) -> bool:
+        return self.backend == "postgres"
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def _dispatch(self, frame: str) -> None:
+        for subscription in list(self._subscribers):
+            if not subscription.deliver(frame):
+                self.resync_total += 1
+
+    async def publish(self, event: str, data: dict) -> None:
+        """
+        Publica un evento para todos los clientes conectados
+        Debe llamarse después del commit para no anunciar cambios que se deshacen
+        """
+        self.published_total += 1
+
+        if not self.uses_postgres:
+            self._dispatch(format_sse(event, data))
+            return
+
+        payload = json.dumps({"event": event, "data": data}, separators=(",", ":"))
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD_BYTES:
+            # Demasiado grande para NOTIFY: se envía solo el id y el cliente lo consulta
+            payload = json.dumps({"event": event, "data": {"id": data.get("id"), "truncated": True}})
+
+        async with async_engine.connect() as conn:
+            await conn.execute(select(func.pg_notify(self.channel, payload)))
+            await conn.commit()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        self._dispatch(format_sse(message["event"], message["data"]))
+
+    def _on_terminate(self, connection) -> None:
+        self._listener = None
+        if not self._stopping:
+            logger.warning("Conexión LISTEN de eventos perdida, reconectando")
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _listen(self) -> None:
+        # Solo necesario con backend postgres
+        import asyncpg
+
+        dsn = async_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = await asyncpg.connect(dsn)
+        await connection.add_listener(self.channel, self._on_notify)
+        connection.add_termination_listener(self._on_terminate)
+        self._listener = connection
+
+    async def _reconnect(self) -> None:
+        delay = 1
+        while not self._stopping:
+            try:
+                await self._listen()
+                return
+            except Exception as exc:
+                logger.warning("No se pudo reconectar LISTEN (%s), reintento en %ss", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def start(self) -> None:
+        """Con backend postgres abre la conexión LISTEN de este worker"""
+        self._stopping = False
+        if self.uses_postgres:
+            await self._listen()
+
+    async def stop(self) -> None:
+        """Cierra la conexión LISTEN"""
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+    def stats(self) -> dict:
+        """Clientes conectados y eventos publicados"""
+        return {
+            "backend": self.backend,
+            "subscribers": len(self._subscribers),
+            "published_total": self.published_total,
+            "resync_total": self.resync_total
+        }
+
+
+event_broker = EventBroker(
+    backend=settings.EVENTS_BACKEND,
+    channel=settings.EVENTS_CHANNEL,
+    queue_size=settings.EVENTS_QUEUE_SIZE
+)
@@ -0,0 +1,132 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _clean_text(text: str) -> str:
+    # PostgreSQL no admite NUL en columnas de texto
+    return text.replace("\x00", "").strip()
+
+
+def count_pdf_pages(path: str) -> int:
+    """Número de páginas de un PDF (solo lee la tabla de referencias y el árbol de páginas)"""
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """
+    Texto de las páginas [start, stop) de un PDF (índices desde 0)
+
+    Se ejecuta en un proceso del pool. pypdf carga cada página al acceder a
+    ella, así que solo se decodifica el lote pedido y no el documento entero;
+    una página ilegible deja su texto vacío sin abortar el resto.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    texts = []
+    for index in range(start, min(stop, len(reader.pages))):
+        try:
+            texts.append(_clean_text(reader.pages[index].extract_text() or ""))
+        except Exception as exc:
+            logger.warning("No se pudo extraer la página %s de %s: %s", index + 1, path, exc)
+            texts.append("")
+    return texts
+
+
+class PdfExtractor:
+    """
+    Extracción de texto de PDF por lotes de páginas en un pool de procesos
+
+    Extraer texto es CPU pura (decodificar streams y fuentes): en procesos
+    separados no compite con el event loop por el GIL. Con workers = 0 se
+    usa el threadpool (desarrollo/tests). Sin pypdf instalado no se extrae.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.available = importlib.util.find_spec("pypdf") is not None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.in_flight = 0
+        self.pages_total = 0
+        self.failed_total = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if self.workers <= 0:
+                return await asyncio.to_thread(fn, *args)
+            try:
+                return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+            except BrokenProcessPool:
+                # Un proceso murió: se recrea el pool para el siguiente lote
+                self.shutdown()
+                raise
+        except Exception:
+            with self._lock:
+                self.failed_total += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    async def page_count(self, path: str) -> int:
+        return await self._run(count_pdf_pages, path)
+
+    async def extract(self, path: str, start: int, stop: int) -> List[str]:
+        """Texto de las páginas [start, stop) de un PDF"""
+        texts = await self._run(extract_pdf_pages, path, start, stop)
+        with self._lock:
+            self.pages_total += len(texts)
+        return texts
+
+    def start(self) -> None:
+        """Arranca los procesos por adelantado"""
+        if not self.available:
+            logger.warning("pypdf no está instalado: no se extraerá el texto de los manuales")
+            return
+        if self.workers > 0:
+            self._get_executor()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "pages_total": self.pages_total,
+                "failed_total": self.failed_total
+            }
+
+    def shutdown(self) -> None:
+        """Detiene los procesos (los lotes pendientes se descartan)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+pdf_extractor = PdfExtractor(workers=settings.PDF_EXTRACTION_WORKERS)
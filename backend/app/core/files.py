@@ -0,0 +1,200 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request, Response, status
+
+from app.core.etag import etag_matches
+
+# Trozo de lectura al servir un fichero (memoria por descarga en curso)
+FILE_CHUNK_SIZE = 256 * 1024
+
+
+class ByteRange(NamedTuple):
+    start: int
+    end: int  # inclusivo
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+class RangeNotSatisfiable(ValueError):
+    """El rango pedido queda fuera del fichero (416)"""
+
+
+def parse_range(header: str, size: int) -> Optional[ByteRange]:
+    """
+    Rango único "bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo"
+
+    None si la cabecera no es válida o pide varios rangos: se responde el
+    fichero completo, como permite RFC 9110. Lanza RangeNotSatisfiable si
+    ningún byte del rango existe.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Sufijo: los últimos N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return ByteRange(max(size - suffix, 0), size - 1)
+
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return ByteRange(start, min(end, size - 1))
+
+
+def content_disposition(filename: str, inline: bool = True) -> str:
+    """Content-Disposition con nombre ASCII y nombre UTF-8 (RFC 6266)"""
+    fallback = filename.encode("ascii", "ignore").decode() or "download"
+    disposition = "inline" if inline else "attachment"
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def _not_modified_since(request: Request, mtime: float) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _if_range_matches(request: Request, etag: str, last_modified: str) -> bool:
+    """If-Range: el rango solo se aplica si el cliente tiene la misma versión"""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', "W/")):
+        # Comparación fuerte: un ETag débil nunca valida un rango
+        return not if_range.startswith("W/") and if_range == etag
+    return if_range == last_modified
+
+
+class FileRangeResponse(Response):
+    """
+    Envía un fichero (o un rango) leyéndolo por trozos en el threadpool,
+    sin cargarlo entero en memoria
+
+    Si el servidor ASGI admite la extensión pathsend, el fichero completo se
+    delega en él. El FileResponse de Starlette no resuelve rangos en todas
+    las versiones fijadas en requirements, de ahí esta respuesta propia.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        byte_range: ByteRange,
+        status_code: int,
+        headers: dict,
+        media_type: str,
+        send_body: bool = True
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.byte_range = byte_range
+        self.send_body = send_body
+        self.headers["Content-Length"] = str(byte_range.length)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body or self.byte_range.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if self.status_code == 200 and "http.response.pathsend" in scope.get("extensions", {}):
+            # El servidor ASGI envía el fichero completo con sendfile (sin copias)
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        remaining = self.byte_range.length
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.byte_range.start)
+            while remaining > 0:
+                chunk = await file.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+
+        if remaining > 0:
+            # El fichero se truncó durante el envío: se cierra el cuerpo
+            await send({"type": "http.response.body", "body": b""})
+
+
+def serve_file(
+    request: Request,
+    path: str,
+    stat: os.stat_result,
+    etag: str,
+    media_type: str,
+    filename: str,
+    cache_control: str,
+    accel_redirect: Optional[str] = None
+) -> Response:
+    """
+    Respuesta de descarga con validación condicional y peticiones Range
+
+    - If-None-Match / If-Modified-Since -> 304
+    - Range (un único rango, respetando If-Range) -> 206 o 416
+    - accel_redirect: el proxy (nginx X-Accel-Redirect) envía el fichero con
+      sendfile, sin copias en el worker, y resuelve él mismo los rangos
+    """
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename),
+    }
+
+    if etag_matches(request, etag) or (
+        "if-none-match" not in request.headers and _not_modified_since(request, stat.st_mtime)
+    ):
+        headers.pop("Content-Disposition")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if accel_redirect:
+        headers["X-Accel-Redirect"] = accel_redirect
+        return Response(headers=headers, media_type=media_type)
+
+    send_body = request.method != "HEAD"
+    full = ByteRange(0, stat.st_size - 1)
+    range_header = request.headers.get("range")
+
+    if range_header and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{stat.st_size}", "Accept-Ranges": "bytes"}
+            )
+
+        if byte_range is not None:
+            headers["Content-Range"] = f"bytes {byte_range.start}-{byte_range.end}/{stat.st_size}"
+            return FileRangeResponse(
+                path, byte_range, status.HTTP_206_PARTIAL_CONTENT, headers, media_type, send_body
+            )
+
+    return FileRangeResponse(path, full, status.HTTP_200_OK, headers, media_type, send_body)
@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import verify_password, get_password_hash
+
+
+class PasswordHasherPool:
+    """
+    Pool acotado de procesos para bcrypt (hash y verificación de contraseñas)
+
+    bcrypt consume decenas o cientos de ms de CPU. Ejecutarlo en procesos
+    separados evita el GIL y no bloquea el event loop, y limitar las
+    operaciones en curso (max_pending) impide que una avalancha de logins
+    acumule trabajo sin límite: por encima del límite se responde 503 con
+    Retry-After en lugar de encolar.
+
+    Con workers = 0 el hash se calcula en un pool de hilos (desarrollo/tests).
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after_seconds: int):
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self.retry_after_seconds = retry_after_seconds
+        self._executor: Optional[Executor] = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.in_flight = 0
+        self.completed_total = 0
+        self.rejected_total = 0
+        self.busy_seconds_total = 0.0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers <= 0:
+                    self._executor = ThreadPoolExecutor(thread_name_prefix="password-hash")
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._executor
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio de autenticación saturado, inténtalo de nuevo en unos segundos",
+            headers={"Retry-After": str(self.retry_after_seconds)}
+        )
+
+    def _finished(self, started: float) -> None:
+        """
+        Libera el hueco cuando el trabajo termina en el pool (o se cancela
+        antes de empezar), no cuando deja de esperarlo la petición: si el
+        cliente se desconecta, bcrypt sigue ocupando el proceso hasta acabar
+        """
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.completed_total += 1
+            self.busy_seconds_total += elapsed
+        self._slots.release()
+
+    async def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected_total += 1
+            raise self._unavailable()
+
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException as exc:
+            # El trabajo no llegó al pool: nadie más liberará el hueco
+            self._finished(started)
+            if isinstance(exc, BrokenProcessPool):
+                # Un proceso murió: se recrea el pool en la siguiente petición
+                self.shutdown()
+                raise self._unavailable()
+            if isinstance(exc, RuntimeError):
+                # Pool detenido por otra petición (o al apagar) entre obtenerlo y encargar
+                raise self._unavailable()
+            raise
+        future.add_done_callback(lambda _: self._finished(started))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self.shutdown()
+            raise self._unavailable()
+
+    def start(self) -> None:
+        """Arranca los procesos por adelantado para que el primer login no pague el arranque"""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(abs, 0) for _ in range(self.workers)]:
+            future.result()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña en el pool"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Genera el hash de una contraseña en el pool"""
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> dict:
+        """Métricas del pool (profundidad de cola y operaciones rechazadas)"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - self.workers, 0) if self.workers > 0 else 0,
+                "completed_total": self.completed_total,
+                "rejected_total": self.rejected_total,
+                "busy_seconds_total": round(self.busy_seconds_total, 3)
+            }
+
+    def shutdown(self) -> None:
+        """Detiene los procesos del pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        # Fuera del lock: cancelar los trabajos pendientes ejecuta _finished
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after_seconds=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS
+)
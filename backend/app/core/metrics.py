@@ -0,0 +1,154 @@
+import time
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.core.database import get_pool_stats
+from app.core.hashing import password_hasher
+from app.core.request_stats import (
+    route_label,
+    start_request_stats,
+    current_request_stats,
+    reset_request_stats
+)
+
+# Métricas por proceso: con varios workers de uvicorn/gunicorn
+# Prometheus debe hacer scrape de cada uno (o agregarse con multiprocess mode)
+
+REQUESTS = Counter(
+    "http_requests",
+    "Peticiones HTTP atendidas",
+    ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP",
+    ["method", "route"]
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    ["method"]
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Tamaño del cuerpo de las respuestas HTTP",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Consultas SQL ejecutadas por petición",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Tiempo total en la base de datos por petición",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+# Rutas que no se instrumentan (el propio scrape)
+EXCLUDED_PATHS = {"/metrics"}
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra latencia, tamaño de respuesta, peticiones
+    en curso y consultas SQL / tiempo de BD por ruta
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        token = start_request_stats(scope)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+
+            stats = current_request_stats()
+            reset_request_stats(token)
+
+            route = route_label(scope)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(response_size)
+            REQUEST_QUERIES.labels(method, route).observe(stats.query_count)
+            REQUEST_DB_TIME.labels(method, route).observe(stats.db_seconds)
+
+
+# Métricas de los pools de conexiones y del pool de bcrypt (se leen en cada scrape)
+POOL_GAUGES = {
+    "in_use": "Conexiones prestadas por el pool",
+    "waiting": "Peticiones esperando una conexión",
+    "size": "Tamaño configurado del pool",
+    "overflow": "Conexiones abiertas por encima del tamaño del pool",
+    "checkout_seconds_max": "Mayor espera registrada para obtener una conexión",
+}
+POOL_COUNTERS = {
+    "checkouts_total": "Conexiones entregadas por el pool",
+    "checkout_timeouts_total": "Esperas de conexión que superaron pool_timeout",
+    "checkout_seconds_total": "Tiempo total esperando conexiones",
+    "connections_created_total": "Conexiones abiertas contra la base de datos",
+    "invalidated_total": "Conexiones invalidadas",
+}
+PASSWORD_HASH_GAUGES = {
+    "in_flight": "Operaciones bcrypt en curso",
+    "queued": "Operaciones bcrypt esperando un proceso libre",
+}
+PASSWORD_HASH_COUNTERS = {
+    "completed_total": "Operaciones bcrypt completadas",
+    "rejected_total": "Operaciones bcrypt rechazadas con 503",
+    "busy_seconds_total": "Tiempo total dedicado a bcrypt",
+}
+
+
+class RuntimeCollector:
+    """Expone como métricas el estado de los pools de BD y de bcrypt"""
+
+    def collect(self):
+        pools = get_pool_stats()
+        for key, documentation in POOL_GAUGES.items():
+            family = GaugeMetricFamily(f"db_pool_{key}", documentation, labels=["engine"])
+            for engine_name, stats in pools.items():
+                if stats.get(key) is not None:
+                    family.add_metric([engine_name], stats[key])
+            yield family
+
+        for key, documentation in POOL_COUNTERS.items():
+            family = CounterMetricFamily(f"db_pool_{key}", documentation, labels=["engine"])
+            for engine_name, stats in pools.items():
+                family.add_metric([engine_name], stats[key])
+            yield family
+
+        hashing = password_hasher.stats()
+        for key, documentation in PASSWORD_HASH_GAUGES.items():
+            yield GaugeMetricFamily(f"password_hash_{key}", documentation, value=hashing[key])
+        for key, documentation in PASSWORD_HASH_COUNTERS.items():
+            yield CounterMetricFamily(f"password_hash_{key}", documentation, value=hashing[key])
+
+
+REGISTRY.register(RuntimeCollector())
@@ -0,0 +1,26 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+
+# Cabecera de respuesta con el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(reported_at: datetime, item_id: int) -> str:
+    """Codifica un cursor opaco (reported_at, id) para paginación keyset"""
+    raw = f"{reported_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodifica un cursor generado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        reported_at, item_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(reported_at), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
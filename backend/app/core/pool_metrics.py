@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Type
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Métricas de un pool de conexiones (thread-safe)
+
+    - in_use / checkouts_total: conexiones prestadas ahora y en total
+    - waiting: peticiones esperando una conexión en este momento
+    - checkout_seconds_*: tiempo hasta obtener conexión (cola + apertura + pre-ping)
+    - checkout_timeouts_total: esperas que superaron pool_timeout
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts_total = 0
+        self.checkout_timeouts_total = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.timed_checkouts_total = 0
+        self.connections_created_total = 0
+        self.invalidated_total = 0
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.in_use += 1
+            self.checkouts_total += 1
+
+    def begin_wait(self) -> None:
+        self.increment("waiting")
+
+    def end_wait(self, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.checkout_timeouts_total += 1
+                return
+            self.timed_checkouts_total += 1
+            self.checkout_seconds_total += elapsed
+            self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+    def snapshot(self, pool: Pool) -> dict:
+        """Estado actual del pool junto con los contadores acumulados"""
+        with self._lock:
+            stats = {
+                "pool": type(pool).__name__,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts_total": self.checkouts_total,
+                "checkout_timeouts_total": self.checkout_timeouts_total,
+                "checkout_seconds_total": round(self.checkout_seconds_total, 6),
+                "checkout_seconds_max": round(self.checkout_seconds_max, 6),
+                "checkout_seconds_avg": (
+                    round(self.checkout_seconds_total / self.timed_checkouts_total, 6)
+                    if self.timed_checkouts_total else None
+                ),
+                "connections_created_total": self.connections_created_total,
+                "invalidated_total": self.invalidated_total
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+
+        return stats
+
+
+class InstrumentedPoolMixin:
+    """
+    Mide cuánto tarda cada checkout del pool y cuántos hay esperando
+    Se combina con la clase de pool real mediante instrumented_pool_class()
+    """
+    pool_metrics: PoolMetrics
+
+    def connect(self):
+        self.pool_metrics.begin_wait()
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.pool_metrics.end_wait(time.perf_counter() - started, timed_out=timed_out)
+
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Crea una subclase de `base` que registra la espera de checkout en `metrics`
+    (la clase se conserva al recrear el pool con engine.dispose())
+    """
+    return type(
+        f"Instrumented{base.__name__}",
+        (InstrumentedPoolMixin, base),
+        {"pool_metrics": metrics}
+    )
+
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics) -> None:
+    """
+    Registra los eventos de pool de un engine (válido con cualquier clase de pool)
+    Para engines asíncronos se pasa async_engine.sync_engine
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.increment("connections_created_total")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.record_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.increment("in_use", -1)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("invalidated_total")
@@ -0,0 +1,92 @@
+from contextvars import ContextVar, Token
+from typing import Optional
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_prefix(path: str, path_regex) -> str:
+    """
+    Parte del path anterior a la que casa con la ruta: el prefijo con el que
+    se incluyó su router (una parte fija de la aplicación, no de la petición)
+    """
+    for index, char in enumerate(path):
+        if char == "/" and path_regex.match(path[index:]):
+            return path[:index]
+    return ""
+
+
+def route_label(scope) -> str:
+    """
+    Plantilla de la ruta (/api/failures/{failure_id}) en lugar del path real,
+    para no crear una serie por cada id ni por cada fichero pedido
+    """
+    if "endpoint" not in scope:
+        return UNMATCHED_ROUTE
+
+    # APIRoute: su plantilla, precedida del prefijo del router incluido si la
+    # versión de FastAPI no lo incorpora a la ruta (/{failure_id} -> /api/failures/{failure_id})
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format:
+        return _route_prefix(scope["path"], route.path_regex) + path_format
+
+    # Mount (StaticFiles de /uploads): el prefijo del montaje, no el fichero
+    app_root_path = scope.get("app_root_path", "")
+    mount_path = scope.get("root_path", "")[len(app_root_path):]
+    if mount_path:
+        return f"{mount_path}/{{path}}"
+
+    # Otras rutas de Starlette (/docs...): se reconstruye desde los path params
+    params = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(
+        f"{{{params[segment]}}}" if segment in params else segment
+        for segment in scope["path"].split("/")
+    )
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Una petición superó QUERY_BUDGET_PER_REQUEST (solo desarrollo/tests)"""
+
+
+class RequestStats:
+    """Consultas SQL y tiempo de BD acumulados durante una petición HTTP"""
+
+    __slots__ = ("scope", "query_count", "db_seconds")
+
+    def __init__(self, scope: dict):
+        # El scope ASGI se completa con la ruta al resolverse el router
+        self.scope = scope
+        self.query_count = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Método y plantilla de la ruta de la petición (GET /api/failures/)"""
+        return f"{self.scope.get('method', '')} {route_label(self.scope)}"
+
+    def record_query(self, elapsed: float) -> None:
+        self.query_count += 1
+        self.db_seconds += elapsed
+
+
+# Estadísticas de la petición en curso (None fuera de una petición HTTP).
+# El contexto se propaga a las tareas hijas y a AsyncSession.run_sync,
+# de modo que los hooks del engine acumulan sobre el objeto de la petición.
+_current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def start_request_stats(scope: dict) -> Token:
+    """Inicia las estadísticas de una petición; devuelve el token para reset_request_stats"""
+    return _current_request_stats.set(RequestStats(scope))
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Estadísticas de la petición en curso, si la hay"""
+    return _current_request_stats.get()
+
+
+def reset_request_stats(token: Token) -> None:
+    """Restaura el contexto anterior al terminar la petición"""
+    _current_request_stats.reset(token)
@@ -0,0 +1,299 @@
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Palabras vacías (español e inglés) que no aportan a la similitud
+STOPWORDS = frozenset("""
+    a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante
+    e el ella ellos en entre era es esa ese eso esta estaba estan estar estas este esto estos
+    fue ha hay hasta la las le les lo los mas me mi muy no nos o otra otras otro otros para pero
+    poco por porque que quien se sin sobre su sus tambien tanto te todo todos tras un una uno unos
+    y ya the and of to in is on at for with
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Máximo de ocurrencias de un término que se guardan por documento (array 'H')
+MAX_TERM_FREQUENCY = 65535
+
+
+def _stem(word: str) -> str:
+    """Stemming mínimo: singular de los plurales regulares (motores -> motor)"""
+    if len(word) > 5 and word.endswith("es"):
+        return word[:-2]
+    if len(word) > 4 and word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Términos de un texto: minúsculas, sin tildes, sin palabras vacías"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return [_stem(word) for word in _WORD_RE.findall(text) if len(word) > 1 and word not in STOPWORDS]
+
+
+class SimilarFailureIndex:
+    """
+    Índice invertido BM25 en memoria sobre el texto de las averías
+
+    Matriz dispersa compacta por términos: para cada término, las filas
+    (documentos) en un array('I'), sus frecuencias en un array('H') y el
+    factor BM25 de cada ocurrencia, tf / (tf + norma), ya calculado en un
+    array('f'); por fila, el id de la avería y la longitud del documento.
+    10 bytes por ocurrencia, sin dependencias externas. Una búsqueda solo
+    suma idf * factor sobre las listas de los términos raros de la consulta,
+    en un dict con las filas que los contienen; los términos comunes solo
+    puntúan a los mejores candidatos (ver search).
+
+    Las altas son incrementales (se añade una fila). Una modificación marca
+    la fila anterior como borrada y añade otra; cuando las filas borradas
+    superan COMPACT_RATIO se reconstruyen los arrays sin ellas. Los factores
+    dependen de la longitud media de los documentos: se recalculan cuando
+    esta se desvía más de REWEIGHT_DRIFT de la usada al calcularlos
+    (compute_weights no modifica el índice: se puede calcular en otro hilo).
+    """
+
+    K1 = 1.2
+    B = 0.75
+    TITLE_WEIGHT = 2  # el título cuenta como si apareciera dos veces
+    COMPACT_RATIO = 0.25
+    REWEIGHT_DRIFT = 0.1
+    # Término común: en más de esta fracción de las filas (y de COMMON_TERM_MIN_ROWS)
+    COMMON_TERM_RATIO = 0.05
+    COMMON_TERM_MIN_ROWS = 1000
+    # Candidatos por resultado pedido que puntúan los términos comunes
+    RESCORE_FACTOR = 50
+
+    def __init__(self):
+        self._terms: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._impacts: List[array] = []
+        self._impact_average_length = 0.0
+        self._failure_ids = array("I")
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._row_by_failure: Dict[int, int] = {}
+        self._total_length = 0
+        # Cambia con cada alta, baja o compactación
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._row_by_failure)
+
+    def __contains__(self, failure_id: int) -> bool:
+        return failure_id in self._row_by_failure
+
+    def _impact(self, count: int, length: int, average_length: Optional[float] = None) -> float:
+        average_length = self._impact_average_length if average_length is None else average_length
+        norm = self.K1 * (1 - self.B + self.B * length / (average_length or length or 1))
+        return count / (count + norm)
+
+    def needs_reweight(self) -> bool:
+        """La longitud media se ha desviado más de REWEIGHT_DRIFT de la de los factores"""
+        documents = len(self._row_by_failure)
+        if not documents:
+            return False
+        average_length = self._total_length / documents
+        return abs(average_length - self._impact_average_length) > self.REWEIGHT_DRIFT * average_length
+
+    def compute_weights(self) -> Tuple[int, float, List[array]]:
+        """
+        Factores BM25 con la longitud media actual (version, media, factores)
+        Solo lee el índice: se puede ejecutar en un hilo mientras se busca
+        """
+        version = self._version
+        documents = len(self._row_by_failure)
+        average_length = self._total_length / documents if documents else 0.0
+        lengths = self._lengths
+        impacts = [
+            array("f", (
+                self._impact(count, lengths[row], average_length)
+                for row, count in zip(rows, frequencies)
+            ))
+            for rows, frequencies in zip(list(self._postings), list(self._frequencies))
+        ]
+        return version, average_length, impacts
+
+    def apply_weights(self, weights: Tuple[int, float, List[array]]) -> bool:
+        """
+        Sustituye los factores por los de compute_weights; se descartan (False)
+        si el índice cambió mientras se calculaban
+        """
+        version, average_length, impacts = weights
+        if version != self._version:
+            return False
+        self._impact_average_length = average_length
+        self._impacts = impacts
+        return True
+
+    def reweight(self) -> None:
+        """Recalcula los factores BM25 con la longitud media actual"""
+        self.apply_weights(self.compute_weights())
+
+    def _document_terms(self, title: Optional[str], description: Optional[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for term in tokenize(title):
+            counts[term] = counts.get(term, 0) + self.TITLE_WEIGHT
+        for term in tokenize(description):
+            counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def upsert(self, failure_id: int, title: Optional[str], description: Optional[str]) -> None:
+        """Añade o reemplaza el documento de una avería"""
+        self.remove(failure_id)
+
+        row = len(self._failure_ids)
+        counts = self._document_terms(title, description)
+        length = sum(counts.values())
+        for term, count in counts.items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                term_id = self._terms[term] = len(self._postings)
+                self._postings.append(array("I"))
+                self._frequencies.append(array("H"))
+                self._impacts.append(array("f"))
+            count = min(count, MAX_TERM_FREQUENCY)
+            self._postings[term_id].append(row)
+            self._frequencies[term_id].append(count)
+            self._impacts[term_id].append(self._impact(count, length))
+
+        self._failure_ids.append(failure_id)
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._row_by_failure[failure_id] = row
+        self._total_length += length
+        self._version += 1
+
+    def remove(self, failure_id: int) -> None:
+        row = self._row_by_failure.pop(failure_id, None)
+        if row is None:
+            return
+        self._alive[row] = 0
+        self._total_length -= self._lengths[row]
+        self._version += 1
+
+        dead_rows = len(self._alive) - len(self._row_by_failure)
+        if dead_rows > 1000 and dead_rows > len(self._alive) * self.COMPACT_RATIO:
+            self.compact()
+
+    def compact(self) -> None:
+        """Reconstruye los arrays sin las filas borradas (renumerando las filas)"""
+        new_rows = array("I", [0]) * len(self._alive)
+        failure_ids, lengths = array("I"), array("I")
+        for row, alive in enumerate(self._alive):
+            if alive:
+                new_rows[row] = len(failure_ids)
+                failure_ids.append(self._failure_ids[row])
+                lengths.append(self._lengths[row])
+
+        terms: Dict[str, int] = {}
+        postings: List[array] = []
+        frequencies: List[array] = []
+        alive = self._alive
+        for term, term_id in self._terms.items():
+            rows, counts = array("I"), array("H")
+            for row, count in zip(self._postings[term_id], self._frequencies[term_id]):
+                if alive[row]:
+                    rows.append(new_rows[row])
+                    counts.append(count)
+            if rows:
+                terms[term] = len(postings)
+                postings.append(rows)
+                frequencies.append(counts)
+
+        self._terms, self._postings, self._frequencies = terms, postings, frequencies
+        self._impacts = [array("f") for _ in postings]
+        self._failure_ids, self._lengths = failure_ids, lengths
+        self._alive = bytearray(b"\x01") * len(failure_ids)
+        self._row_by_failure = {failure_id: row for row, failure_id in enumerate(failure_ids)}
+        self._version += 1
+        self.reweight()
+
+    def search(
+        self,
+        title: Optional[str],
+        description: Optional[str] = None,
+        limit: int = 10,
+        exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """
+        Averías más parecidas al texto dado [(failure_id, score)] por BM25
+
+        Cada término pesa según su idf y las veces que aparece en la
+        consulta. Los términos raros se suman en un dict con solo las filas
+        que los contienen. Los comunes (más de COMMON_TERM_RATIO de las
+        filas: idf bajo, listas largas) no aportan candidatos, como el
+        cutoff_frequency de Lucene: se suman, por búsqueda binaria en sus
+        listas, a los RESCORE_FACTOR * limit mejores candidatos. Si todos
+        los términos son comunes, el más raro aporta los candidatos.
+        No recalcula los factores (ver needs_reweight)
+        """
+        documents = len(self._row_by_failure)
+        if not documents:
+            return []
+
+        # (df, peso, término) del más raro al más común
+        terms = []
+        for term, query_count in self._document_terms(title, description).items():
+            term_id = self._terms.get(term)
+            if term_id is None:
+                continue
+            # df aproximado: incluye filas borradas hasta la siguiente compactación
+            frequency = len(self._postings[term_id])
+            weight = math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5)) * query_count * (self.K1 + 1)
+            terms.append((frequency, weight, term_id))
+        if not terms:
+            return []
+        terms.sort()
+
+        common_frequency = max(documents * self.COMMON_TERM_RATIO, self.COMMON_TERM_MIN_ROWS)
+        rare_terms = [term for term in terms if term[0] <= common_frequency] or terms[:1]
+        common_terms = terms[len(rare_terms):]
+
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for _, weight, term_id in rare_terms:
+            for row, impact in zip(self._postings[term_id], self._impacts[term_id]):
+                scores[row] = get(row, 0.0) + weight * impact
+
+        excluded = {self._row_by_failure[failure_id] for failure_id in exclude if failure_id in self._row_by_failure}
+        candidates = scores.items()
+        if len(self._alive) != documents or excluded:
+            alive = self._alive
+            candidates = ((row, score) for row, score in candidates if alive[row] and row not in excluded)
+
+        if common_terms:
+            candidates = self._rescore(
+                heapq.nlargest(limit * self.RESCORE_FACTOR, candidates, key=itemgetter(1)), common_terms
+            )
+
+        best = heapq.nlargest(limit, candidates, key=itemgetter(1))
+        return [(self._failure_ids[row], round(score, 4)) for row, score in best if score > 0]
+
+    def _rescore(self, candidates: List[Tuple[int, float]], terms: List[Tuple[int, float, int]]) -> List[Tuple[int, float]]:
+        """Suma a los candidatos (fila, score) los términos dados (las listas están ordenadas por fila)"""
+        rescored = []
+        for row, score in candidates:
+            for frequency, weight, term_id in terms:
+                rows = self._postings[term_id]
+                position = bisect_left(rows, row)
+                if position < frequency and rows[position] == row:
+                    score += weight * self._impacts[term_id][position]
+            rescored.append((row, score))
+        return rescored
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._row_by_failure),
+            "rows": len(self._failure_ids),
+            "terms": len(self._terms),
+            "postings": sum(len(rows) for rows in self._postings),
+        }
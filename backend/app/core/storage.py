@@ -0,0 +1,166 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+from starlette.staticfiles import StaticFiles
+
+from app.core.config import settings
+
+# Lectura y escritura por trozos: nunca se carga un fichero entero en memoria
+CHUNK_SIZE = 1024 * 1024
+
+IMAGES_DIR = "images"
+THUMBNAILS_DIR = "thumbnails"
+THUMBNAIL_EXTENSION = ".webp"
+MANUALS_DIR = "manuals"
+
+# Documentos de manuales admitidos: extensión -> tipo (file_type)
+DOCUMENT_TYPES = {".pdf": "pdf", ".doc": "doc", ".docx": "docx"}
+DOCUMENT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "doc": "application/msword",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+class UnsupportedFile(ValueError):
+    """El formato del fichero no está admitido"""
+
+
+class FileTooLarge(ValueError):
+    """El fichero supera el tamaño máximo"""
+
+
+class StoredFile(NamedTuple):
+    path: str  # relativa a UPLOAD_DIR (la que se guarda en la BD)
+    digest: str
+    size: int
+    created: bool  # False si ya existía (mismo fichero subido antes)
+
+
+def detect_document_extension(header: bytes, filename: str) -> Optional[str]:
+    """Extensión de un documento según sus primeros bytes y, para Office, el nombre"""
+    if header.startswith(b"%PDF-"):
+        return ".pdf"
+    suffix = Path(filename or "").suffix.lower()
+    if header.startswith(b"\xd0\xcf\x11\xe0") and suffix == ".doc":
+        return ".doc"
+    if header.startswith(b"PK\x03\x04") and suffix == ".docx":
+        return ".docx"
+    return None
+
+
+def detect_image_extension(header: bytes) -> Optional[str]:
+    """Extensión según los primeros bytes del fichero (no se confía en el Content-Type)"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def _sharded(directory: str, digest: str, extension: str) -> str:
+    # Dos niveles de subdirectorio para no acumular miles de ficheros en uno solo
+    return f"{directory}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def absolute_path(relative_path: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / relative_path
+
+
+def thumbnail_path(image_path: str) -> Optional[str]:
+    """
+    Ruta de la miniatura de una imagen almacenada por contenido
+    None para rutas antiguas que no siguen el esquema images/xx/yy/<sha256>
+    """
+    if not image_path.startswith(f"{IMAGES_DIR}/"):
+        return None
+    digest = Path(image_path).stem
+    return _sharded(THUMBNAILS_DIR, digest, THUMBNAIL_EXTENSION)
+
+
+def generated_thumbnail(image_path: str) -> Optional[str]:
+    """
+    Ruta de la miniatura de una imagen si ya existe: se genera en segundo
+    plano después de la subida y puede no generarse (sin Pillow, imagen dañada)
+    """
+    relative_path = thumbnail_path(image_path)
+    if relative_path is None or not absolute_path(relative_path).is_file():
+        return None
+    return relative_path
+
+
+def _store(source: BinaryIO, header: bytes, directory: str, extension: str, max_mb: int) -> StoredFile:
+    """
+    Copia por trozos un fichero subido a almacenamiento direccionado por contenido
+    (sha256), calculando el hash mientras se escribe en un temporal del mismo
+    sistema de ficheros; si el fichero ya existía se descarta la copia (deduplicación)
+    """
+    max_bytes = max_mb * 1024 * 1024
+    tmp_dir = absolute_path(directory)
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            chunk = header
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise FileTooLarge(f"El fichero supera {max_mb} MB")
+                digest.update(chunk)
+                tmp.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+
+        relative_path = _sharded(directory, digest.hexdigest(), extension)
+        destination = absolute_path(relative_path)
+        if destination.exists():
+            os.unlink(tmp_name)
+            return StoredFile(relative_path, digest.hexdigest(), size, created=False)
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_name, destination)
+        return StoredFile(relative_path, digest.hexdigest(), size, created=True)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def store_image(source: BinaryIO) -> StoredFile:
+    """
+    Guarda una foto JPEG, PNG o WebP en images/ (bloqueante: llamar desde el threadpool)
+    """
+    header = source.read(CHUNK_SIZE)
+    extension = detect_image_extension(header[:16])
+    if extension is None:
+        raise UnsupportedFile("Formato no soportado: se admiten JPEG, PNG y WebP")
+    return _store(source, header, IMAGES_DIR, extension, settings.MAX_IMAGE_UPLOAD_MB)
+
+
+def store_document(source: BinaryIO, filename: str) -> StoredFile:
+    """
+    Guarda un manual PDF, DOC o DOCX en manuals/ (bloqueante: llamar desde el threadpool)
+    """
+    header = source.read(CHUNK_SIZE)
+    extension = detect_document_extension(header[:16], filename)
+    if extension is None:
+        raise UnsupportedFile("Formato no soportado: se admiten PDF, DOC y DOCX")
+    return _store(source, header, MANUALS_DIR, extension, settings.MAX_MANUAL_UPLOAD_MB)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Ficheros estáticos direccionados por contenido: una URL nunca cambia de
+    contenido, así que el navegador puede cachearla sin revalidar
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
@@ -0,0 +1,146 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from app.core.config import settings
+from app.core.storage import absolute_path, thumbnail_path
+
+logger = logging.getLogger(__name__)
+
+
+def make_thumbnail(source: str, destination: str, size: int, quality: int) -> bool:
+    """
+    Genera la miniatura WebP de una imagen (lado mayor = size px)
+    Se ejecuta en un proceso del pool; escribe en un temporal y lo renombra
+    para que nunca se sirva una miniatura a medio escribir
+    """
+    if os.path.exists(destination):
+        return False
+
+    # Solo necesario en los procesos de miniaturas
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        # draft: el decodificador JPEG reduce la escala al leer (mucho menos CPU y memoria)
+        image.draft("RGB", (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        tmp_destination = f"{destination}.{os.getpid()}.part"
+        image.save(tmp_destination, "WEBP", quality=quality)
+
+    os.replace(tmp_destination, destination)
+    return True
+
+
+class ThumbnailWorker:
+    """
+    Generación de miniaturas en segundo plano en un pool de procesos
+
+    La subida responde en cuanto la imagen está en disco; la miniatura se
+    encarga aquí sin esperar el resultado (decodificar y reescalar una foto
+    de móvil cuesta decenas de ms de CPU). Con workers = 0 se usa el
+    threadpool (desarrollo/tests). Sin Pillow instalado no se generan.
+    """
+
+    def __init__(self, workers: int, size: int, quality: int):
+        self.workers = workers
+        self.size = size
+        self.quality = quality
+        self.available = importlib.util.find_spec("PIL") is not None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.pending = 0
+        self.generated_total = 0
+        self.failed_total = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _on_done(self, image_path: str, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed_total += 1
+            elif future.result():
+                self.generated_total += 1
+
+        if isinstance(future.exception(), BrokenProcessPool):
+            # Un proceso murió: se recrea el pool en el siguiente encargo
+            self.shutdown()
+        if future.exception() is not None:
+            logger.warning("No se pudo generar la miniatura de %s: %s", image_path, future.exception())
+
+    def submit(self, image_path: str) -> Optional[asyncio.Future]:
+        """
+        Encarga la miniatura de una imagen almacenada (no espera al resultado)
+        Retorna el futuro de make_thumbnail (True si la generó), None si no se encarga
+        """
+        destination = thumbnail_path(image_path)
+        if destination is None or not self.available:
+            return None
+
+        args = (str(absolute_path(image_path)), str(absolute_path(destination)), self.size, self.quality)
+        if self.workers <= 0:
+            future = asyncio.get_running_loop().run_in_executor(None, make_thumbnail, *args)
+        else:
+            try:
+                future = self._get_executor().submit(make_thumbnail, *args)
+            except BrokenProcessPool:
+                self.shutdown()
+                future = self._get_executor().submit(make_thumbnail, *args)
+
+        with self._lock:
+            self.pending += 1
+        future.add_done_callback(lambda done: self._on_done(image_path, done))
+        return asyncio.wrap_future(future)
+
+    def start(self) -> None:
+        """Arranca los procesos por adelantado"""
+        if not self.available:
+            logger.warning("Pillow no está instalado: no se generarán miniaturas")
+            return
+        if self.workers > 0:
+            self._get_executor()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "generated_total": self.generated_total,
+                "failed_total": self.failed_total
+            }
+
+    def shutdown(self) -> None:
+        """Detiene los procesos (las miniaturas pendientes se descartan)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+thumbnail_worker = ThumbnailWorker(
+    workers=settings.THUMBNAIL_WORKERS,
+    size=settings.THUMBNAIL_SIZE,
+    quality=settings.THUMBNAIL_QUALITY
+)
@@ -1,6 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.thumbnails import thumbnail_worker
+from app.core.extraction import pdf_extractor
+from app.core.storage import ImmutableStaticFiles, IMAGES_DIR, THUMBNAILS_DIR, absolute_path
+from app.core.events import event_broker
+from app.core.database import async_engine, get_pool_stats
+from app.core.metrics import MetricsMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.request_stats import QueryBudgetExceeded
+from app.services.manual_ingestion_service import ManualIngestionService
+from app.services.similarity_service import SimilarityService
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arrancar los procesos de hashing de contraseñas
+    password_hasher.start()
+    # Procesos de generación de miniaturas
+    thumbnail_worker.start()
+    # Procesos de extracción de texto de manuales y reanudación de ingestas pendientes
+    pdf_extractor.start()
+    await ManualIngestionService.resume_pending()
+    # Conexión LISTEN de eventos (solo con EVENTS_BACKEND=postgres)
+    await event_broker.start()
+    # Índice de averías parecidas: se carga en segundo plano y sigue los eventos
+    SimilarityService.start()
+    yield
+    await SimilarityService.stop()
+    await event_broker.stop()
+    await ManualIngestionService.shutdown()
+    pdf_extractor.shutdown()
+    # Detener los procesos de hashing de contraseñas
+    password_hasher.shutdown()
+    thumbnail_worker.shutdown()
+    # Cerrar las conexiones del pool asíncrono
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -8,7 +49,9 @@ app = FastAPI(
     description="API para gestión de averías industriales",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configuración de CORS
@@ -21,6 +64,25 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Compresión brotli/gzip de respuestas grandes (dentro de las métricas: se mide el tamaño enviado)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+)
+
+# Métricas por ruta (latencia, tamaño de respuesta, consultas SQL); expuestas en /metrics
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(QueryBudgetExceeded)
+async def query_budget_exceeded_handler(request: Request, exc: QueryBudgetExceeded):
+    """
+    Presupuesto de consultas superado (solo con QUERY_BUDGET_PER_REQUEST > 0):
+    se responde 500 con el motivo para que el fallo sea evidente en CI
+    """
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
 @app.get("/")
 async def root():
     return {
@@ -31,12 +93,47 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "password_hashing": password_hasher.stats(),
+        "events": event_broker.stats(),
+        "thumbnails": thumbnail_worker.stats(),
+        "manual_extraction": ManualIngestionService.stats(),
+        "similar_failures": SimilarityService.stats()
+    }
+
+@app.get("/metrics/pool")
+async def pool_metrics():
+    """
+    Telemetría de los pools de conexiones: conexiones en uso, esperas,
+    latencia de checkout y timeouts (para dimensionar DB_POOL_SIZE)
+    """
+    return get_pool_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas en formato Prometheus
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Imágenes subidas y miniaturas (rutas por sha256: caché inmutable).
+# Solo estos directorios: los manuales se descargan por /api/manuals con autenticación
+for directory in (IMAGES_DIR, THUMBNAILS_DIR):
+    app.mount(
+        f"/uploads/{directory}",
+        ImmutableStaticFiles(directory=absolute_path(directory), check_dir=False),
+        name=f"uploads-{directory}"
+    )
 
 # Importar y registrar routers
-from app.api import auth, production_lines, machines, failures
+from app.api import auth, production_lines, machines, failures, kpis, events, manuals, ai
 
 app.include_router(auth.router, prefix=settings.API_V1_STR)
 app.include_router(production_lines.router, prefix=settings.API_V1_STR)
 app.include_router(machines.router, prefix=f"{settings.API_V1_STR}/machines", tags=["machines"])
 app.include_router(failures.router, prefix=f"{settings.API_V1_STR}/failures", tags=["failures"])
+app.include_router(kpis.router, prefix=settings.API_V1_STR)
+app.include_router(events.router, prefix=settings.API_V1_STR)
+app.include_router(manuals.router, prefix=settings.API_V1_STR)
+app.include_router(ai.router, prefix=settings.API_V1_STR)
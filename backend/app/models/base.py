@@ -10,3 +10,7 @@ class BaseModel(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+# Registra la tabla de versiones y sus eventos de sesión con cualquier modelo
+import app.models.table_version  # noqa: E402,F401
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, Enum, JSON, Index, DDL, event, func, literal_column, text
+from sqlalchemy.orm import relationship, query_expression
 from app.models.base import BaseModel
 import enum
 from datetime import datetime
@@ -22,21 +22,98 @@ class FailureSeverity(str, enum.Enum):
 class Failure(BaseModel):
     """Modelo de histórico de averías"""
     __tablename__ = "failures"
+    __table_args__ = (
+        # Listado y rangos de fechas, paginación keyset por (reported_at, id)
+        Index("ix_failures_reported_at_id", "reported_at", "id"),
+        # Histórico por máquina: (machine_id, reported_at DESC); cubre también
+        # las columnas de las métricas de fiabilidad (sin leer las filas)
+        Index("ix_failures_machine_reliability", "machine_id", "reported_at", "id",
+              "status", "resolved_at", "downtime_minutes"),
+        # Filtros combinados de estado y severidad
+        Index("ix_failures_status_severity", "status", "severity"),
+    )
 
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
-    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False, index=True)
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False)
     reported_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
-    status = Column(Enum(FailureStatus), default=FailureStatus.OPEN, nullable=False, index=True)
+    status = Column(Enum(FailureStatus), default=FailureStatus.OPEN, nullable=False)
     severity = Column(Enum(FailureSeverity), default=FailureSeverity.MEDIUM, nullable=False, index=True)
     reported_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     resolved_at = Column(DateTime, nullable=True)
     downtime_minutes = Column(Integer, nullable=True, comment="Tiempo de inactividad en minutos")
     images = Column(JSON, nullable=True, default=list, comment="Rutas de imágenes asociadas")
 
-    # Relaciones (se activarán cuando se necesiten)
-    # machine = relationship("Machine", back_populates="failures")
-    # reporter = relationship("User", foreign_keys=[reported_by])
+    # Relaciones
+    machine = relationship("Machine", back_populates="failures")
+    reporter = relationship("User", foreign_keys=[reported_by])
     # assignee = relationship("User", foreign_keys=[assigned_to])
     # solutions = relationship("Solution", back_populates="failure", cascade="all, delete-orphan")
+
+    # Si tiene alguna solución registrada; solo se carga con with_expression (EXISTS)
+    has_solution = query_expression()
+
+
+# Índice parcial de averías activas (abiertas o en curso) por máquina
+ACTIVE_FAILURE_STATUSES = [FailureStatus.OPEN, FailureStatus.IN_PROGRESS]
+
+Index(
+    "ix_failures_active_machine_reported_at",
+    Failure.__table__.c.machine_id,
+    Failure.__table__.c.reported_at,
+    postgresql_where=Failure.__table__.c.status.in_(ACTIVE_FAILURE_STATUSES),
+    sqlite_where=Failure.__table__.c.status.in_(ACTIVE_FAILURE_STATUSES)
+)
+
+
+# Búsqueda de texto completo (título + descripción)
+FAILURE_SEARCH_CONFIG = text("'spanish'::regconfig")
+
+
+def failure_search_document():
+    """
+    Documento tsvector de una avería (PostgreSQL)
+    Debe coincidir exactamente con la expresión del índice GIN
+    """
+    columns = Failure.__table__.c
+    return func.to_tsvector(
+        FAILURE_SEARCH_CONFIG,
+        columns.title.concat(literal_column("' '")).concat(columns.description)
+    )
+
+
+# PostgreSQL: índice GIN sobre el tsvector con stemming en español
+Index(
+    "ix_failures_search",
+    failure_search_document(),
+    postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+
+# SQLite: tabla virtual FTS5 sincronizada con failures mediante triggers
+FAILURE_FTS_TABLE = "failures_fts"
+
+FAILURE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FAILURE_FTS_TABLE} USING fts5("
+    "title, description, content='failures', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS failures_fts_ai AFTER INSERT ON failures BEGIN "
+    f"INSERT INTO {FAILURE_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS failures_fts_ad AFTER DELETE ON failures BEGIN "
+    f"INSERT INTO {FAILURE_FTS_TABLE}({FAILURE_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS failures_fts_au AFTER UPDATE OF title, description ON failures BEGIN "
+    f"INSERT INTO {FAILURE_FTS_TABLE}({FAILURE_FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FAILURE_FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"INSERT INTO {FAILURE_FTS_TABLE}({FAILURE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+for _statement in FAILURE_FTS_DDL:
+    event.listen(Failure.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Failure.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FAILURE_FTS_TABLE}").execute_if(dialect="sqlite")
+)
@@ -1,10 +1,30 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, Date
+from sqlalchemy import Column, String, Integer, ForeignKey, Float, Date, Index, text
 from app.models.base import BaseModel
 
+# Condición de cada nivel de bucket (índices únicos parciales y ON CONFLICT)
+MACHINE_BUCKET_WHERE = text("machine_id IS NOT NULL")
+LINE_BUCKET_WHERE = text("machine_id IS NULL AND production_line_id IS NOT NULL")
+GLOBAL_BUCKET_WHERE = text("machine_id IS NULL AND production_line_id IS NULL")
+
 
 class KPI(BaseModel):
-    """Modelo de métricas calculadas"""
+    """
+    Modelo de métricas calculadas
+    Un registro por día y máquina, por día y línea (machine_id nulo)
+    y por día global (machine_id y production_line_id nulos)
+    """
     __tablename__ = "kpis"
+    __table_args__ = (
+        Index("ix_kpis_date_machine", "date", "machine_id"),
+        Index("ix_kpis_date_line", "date", "production_line_id"),
+        # Un único registro por bucket; parciales porque NULL no se considera repetido
+        Index("uq_kpis_machine_bucket", "date", "machine_id", unique=True,
+              postgresql_where=MACHINE_BUCKET_WHERE, sqlite_where=MACHINE_BUCKET_WHERE),
+        Index("uq_kpis_line_bucket", "date", "production_line_id", unique=True,
+              postgresql_where=LINE_BUCKET_WHERE, sqlite_where=LINE_BUCKET_WHERE),
+        Index("uq_kpis_global_bucket", "date", unique=True,
+              postgresql_where=GLOBAL_BUCKET_WHERE, sqlite_where=GLOBAL_BUCKET_WHERE),
+    )
 
     date = Column(Date, nullable=False)
     production_line_id = Column(Integer, ForeignKey("production_lines.id"), nullable=True)
@@ -15,6 +35,7 @@ class KPI(BaseModel):
     open_failures = Column(Integer, default=0)
     resolved_failures = Column(Integer, default=0)
     average_resolution_time_minutes = Column(Float, nullable=True)
+    total_downtime_minutes = Column(Integer, default=0)
     mtbf = Column(Float, nullable=True)  # Mean Time Between Failures
     mttr = Column(Float, nullable=True)  # Mean Time To Repair
     availability_percentage = Column(Float, nullable=True)
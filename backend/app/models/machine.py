@@ -17,7 +17,8 @@ class Machine(BaseModel):
     production_line_id = Column(Integer, ForeignKey("production_lines.id"), nullable=False, index=True)
     is_active = Column(Boolean, default=True)
 
-    # Relaciones (se activarán cuando se necesiten)
-    # production_line = relationship("ProductionLine", back_populates="machines")
-    # failures = relationship("Failure", back_populates="machine", cascade="all, delete-orphan")
+    # Relaciones
+    production_line = relationship("ProductionLine", back_populates="machines")
+    # Solo lectura: borrar una máquina desde el ORM no toca su histórico de averías
+    failures = relationship("Failure", back_populates="machine", viewonly=True)
     # manuals = relationship("Manual", back_populates="machine")
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, Enum
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Text, Enum, JSON, Index, DDL, event, func, literal_column, text
+from sqlalchemy.orm import synonym
 from app.models.base import BaseModel
 import enum
 
@@ -10,6 +11,14 @@ class ManualType(str, enum.Enum):
     SAFETY = "safety"
 
 
+class ExtractionStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # formato sin extracción de texto (DOC/DOCX)
+
+
 class Manual(BaseModel):
     """Modelo de documentación técnica"""
     __tablename__ = "manuals"
@@ -18,10 +27,86 @@ class Manual(BaseModel):
     description = Column(Text)
     content = Column(Text, nullable=False)
     manual_type = Column(Enum(ManualType), default=ManualType.MAINTENANCE, nullable=False)
-    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False)
-    file_url = Column(String(500), nullable=True)  # URL a archivo PDF/documento
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=False, index=True)
+    file_url = Column(String(500), nullable=True)  # ruta relativa a UPLOAD_DIR (manuals/xx/yy/<sha256>.pdf)
+    file_type = Column(String(20), nullable=True)  # pdf, doc, docx
+    file_name = Column(String(255), nullable=True)  # nombre original (Content-Disposition)
+    file_size_bytes = Column(BigInteger, nullable=True)
+    version = Column(String(50), nullable=True)
+    tags = Column(JSON, default=list)
+    # Extracción de texto del fichero (content y manual_chunks)
+    extraction_status = Column(String(20), nullable=True)  # ExtractionStatus
+    extracted_digest = Column(String(64), nullable=True)  # sha256 del fichero ya extraído
+    page_count = Column(Integer, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    # Nombres usados por los schemas de manuales
+    file_path = synonym("file_url")
+    uploaded_by = synonym("created_by")
+    uploaded_at = synonym("created_at")
+
     # Relaciones se agregarán en fases posteriores
     # machine = relationship("Machine", back_populates="manuals")
     # user = relationship("User")
+
+
+# Búsqueda de texto completo (título, descripción y contenido)
+MANUAL_SEARCH_CONFIG = text("'spanish'::regconfig")
+
+
+def manual_search_document():
+    """
+    Documento tsvector de un manual con pesos (título A, descripción B, contenido C)
+    PostgreSQL; debe coincidir exactamente con la expresión del índice GIN
+    """
+    columns = Manual.__table__.c
+
+    def weighted(column, weight):
+        return func.setweight(
+            func.to_tsvector(MANUAL_SEARCH_CONFIG, func.coalesce(column, literal_column("''"))),
+            literal_column(f"'{weight}'")
+        )
+
+    return (
+        weighted(columns.title, "A")
+        .op("||")(weighted(columns.description, "B"))
+        .op("||")(weighted(columns.content, "C"))
+    )
+
+
+# PostgreSQL: índice GIN sobre el tsvector ponderado
+Index(
+    "ix_manuals_search",
+    manual_search_document(),
+    postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+
+# SQLite: tabla virtual FTS5 sincronizada con manuals mediante triggers
+MANUAL_FTS_TABLE = "manuals_fts"
+
+MANUAL_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {MANUAL_FTS_TABLE} USING fts5("
+    "title, description, content, content='manuals', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS manuals_fts_ai AFTER INSERT ON manuals BEGIN "
+    f"INSERT INTO {MANUAL_FTS_TABLE}(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS manuals_fts_ad AFTER DELETE ON manuals BEGIN "
+    f"INSERT INTO {MANUAL_FTS_TABLE}({MANUAL_FTS_TABLE}, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS manuals_fts_au AFTER UPDATE OF title, description, content ON manuals BEGIN "
+    f"INSERT INTO {MANUAL_FTS_TABLE}({MANUAL_FTS_TABLE}, rowid, title, description, content) "
+    "VALUES ('delete', old.id, old.title, old.description, old.content); "
+    f"INSERT INTO {MANUAL_FTS_TABLE}(rowid, title, description, content) "
+    "VALUES (new.id, new.title, new.description, new.content); END",
+    f"INSERT INTO {MANUAL_FTS_TABLE}({MANUAL_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+for _statement in MANUAL_FTS_DDL:
+    event.listen(Manual.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Manual.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {MANUAL_FTS_TABLE}").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class ManualChunk(BaseModel):
+    """Texto extraído de una página de un manual"""
+    __tablename__ = "manual_chunks"
+    __table_args__ = (
+        # Una fila por página: reprocesar un manual reemplaza sus páginas, nunca las duplica
+        UniqueConstraint("manual_id", "page_number", name="uq_manual_chunks_manual_page"),
+    )
+
+    manual_id = Column(Integer, ForeignKey("manuals.id", ondelete="CASCADE"), nullable=False)
+    page_number = Column(Integer, nullable=False)  # desde 1
+    content = Column(Text, nullable=False)
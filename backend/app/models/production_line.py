@@ -1,4 +1,5 @@
 from sqlalchemy import Column, String, Boolean, Text
+from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 
@@ -10,5 +11,5 @@ class ProductionLine(BaseModel):
     description = Column(Text)
     is_active = Column(Boolean, default=True)
 
-    # Relaciones se agregarán en fases posteriores
-    # machines = relationship("Machine", back_populates="production_line")
+    # Relaciones
+    machines = relationship("Machine", back_populates="production_line")
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, Boolean, Index
 from app.models.base import BaseModel
 
 
 class Solution(BaseModel):
     """Modelo de soluciones aplicadas a averías"""
     __tablename__ = "solutions"
+    __table_args__ = (
+        # Soluciones creadas o modificadas desde la última carga del índice de averías parecidas
+        Index("ix_solutions_updated_at_id", "updated_at", "id"),
+    )
 
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=False)
-    failure_id = Column(Integer, ForeignKey("failures.id"), nullable=False)
+    failure_id = Column(Integer, ForeignKey("failures.id"), nullable=False, index=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     time_spent_minutes = Column(Integer, nullable=True)  # Tiempo en minutos
     was_successful = Column(Boolean, default=True)
@@ -0,0 +1,62 @@
+from sqlalchemy import Column, String, Integer, event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+
+# Tablas cuyos datos aparecen en los listados con ETag
+VERSIONED_TABLES = ("failures", "machines", "production_lines", "users", "solutions")
+
+
+class TableVersion(Base):
+    """
+    Versión de cada tabla de VERSIONED_TABLES: se incrementa en la misma
+    transacción que la escritura, de forma que el ETag de un listado se
+    obtiene leyendo unas pocas filas por clave primaria en lugar de
+    COUNT(*) y max(updated_at) sobre toda la tabla
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+def table_versions(*models):
+    """Consulta con la versión actual de las tablas de los modelos dados"""
+    names = sorted(model.__tablename__ for model in models)
+    return select(TableVersion.version).where(TableVersion.table_name.in_(names)).order_by(TableVersion.table_name)
+
+
+def bump_versions(session: Session, table_names) -> None:
+    """Incrementa la versión de las tablas modificadas (en orden: sin interbloqueos en PostgreSQL)"""
+    names = sorted(set(table_names).intersection(VERSIONED_TABLES))
+    if names:
+        session.connection().execute(
+            update(TableVersion)
+            .where(TableVersion.table_name.in_(names))
+            .values(version=TableVersion.version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session: Session, flush_context) -> None:
+    """Altas, cambios y bajas hechos con objetos ORM"""
+    bump_versions(session, {
+        instance.__table__.name
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, "__table__")
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_statement_table(orm_execute_state) -> None:
+    """INSERT / UPDATE / DELETE masivos (session.execute(insert(Failure), filas), query.delete())"""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            bump_versions(orm_execute_state.session, {mapper.local_table.name})
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _create_version_rows(target, connection, **kw) -> None:
+    """Una fila por tabla versionada al crear la tabla con create_all"""
+    connection.execute(insert(target), [{"table_name": name, "version": 0} for name in VERSIONED_TABLES])
@@ -1,5 +1,5 @@
 from .user import (
-    User, UserCreate, UserUpdate, UserLogin,
+    User, UserCreate, UserUpdate, UserLogin, CurrentUser,
     Token, TokenData, TokenRefresh,
     UserRole, SubscriptionTier
 )
@@ -14,15 +14,17 @@ from .machine import (
 from .failure import (
     Failure, FailureCreate, FailureUpdate,
     FailureWithDetails, FailureListFilter,
-    FailureSeverity, FailureStatus
+    FailureSeverity, FailureStatus,
+    FailureImportRow, FailureImportError, FailureImportResult
 )
 from .solution import (
     Solution, SolutionCreate, SolutionUpdate,
-    SolutionWithDetails
+    SolutionWithDetails, SuggestedSolution, SimilarFailure,
+    SolutionSuggestionRequest
 )
 from .manual import (
     Manual, ManualCreate, ManualUpdate,
-    ManualWithDetails, ManualSearchFilter
+    ManualWithDetails, ManualSearchFilter, ManualSearchResult
 )
 from .kpi import (
     KPI, KPICreate, KPIWithDetails,
@@ -31,7 +33,7 @@ from .kpi import (
 
 __all__ = [
     # User
-    "User", "UserCreate", "UserUpdate", "UserLogin",
+    "User", "UserCreate", "UserUpdate", "UserLogin", "CurrentUser",
     "Token", "TokenData", "TokenRefresh",
     "UserRole", "SubscriptionTier",
     # ProductionLine
@@ -44,12 +46,14 @@ __all__ = [
     "Failure", "FailureCreate", "FailureUpdate",
     "FailureWithDetails", "FailureListFilter",
     "FailureSeverity", "FailureStatus",
+    "FailureImportRow", "FailureImportError", "FailureImportResult",
     # Solution
     "Solution", "SolutionCreate", "SolutionUpdate",
-    "SolutionWithDetails",
+    "SolutionWithDetails", "SuggestedSolution", "SimilarFailure",
+    "SolutionSuggestionRequest",
     # Manual
     "Manual", "ManualCreate", "ManualUpdate",
-    "ManualWithDetails", "ManualSearchFilter",
+    "ManualWithDetails", "ManualSearchFilter", "ManualSearchResult",
     # KPI
     "KPI", "KPICreate", "KPIWithDetails",
     "DashboardKPIs", "KPIFilter",
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
+from typing import Optional, List, Literal
 
 # Enums
 class FailureSeverity(str):
@@ -56,6 +56,8 @@ class FailureWithDetails(Failure):
     production_line_code: Optional[str] = None
     reporter_name: Optional[str] = None
     has_solution: bool = False
+    # Miniaturas WebP ya generadas de las imágenes subidas (para listados)
+    thumbnails: List[str] = Field(default_factory=list)
 
 # Schema para lista con filtros
 class FailureListFilter(BaseModel):
@@ -68,3 +70,34 @@ class FailureListFilter(BaseModel):
     search: Optional[str] = None
     skip: int = Field(default=0, ge=0)
     limit: int = Field(default=100, ge=1, le=100)
+
+# Fila de una importación masiva (CSV / NDJSON)
+class FailureImportRow(BaseModel):
+    machine_code: str = Field(..., min_length=1, max_length=50)
+    title: str = Field(..., min_length=1, max_length=255)
+    description: str
+    severity: Literal["critical", "high", "medium", "low"] = FailureSeverity.MEDIUM
+    status: Literal["open", "in_progress", "resolved", "closed"] = FailureStatus.OPEN
+    reported_at: datetime
+    resolved_at: Optional[datetime] = None
+    downtime_minutes: Optional[int] = Field(None, ge=0)
+
+    @field_validator("reported_at", "resolved_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """Fechas con zona horaria ("...Z", "+02:00") -> UTC sin zona, como el resto de columnas"""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+# Error de una fila de la importación
+class FailureImportError(BaseModel):
+    row: int
+    error: str
+
+# Resultado de la importación masiva
+class FailureImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[FailureImportError] = Field(default_factory=list)
+    errors_truncated: bool = False
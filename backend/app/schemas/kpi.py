@@ -1,17 +1,19 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional
 
 # Base Schema
 class KPIBase(BaseModel):
+    date: date
     production_line_id: Optional[int] = None
     machine_id: Optional[int] = None
-    period_start: datetime
-    period_end: datetime
     mttr: Optional[float] = Field(None, description="Mean Time To Repair (horas)")
     mtbf: Optional[float] = Field(None, description="Mean Time Between Failures (horas)")
     availability_percentage: Optional[float] = Field(None, ge=0, le=100)
     total_failures: int = Field(default=0, ge=0)
+    open_failures: int = Field(default=0, ge=0)
+    resolved_failures: int = Field(default=0, ge=0)
+    average_resolution_time_minutes: Optional[float] = None
     total_downtime_minutes: int = Field(default=0, ge=0)
 
 # Schema para crear KPI
@@ -21,7 +23,8 @@ class KPICreate(KPIBase):
 # Schema de respuesta
 class KPI(KPIBase):
     id: int
-    calculated_at: datetime
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
@@ -47,5 +50,5 @@ class DashboardKPIs(BaseModel):
 class KPIFilter(BaseModel):
     production_line_id: Optional[int] = None
     machine_id: Optional[int] = None
-    period_start: Optional[datetime] = None
-    period_end: Optional[datetime] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
@@ -47,5 +47,8 @@ class MachineWithLine(Machine):
 class MachineWithStats(MachineWithLine):
     total_failures: int = 0
     active_failures: int = 0
+    resolved_failures: int = 0
     mttr: Optional[float] = None  # Mean Time To Repair
     mtbf: Optional[float] = None  # Mean Time Between Failures
+    availability: Optional[float] = None  # Disponibilidad en porcentaje
+    total_downtime_minutes: int = 0
@@ -26,7 +26,13 @@ class ManualUpdate(BaseModel):
 # Schema de respuesta
 class Manual(ManualBase):
     id: int
-    file_path: str
+    description: Optional[str] = None
+    manual_type: str
+    file_type: Optional[str] = None
+    file_path: Optional[str] = None
+    file_name: Optional[str] = None
+    extraction_status: Optional[str] = None  # pending, processing, done, failed, skipped
+    page_count: Optional[int] = None
     uploaded_by: int
     uploaded_at: datetime
 
@@ -41,6 +47,11 @@ class ManualWithDetails(Manual):
     production_line_code: Optional[str] = None
     file_size_bytes: Optional[int] = None
 
+# Resultado de búsqueda: relevancia y fragmento con los términos entre <mark>
+class ManualSearchResult(Manual):
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+
 # Schema para búsqueda
 class ManualSearchFilter(BaseModel):
     search: Optional[str] = None
@@ -35,3 +35,28 @@ class SolutionWithDetails(Solution):
     solver_name: Optional[str] = None
     failure_title: Optional[str] = None
     machine_code: Optional[str] = None
+
+# Solución aplicada con éxito a una avería parecida
+class SuggestedSolution(BaseModel):
+    id: int
+    title: str
+    description: str
+    time_spent_minutes: Optional[int] = None
+    ai_suggested: bool = False
+
+    class Config:
+        from_attributes = True
+
+# Avería histórica parecida con sus soluciones exitosas
+class SimilarFailure(BaseModel):
+    failure_id: int
+    title: str
+    machine_id: int
+    score: float
+    solutions: List[SuggestedSolution] = Field(default_factory=list)
+
+# Petición de sugerencias para una avería nueva (aún sin guardar)
+class SolutionSuggestionRequest(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    limit: int = Field(default=5, ge=1, le=20)
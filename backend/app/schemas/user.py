@@ -48,6 +48,12 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# Instantánea inmutable del usuario autenticado (se guarda en la caché de usuarios)
+class CurrentUser(User):
+    class Config:
+        from_attributes = True
+        frozen = True
+
 # Schema para respuesta con token
 class Token(BaseModel):
     access_token: str
@@ -1,36 +1,84 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from fastapi import HTTPException, status
-from uuid import UUID
 
 from app.models.user import User
-from app.schemas import UserCreate, UserLogin, Token, TokenData
+from app.schemas import UserCreate, UserLogin, Token, TokenData, CurrentUser
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
     decode_token
 )
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.hashing import password_hasher
+
+
+# Caché de instantáneas de usuarios activos por id.
+# Cada worker tiene la suya: los cambios hechos desde otro proceso
+# se reflejan como mucho tras USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+# Ids de los usuarios modificados en la transacción en curso (session.info)
+_CHANGED_USERS_KEY = "changed_user_ids"
+
+# Cambia con cada invalidación: una instantánea leída antes no se guarda
+_user_cache_generation = 0
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_changed_user(mapper, connection, target: User) -> None:
+    """Anota el usuario modificado o eliminado; se invalida al confirmar la transacción"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_cached_users(session: Session) -> None:
+    """
+    Invalida las instantáneas de los usuarios modificados una vez confirmados
+    los cambios (al hacer flush otra petición aún leería y cachearía la fila anterior)
+    """
+    global _user_cache_generation
+    changed = session.info.pop(_CHANGED_USERS_KEY, None)
+    if changed:
+        _user_cache_generation += 1
+        for user_id in changed:
+            user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed_users(session: Session, previous_transaction) -> None:
+    """Cambios deshechos: no hay nada que invalidar"""
+    if not session.in_transaction():
+        session.info.pop(_CHANGED_USERS_KEY, None)
 
 
 class AuthService:
     """Servicio para manejo de autenticación y autorización"""
 
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
         """
         Autentica un usuario con email y contraseña
         Retorna el usuario si las credenciales son correctas, None si no
         """
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).filter(User.email == email))
 
         if not user:
             return None
 
-        if not verify_password(password, user.hashed_password):
+        # bcrypt se ejecuta en el pool de procesos acotado (503 si está saturado)
+        if not await password_hasher.verify(password, user.hashed_password):
             return None
 
         if not user.is_active:
@@ -42,12 +90,12 @@ class AuthService:
         return user
 
     @staticmethod
-    def create_user(db: Session, user_create: UserCreate) -> User:
+    async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
         """
         Crea un nuevo usuario en la base de datos
         """
         # Verificar si el email ya existe
-        existing_user = db.query(User).filter(User.email == user_create.email).first()
+        existing_user = await db.scalar(select(User).filter(User.email == user_create.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -55,7 +103,7 @@ class AuthService:
             )
 
         # Crear nuevo usuario
-        hashed_password = get_password_hash(user_create.password)
+        hashed_password = await password_hasher.hash(user_create.password)
 
         db_user = User(
             email=user_create.email,
@@ -67,8 +115,8 @@ class AuthService:
         )
 
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
 
         return db_user
 
@@ -91,7 +139,7 @@ class AuthService:
         )
 
     @staticmethod
-    def refresh_access_token(db: Session, refresh_token: str) -> Token:
+    async def refresh_access_token(db: AsyncSession, refresh_token: str) -> Token:
         """
         Genera un nuevo access token usando un refresh token válido
         """
@@ -111,7 +159,7 @@ class AuthService:
             )
 
         # Buscar usuario
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
+        user = await db.get(User, int(user_id))
         if not user or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -122,9 +170,10 @@ class AuthService:
         return AuthService.create_tokens(user)
 
     @staticmethod
-    def get_current_user_from_token(db: Session, token: str) -> User:
+    async def get_current_user_from_token(db: AsyncSession, token: str) -> CurrentUser:
         """
         Obtiene el usuario actual desde un token de acceso
+        Los usuarios activos se sirven desde la caché en memoria sin consultar la BD
         """
         payload = decode_token(token)
 
@@ -143,7 +192,22 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token inválido",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        cached_user = user_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
+        # Si un usuario cambia mientras se lee, la fila leída puede ser la anterior
+        generation = _user_cache_generation
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -156,10 +220,14 @@ class AuthService:
                 detail="Usuario inactivo"
             )
 
-        return user
+        current_user = CurrentUser.model_validate(user)
+        if generation == _user_cache_generation:
+            user_cache.set(user_id, current_user)
+
+        return current_user
 
     @staticmethod
-    def check_subscription(user: User, required_tier: str = "free") -> bool:
+    def check_subscription(user: CurrentUser, required_tier: str = "free") -> bool:
         """
         Verifica si el usuario tiene el nivel de suscripción requerido
         """
@@ -184,7 +252,7 @@ class AuthService:
         return True
 
     @staticmethod
-    def check_role(user: User, allowed_roles: list[str]) -> bool:
+    def check_role(user: CurrentUser, allowed_roles: list[str]) -> bool:
         """
         Verifica si el usuario tiene uno de los roles permitidos
         """
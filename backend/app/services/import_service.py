@@ -0,0 +1,309 @@
+import codecs
+import csv
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.failure import Failure, FailureSeverity, FailureStatus
+from app.models.machine import Machine
+from app.schemas.failure import FailureImportError, FailureImportResult, FailureImportRow
+from app.services.kpi_service import KPIService
+
+# Máximo de errores por fila que se devuelven en la respuesta (el total va en failed)
+MAX_REPORTED_ERRORS = 1000
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+
+# Content-Type admitidos por la importación
+IMPORT_CONTENT_TYPES = {
+    "text/csv": CSV_FORMAT,
+    "application/x-ndjson": NDJSON_FORMAT,
+    "application/jsonl": NDJSON_FORMAT,
+}
+
+
+async def iter_line_batches(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """
+    Líneas UTF-8 completas (con su salto de línea) de cada trozo recibido,
+    sin cargar el cuerpo entero en memoria; admite BOM
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        if lines:
+            yield [line + "\n" for line in lines]
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending]
+
+
+class _LineFeed:
+    """
+    Líneas pendientes de parsear para un único csv.reader que se reutiliza
+    entre trozos: el estado de las comillas lo lleva el propio módulo csv,
+    así que solo un campo entrecomillado continúa en la línea siguiente
+    (una comilla suelta en un campo sin comillas, como 2", es un carácter más)
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.position = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        # Sin líneas: StopIteration, pero el lector se puede seguir usando
+        # cuando llegue el siguiente trozo
+        if self.position == len(self.lines):
+            self.exhausted = True
+            raise StopIteration
+        self.position += 1
+        return self.lines[self.position - 1]
+
+    def extend(self, lines: List[str]) -> None:
+        self.lines = self.lines[self.position:] + lines
+        self.position = 0
+
+    def records(self, reader) -> Iterator[object]:
+        """
+        Registros completos de las líneas disponibles (valores o csv.Error)
+        Un registro cortado al acabarse las líneas (campo entrecomillado que
+        sigue en el siguiente trozo) se descarta y sus líneas se conservan
+        para volver a parsearlas con el trozo siguiente
+        """
+        while True:
+            start = self.position
+            self.exhausted = False
+            try:
+                values = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                yield exc
+                continue
+            if self.exhausted:
+                self.position = start
+                return
+            yield values
+
+    def pending(self) -> bool:
+        return any(line.strip() for line in self.lines[self.position:])
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Filas de un CSV con cabecera como diccionarios (row, {columna: valor})
+    Un único csv.reader recorre todas las líneas del cuerpo según van
+    llegando; los registros que continúan en el siguiente trozo se completan
+    con él (campos multilínea entre comillas)
+    """
+    header: Optional[List[str]] = None
+    row_number = 0
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+
+    async for lines in iter_line_batches(chunks):
+        feed.extend(lines)
+
+        for values in feed.records(reader):
+            if isinstance(values, csv.Error):
+                row_number += 1
+                yield row_number, ValueError(f"CSV no válido: {values}")
+                continue
+
+            if not any(value.strip() for value in values):
+                continue
+
+            if header is None:
+                header = [name.strip().lower() for name in values]
+                continue
+
+            row_number += 1
+            # Campos vacíos = no informados
+            yield row_number, {
+                name: value.strip() or None
+                for name, value in zip(header, values)
+            }
+
+    if feed.pending():
+        yield row_number + 1, ValueError("Comillas sin cerrar al final del fichero")
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """Un objeto JSON por línea (row, dict); las líneas en blanco se ignoran"""
+    row_number = 0
+    async for lines in iter_line_batches(chunks):
+        for line in lines:
+            if not line.strip():
+                continue
+
+            row_number += 1
+            try:
+                yield row_number, orjson.loads(line)
+            except orjson.JSONDecodeError as exc:
+                yield row_number, ValueError(f"JSON no válido: {exc}")
+
+
+def _format_database_error(exc: SQLAlchemyError) -> str:
+    """Primera línea del error del driver (sin la sentencia ni los parámetros)"""
+    message = str(getattr(exc, "orig", None) or exc).strip().splitlines()
+    return f"Error de base de datos: {message[0] if message else type(exc).__name__}"
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'fila'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+class FailureImportService:
+    """
+    Importación masiva de averías históricas (CSV / NDJSON en streaming)
+
+    Los códigos de máquina se resuelven con un mapa precargado, cada fila se
+    valida de forma independiente y las válidas se insertan en lotes de
+    IMPORT_BATCH_SIZE con executemany, un commit por lote junto con los KPIs
+    de los días afectados. Las filas con error se informan sin detener la carga.
+    """
+
+    PARSERS = {
+        CSV_FORMAT: iter_csv_records,
+        NDJSON_FORMAT: iter_ndjson_records,
+    }
+
+    @staticmethod
+    async def load_machine_ids(db: AsyncSession) -> Dict[str, int]:
+        """Mapa {código: id} de todas las máquinas (una sola consulta)"""
+        return dict((await db.execute(select(Machine.code, Machine.id))).all())
+
+    @staticmethod
+    def to_insert_row(raw, machine_ids: Dict[str, int], reported_by: int) -> dict:
+        """
+        Valida una fila y la convierte en los parámetros del INSERT
+        Lanza ValueError / ValidationError si no es válida
+        """
+        if isinstance(raw, Exception):
+            raise raw
+        if not isinstance(raw, dict):
+            raise ValueError("Se esperaba un objeto con los campos de la avería")
+
+        row = FailureImportRow.model_validate(raw)
+
+        machine_id = machine_ids.get(row.machine_code)
+        if machine_id is None:
+            raise ValueError(f"Máquina con código '{row.machine_code}' no encontrada")
+        if row.resolved_at is not None and row.resolved_at < row.reported_at:
+            raise ValueError("resolved_at es anterior a reported_at")
+
+        return {
+            "machine_id": machine_id,
+            "reported_by": reported_by,
+            "title": row.title,
+            "description": row.description,
+            "severity": FailureSeverity(row.severity),
+            "status": FailureStatus(row.status),
+            "reported_at": row.reported_at,
+            "resolved_at": row.resolved_at,
+            "downtime_minutes": row.downtime_minutes,
+            "images": [],
+        }
+
+    @staticmethod
+    async def _refresh_and_commit(db: AsyncSession, rows: List[dict], refresh_kpis: bool) -> None:
+        if refresh_kpis and rows:
+            await db.run_sync(
+                KPIService.refresh_many,
+                {(row["reported_at"].date(), row["machine_id"]) for row in rows}
+            )
+        await db.commit()
+
+    @staticmethod
+    async def _flush_batch(
+        db: AsyncSession,
+        batch: List[Tuple[int, dict]],
+        refresh_kpis: bool,
+        result: FailureImportResult
+    ) -> None:
+        """
+        Inserta un lote de filas (row, parámetros) en una transacción
+        Si la BD rechaza el lote se reintenta fila a fila (un SAVEPOINT por
+        fila) para importar las válidas e informar del error de las demás
+        """
+        rows = [row for _, row in batch]
+        try:
+            await db.execute(insert(Failure), rows)
+            await FailureImportService._refresh_and_commit(db, rows, refresh_kpis)
+            result.imported += len(rows)
+            return
+        except SQLAlchemyError:
+            await db.rollback()
+
+        inserted = []
+        for row_number, row in batch:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(Failure), [row])
+            except SQLAlchemyError as exc:
+                FailureImportService._add_error(result, row_number, _format_database_error(exc))
+            else:
+                inserted.append(row)
+
+        await FailureImportService._refresh_and_commit(db, inserted, refresh_kpis)
+        result.imported += len(inserted)
+
+    @staticmethod
+    async def import_failures(
+        db: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        file_format: str,
+        reported_by: int,
+        refresh_kpis: bool = True
+    ) -> FailureImportResult:
+        """
+        Importa las averías de un cuerpo CSV o NDJSON recibido por trozos
+
+        Los lotes ya confirmados se mantienen aunque la carga se interrumpa;
+        el resultado indica cuántas filas se importaron y qué filas fallaron
+        """
+        machine_ids = await FailureImportService.load_machine_ids(db)
+        result = FailureImportResult()
+        batch: List[Tuple[int, dict]] = []
+
+        async for row_number, raw in FailureImportService.PARSERS[file_format](chunks):
+            try:
+                batch.append((row_number, FailureImportService.to_insert_row(raw, machine_ids, reported_by)))
+            except ValidationError as exc:
+                FailureImportService._add_error(result, row_number, _format_validation_error(exc))
+                continue
+            except (ValueError, TypeError) as exc:
+                FailureImportService._add_error(result, row_number, str(exc))
+                continue
+
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await FailureImportService._flush_batch(db, batch, refresh_kpis, result)
+                batch = []
+
+        if batch:
+            await FailureImportService._flush_batch(db, batch, refresh_kpis, result)
+
+        return result
+
+    @staticmethod
+    def _add_error(result: FailureImportResult, row_number: int, message: str) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(FailureImportError(row=row_number, error=message))
+        else:
+            result.errors_truncated = True
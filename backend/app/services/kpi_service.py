@@ -0,0 +1,388 @@
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, desc, or_, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.kpi import KPI, MACHINE_BUCKET_WHERE, LINE_BUCKET_WHERE, GLOBAL_BUCKET_WHERE
+from app.models.failure import Failure
+from app.models.machine import Machine
+from app.models.production_line import ProductionLine
+from app.schemas.kpi import DashboardKPIs
+from app.services.reliability_service import (
+    ReliabilityService, ACTIVE_STATUSES, RESOLVED_STATUSES, repair_totals
+)
+
+# INSERT con ON CONFLICT DO UPDATE de cada dialecto soportado
+UPSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Bloqueos consultivos por día (PostgreSQL), en orden de día para no
+# interbloquearse; se liberan solos con el commit o el rollback
+KPI_LOCK_NAMESPACE = 0x4B5049  # "KPI"
+LOCK_KPI_DAYS = text(
+    "SELECT pg_advisory_xact_lock(:namespace, day) "
+    "FROM (SELECT unnest(CAST(:days AS integer[])) AS day ORDER BY day) AS days"
+)
+
+
+class BucketTotals(NamedTuple):
+    """Agregados sumables de un bucket (los de línea y global son la suma de los de máquina)"""
+    total_failures: int
+    active_failures: int
+    resolved_failures: int
+    repair_minutes: float
+    repaired: int
+
+    def __add__(self, other: "BucketTotals") -> "BucketTotals":
+        return BucketTotals(*(mine + theirs for mine, theirs in zip(self, other)))
+
+
+class KPIService:
+    """
+    Servicio de materialización incremental de KPIs diarios
+
+    Cada cambio en una avería recalcula solo los buckets afectados
+    (día + máquina, día + línea y día global), de forma que las lecturas
+    de KPIs y del dashboard recorren la tabla kpis y no la de averías.
+    """
+
+    @staticmethod
+    def _day_bounds(day: date):
+        start = datetime.combine(day, time.min)
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def _bucket_query(db: Session, day: date, machine_id: Optional[int], production_line_id: Optional[int]):
+        query = db.query(KPI).filter(KPI.date == day)
+        if machine_id is not None:
+            return query.filter(KPI.machine_id == machine_id)
+        query = query.filter(KPI.machine_id.is_(None))
+        if production_line_id is not None:
+            return query.filter(KPI.production_line_id == production_line_id)
+        return query.filter(KPI.production_line_id.is_(None))
+
+    @staticmethod
+    def _bucket_index(machine_id: Optional[int], production_line_id: Optional[int]):
+        """Columnas y condición del índice único parcial del bucket (destino de ON CONFLICT)"""
+        if machine_id is not None:
+            return [KPI.date, KPI.machine_id], MACHINE_BUCKET_WHERE
+        if production_line_id is not None:
+            return [KPI.date, KPI.production_line_id], LINE_BUCKET_WHERE
+        return [KPI.date], GLOBAL_BUCKET_WHERE
+
+    @staticmethod
+    def _day_ranges(days: Iterable[date]) -> List[Tuple[datetime, datetime]]:
+        """Días agrupados en rangos consecutivos [inicio, fin) para filtrar por el índice de reported_at"""
+        ranges: List[Tuple[datetime, datetime]] = []
+        for day in sorted(days):
+            start, end = KPIService._day_bounds(day)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    @staticmethod
+    def _lock_days(db: Session, days: Iterable[date]) -> None:
+        """
+        Serializa por día el recálculo de los buckets: dos transacciones que
+        cambian averías del mismo día no pueden calcular cada una un total
+        sin la avería de la otra y sobrescribirse. Basta un bloqueo por día
+        porque todo recálculo incluye el bucket global del día.
+
+        En PostgreSQL se toma un bloqueo consultivo por día hasta el commit;
+        en READ COMMITTED la consulta de agregados posterior ya ve las averías
+        confirmadas por quien tenía el bloqueo. En SQLite la transacción tiene
+        el bloqueo de escritura de la base de datos desde su primera escritura.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(LOCK_KPI_DAYS, {
+                "namespace": KPI_LOCK_NAMESPACE,
+                "days": sorted(day.toordinal() for day in days)
+            })
+
+    @staticmethod
+    def _aggregate_days(db: Session, days: Iterable[date]) -> Dict[Tuple[date, int, Optional[int]], BucketTotals]:
+        """
+        Agregados de todas las averías de los días dados por (día, máquina, línea)
+        en una sola consulta GROUP BY; los buckets de línea y globales se
+        obtienen sumándolos
+        """
+        repair_minutes, repaired = repair_totals(db.get_bind().dialect.name)
+        day_expr = func.date(Failure.reported_at)
+        rows = db.query(
+            day_expr,
+            Failure.machine_id,
+            Machine.production_line_id,
+            func.count(Failure.id),
+            func.coalesce(func.sum(case((Failure.status.in_(ACTIVE_STATUSES), 1), else_=0)), 0),
+            func.coalesce(func.sum(case((Failure.status.in_(RESOLVED_STATUSES), 1), else_=0)), 0),
+            repair_minutes,
+            repaired
+        ).join(
+            Machine, Machine.id == Failure.machine_id
+        ).filter(
+            or_(*(
+                and_(Failure.reported_at >= start, Failure.reported_at < end)
+                for start, end in KPIService._day_ranges(days)
+            ))
+        ).group_by(day_expr, Failure.machine_id, Machine.production_line_id).all()
+
+        totals = {}
+        for day, machine_id, production_line_id, *values in rows:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            totals[(day, machine_id, production_line_id)] = BucketTotals(*values)
+        return totals
+
+    @staticmethod
+    def _bucket_values(day: date, totals: BucketTotals) -> dict:
+        period_start, period_end = KPIService._day_bounds(day)
+        metrics = ReliabilityService.from_aggregates(
+            total_failures=totals.total_failures,
+            active_failures=totals.active_failures,
+            resolved_failures=totals.resolved_failures,
+            mttr_minutes=totals.repair_minutes / totals.repaired if totals.repaired else None,
+            downtime_minutes=totals.repair_minutes,
+            period_start=period_start,
+            period_end=period_end
+        )
+        return {
+            "total_failures": metrics["total_failures"],
+            "open_failures": metrics["active_failures"],
+            "resolved_failures": metrics["resolved_failures"],
+            "total_downtime_minutes": metrics["total_downtime_minutes"],
+            "mttr": metrics["mttr"],
+            "mtbf": metrics["mtbf"],
+            "availability_percentage": metrics["availability"],
+            "average_resolution_time_minutes": (
+                round(metrics["mttr"] * 60, 2) if metrics["mttr"] is not None else None
+            ),
+            "updated_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    def _write_buckets(
+        db: Session,
+        buckets: Dict[Tuple[date, Optional[int], Optional[int]], Optional[BucketTotals]],
+        machine_level: bool
+    ) -> None:
+        """
+        Escribe los buckets de un nivel con un único INSERT ... ON CONFLICT DO
+        UPDATE (executemany) sobre su índice único; los que ya no tienen
+        averías (totales None) se eliminan
+        """
+        rows = []
+        for (day, machine_id, production_line_id), totals in buckets.items():
+            if totals is None:
+                KPIService._bucket_query(db, day, machine_id, production_line_id).delete(synchronize_session=False)
+            else:
+                rows.append({
+                    "date": day,
+                    "machine_id": machine_id,
+                    "production_line_id": production_line_id,
+                    **KPIService._bucket_values(day, totals),
+                })
+        if not rows:
+            return
+
+        upsert = UPSERT_BY_DIALECT[db.get_bind().dialect.name](KPI)
+        index_elements, index_where = KPIService._bucket_index(
+            rows[0]["machine_id"], rows[0]["production_line_id"]
+        )
+        # El bucket de máquina conserva la línea actual de la máquina
+        updated = [name for name in rows[0] if name not in ("date", "machine_id", "production_line_id")]
+        if machine_level:
+            updated.append("production_line_id")
+        db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=index_elements,
+                index_where=index_where,
+                set_={name: upsert.excluded[name] for name in updated}
+            ),
+            rows
+        )
+
+    @staticmethod
+    def refresh_for(db: Session, reported_at: datetime, machine_id: int) -> None:
+        """
+        Recalcula los buckets afectados por una avería (máquina, línea y global del día)
+        Debe llamarse después de hacer flush de los cambios y antes del commit
+        """
+        KPIService.refresh_many(db, [(reported_at.date(), machine_id)])
+
+    @staticmethod
+    def refresh_for_failure(db: Session, failure: Failure) -> None:
+        """
+        Recalcula los buckets de KPIs afectados por una avería creada, actualizada o eliminada
+        """
+        db.flush()
+        KPIService.refresh_for(db, failure.reported_at, failure.machine_id)
+
+    @staticmethod
+    def refresh_many(db: Session, buckets: Iterable[Tuple[date, int]]) -> None:
+        """
+        Recalcula los buckets afectados por una o muchas averías (importación masiva)
+        buckets: pares (día, machine_id); cada bucket de línea y global del día
+        se recalcula una sola vez aunque lo compartan varias máquinas
+
+        Una consulta GROUP BY para todos los días afectados y un upsert por
+        nivel (máquina, línea, global), sea cual sea el número de buckets
+        """
+        buckets = set(buckets)
+        if not buckets:
+            return
+
+        db.flush()
+        days = {day for day, _ in buckets}
+        KPIService._lock_days(db, days)
+        totals = KPIService._aggregate_days(db, days)
+
+        line_by_machine = dict(
+            db.query(Machine.id, Machine.production_line_id)
+            .filter(Machine.id.in_({machine_id for _, machine_id in buckets}))
+            .all()
+        )
+
+        machine_buckets = {
+            (day, machine_id, line_by_machine.get(machine_id)): None
+            for day, machine_id in buckets
+        }
+        line_buckets = {
+            (day, None, production_line_id): None
+            for day, _, production_line_id in machine_buckets
+            if production_line_id is not None
+        }
+        global_buckets = {(day, None, None): None for day in days}
+
+        for (day, machine_id, production_line_id), bucket_totals in totals.items():
+            key = (day, machine_id, production_line_id)
+            if key in machine_buckets:
+                machine_buckets[key] = bucket_totals
+            for level, key in (
+                (line_buckets, (day, None, production_line_id)),
+                (global_buckets, (day, None, None)),
+            ):
+                if key in level:
+                    level[key] = bucket_totals + level[key] if level[key] else bucket_totals
+
+        KPIService._write_buckets(db, machine_buckets, machine_level=True)
+        KPIService._write_buckets(db, line_buckets, machine_level=False)
+        KPIService._write_buckets(db, global_buckets, machine_level=False)
+
+    @staticmethod
+    def rebuild(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """
+        Reconstruye todos los buckets (carga inicial o reparación)
+        Retorna el número de combinaciones día/máquina procesadas
+        """
+        day_expr = func.date(Failure.reported_at)
+        query = db.query(day_expr, Failure.machine_id).distinct()
+        if start:
+            query = query.filter(Failure.reported_at >= datetime.combine(start, time.min))
+        if end:
+            query = query.filter(Failure.reported_at < datetime.combine(end, time.min))
+
+        pairs = [
+            (date.fromisoformat(day) if isinstance(day, str) else day, machine_id)
+            for day, machine_id in query.all()
+        ]
+        KPIService.refresh_many(db, pairs)
+
+        db.commit()
+        return len(pairs)
+
+    @staticmethod
+    def list_kpis(
+        db: Session,
+        production_line_id: Optional[int] = None,
+        machine_id: Optional[int] = None,
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None
+    ) -> List[KPI]:
+        """
+        Lista los KPIs diarios del nivel pedido (máquina, línea o global)
+        """
+        query = db.query(KPI)
+
+        if machine_id is not None:
+            query = query.filter(KPI.machine_id == machine_id)
+        else:
+            query = query.filter(KPI.machine_id.is_(None))
+            if production_line_id is not None:
+                query = query.filter(KPI.production_line_id == production_line_id)
+            else:
+                query = query.filter(KPI.production_line_id.is_(None))
+
+        if period_start:
+            query = query.filter(KPI.date >= period_start)
+        if period_end:
+            query = query.filter(KPI.date <= period_end)
+
+        return query.order_by(KPI.date).all()
+
+    @staticmethod
+    def dashboard(db: Session) -> DashboardKPIs:
+        """
+        KPIs globales del mes en curso calculados sobre la tabla kpis
+        """
+        now = datetime.utcnow()
+        month_start = now.date().replace(day=1)
+
+        totals = db.query(
+            func.coalesce(func.sum(KPI.total_failures), 0),
+            func.coalesce(func.sum(KPI.total_downtime_minutes), 0),
+            func.sum(KPI.average_resolution_time_minutes * KPI.resolved_failures),
+            func.coalesce(func.sum(KPI.resolved_failures), 0)
+        ).filter(
+            KPI.machine_id.is_(None),
+            KPI.production_line_id.is_(None),
+            KPI.date >= month_start
+        ).one()
+        total_failures, downtime_minutes, weighted_resolution, resolved = totals
+
+        total_open = db.query(func.coalesce(func.sum(KPI.open_failures), 0)).filter(
+            KPI.machine_id.is_(None),
+            KPI.production_line_id.is_(None)
+        ).scalar()
+
+        mttr_minutes = None
+        if resolved and weighted_resolution is not None:
+            mttr_minutes = float(weighted_resolution) / resolved
+
+        metrics = ReliabilityService.from_aggregates(
+            total_failures=total_failures,
+            active_failures=total_open,
+            mttr_minutes=mttr_minutes,
+            downtime_minutes=downtime_minutes,
+            period_start=datetime.combine(month_start, time.min),
+            period_end=now
+        )
+
+        line_failures = func.sum(KPI.total_failures)
+        most_affected_line = db.query(ProductionLine.name).join(
+            KPI, KPI.production_line_id == ProductionLine.id
+        ).filter(
+            KPI.machine_id.is_(None),
+            KPI.date >= month_start
+        ).group_by(ProductionLine.id, ProductionLine.name).order_by(desc(line_failures)).first()
+
+        machine_failures = func.sum(KPI.total_failures)
+        most_affected_machine = db.query(Machine.code).join(
+            KPI, KPI.machine_id == Machine.id
+        ).filter(
+            KPI.date >= month_start
+        ).group_by(Machine.id, Machine.code).order_by(desc(machine_failures)).first()
+
+        return DashboardKPIs(
+            global_mttr=metrics["mttr"],
+            global_mtbf=metrics["mtbf"],
+            global_availability=metrics["availability"],
+            total_open_failures=int(total_open or 0),
+            total_failures_this_month=int(total_failures or 0),
+            most_affected_line=most_affected_line[0] if most_affected_line else None,
+            most_affected_machine=most_affected_machine[0] if most_affected_machine else None
+        )
@@ -0,0 +1,54 @@
+from typing import Dict, List, Iterable
+from sqlalchemy.orm import Session
+
+from app.models.machine import Machine
+from app.models.production_line import ProductionLine
+from app.schemas.machine import Machine as MachineSchema, MachineWithLine
+
+
+# Campos de la respuesta que se leen tal cual del modelo ORM
+MACHINE_FIELDS = tuple(MachineSchema.model_fields)
+
+
+class MachineService:
+    """Servicio para enriquecer máquinas con información de su línea"""
+
+    @staticmethod
+    def get_lines_by_id(db: Session, machines: Iterable[Machine]) -> Dict[int, ProductionLine]:
+        """
+        Obtiene en una sola consulta (IN) las líneas de todas las máquinas
+        Retorna un diccionario {production_line_id: ProductionLine}
+        """
+        line_ids = {m.production_line_id for m in machines if m.production_line_id is not None}
+        if not line_ids:
+            return {}
+
+        lines = db.query(ProductionLine).filter(ProductionLine.id.in_(line_ids)).all()
+        return {line.id: line for line in lines}
+
+    @staticmethod
+    def to_machine_with_line(machine: Machine, lines: Dict[int, ProductionLine]) -> dict:
+        """
+        Construye el diccionario de MachineWithLine a partir de las líneas ya cargadas
+        (atributos leídos directamente, sin validar con MachineSchema)
+        """
+        machine_dict = {name: getattr(machine, name) for name in MACHINE_FIELDS}
+
+        line = lines.get(machine.production_line_id)
+        if line:
+            machine_dict['production_line_code'] = line.name
+            machine_dict['production_line_name'] = line.description or line.name
+
+        return machine_dict
+
+    @staticmethod
+    def enrich_with_lines(db: Session, machines: List[Machine]) -> List[MachineWithLine]:
+        """
+        Enriquece una página de máquinas con su línea usando una única consulta
+        (una sola validación por fila a partir del diccionario de atributos)
+        """
+        lines = MachineService.get_lines_by_id(db, machines)
+        return [
+            MachineWithLine(**MachineService.to_machine_with_line(machine, lines))
+            for machine in machines
+        ]
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Set
+
+from sqlalchemy import and_, delete, insert, literal, or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.extraction import pdf_extractor
+from app.core.storage import absolute_path
+from app.models.manual import Manual, ExtractionStatus
+from app.models.manual_chunk import ManualChunk
+
+logger = logging.getLogger(__name__)
+
+# Separador entre páginas al componer Manual.content
+PAGE_SEPARATOR = "\n\n"
+
+# Ingestas en curso por manual y manuales cuyo fichero cambió durante la ingesta
+_running: Dict[int, asyncio.Task] = {}
+_requeued: Set[int] = set()
+
+
+class IngestionSuperseded(Exception):
+    """El fichero del manual cambió u otro proceso tomó la ingesta"""
+
+
+class ManualIngestionService:
+    """
+    Ingesta en segundo plano del texto de los manuales PDF
+
+    La subida responde en cuanto el fichero está en disco. Aquí se extrae el
+    texto por lotes de PDF_EXTRACTION_BATCH_PAGES páginas en el pool de
+    procesos: cada lote se guarda (una fila de manual_chunks por página) y se
+    confirma antes de pedir el siguiente, así que la memoria no depende del
+    tamaño del documento. Al terminar se compone Manual.content, que
+    alimenta la búsqueda de texto completo.
+
+    Idempotente: el sha256 del fichero ya extraído se guarda en
+    extracted_digest y volver a subir el mismo documento no lo reprocesa; si
+    otro manual ya tiene extraído el mismo fichero se copian sus páginas.
+
+    Con varios workers todos reanudan los pendientes al arrancar: la ingesta
+    se reserva con un UPDATE condicional (pending -> processing) y solo la
+    hace el proceso que lo consigue. Cada lote renueva updated_at; una
+    ingesta en processing sin actividad durante PDF_EXTRACTION_STALE_MINUTES
+    (proceso caído) se puede volver a reservar.
+    """
+
+    @staticmethod
+    def schedule(manual_id: int) -> None:
+        """Encarga la ingesta de un manual (no espera al resultado)"""
+        if manual_id in _running:
+            # El fichero pudo cambiar: se repite al terminar la ingesta en curso
+            _requeued.add(manual_id)
+            return
+
+        task = asyncio.get_running_loop().create_task(ManualIngestionService.ingest(manual_id))
+        _running[manual_id] = task
+        task.add_done_callback(lambda done: ManualIngestionService._on_done(manual_id, done))
+
+    @staticmethod
+    def _on_done(manual_id: int, task: asyncio.Task) -> None:
+        _running.pop(manual_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Fallo en la ingesta del manual %s: %s", manual_id, task.exception())
+        if manual_id in _requeued and not task.cancelled():
+            _requeued.discard(manual_id)
+            ManualIngestionService.schedule(manual_id)
+
+    @staticmethod
+    async def resume_pending() -> int:
+        """
+        Vuelve a encargar los manuales pendientes o interrumpidos (p. ej. por
+        un reinicio a mitad de ingesta). Retorna cuántos se encargaron
+        """
+        async with AsyncSessionLocal() as db:
+            manual_ids = (await db.scalars(
+                select(Manual.id).where(
+                    Manual.extraction_status.in_([ExtractionStatus.PENDING.value, ExtractionStatus.PROCESSING.value])
+                )
+            )).all()
+
+        for manual_id in manual_ids:
+            ManualIngestionService.schedule(manual_id)
+        return len(manual_ids)
+
+    @staticmethod
+    async def _set_status(db, manual_id: int, file_url: str, extraction_status: ExtractionStatus, **values) -> None:
+        """Estado final de la ingesta (solo si el manual conserva el fichero ingerido)"""
+        await db.execute(
+            update(Manual)
+            .where(Manual.id == manual_id, Manual.file_url == file_url)
+            .values(extraction_status=extraction_status.value, **values)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def _claim(db, manual_id: int, file_url: str) -> bool:
+        """
+        Reserva la ingesta de forma atómica: de varios procesos que lo
+        intenten a la vez solo uno pasa el manual a processing
+        """
+        stale_before = datetime.utcnow() - timedelta(minutes=settings.PDF_EXTRACTION_STALE_MINUTES)
+        result = await db.execute(
+            update(Manual)
+            .where(
+                Manual.id == manual_id,
+                Manual.file_url == file_url,
+                or_(
+                    Manual.extraction_status == ExtractionStatus.PENDING.value,
+                    and_(
+                        Manual.extraction_status == ExtractionStatus.PROCESSING.value,
+                        Manual.updated_at < stale_before
+                    )
+                )
+            )
+            .values(extraction_status=ExtractionStatus.PROCESSING.value, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    async def _renew_claim(db, manual_id: int, file_url: str) -> None:
+        """
+        Renueva la reserva antes de guardar un lote (en la misma transacción)
+        Lanza IngestionSuperseded si el fichero cambió o la ingesta ya no es de este proceso
+        """
+        result = await db.execute(
+            update(Manual)
+            .where(
+                Manual.id == manual_id,
+                Manual.file_url == file_url,
+                Manual.extraction_status == ExtractionStatus.PROCESSING.value
+            )
+            .values(updated_at=datetime.utcnow())
+        )
+        if result.rowcount != 1:
+            raise IngestionSuperseded()
+
+    @staticmethod
+    async def ingest(manual_id: int) -> None:
+        """Extrae y guarda el texto de un manual por lotes de páginas"""
+        async with AsyncSessionLocal() as db:
+            manual = await db.get(Manual, manual_id)
+            if not manual or not manual.file_url:
+                return
+
+            file_url = manual.file_url
+            digest = Path(file_url).stem
+            if manual.extraction_status == ExtractionStatus.DONE and manual.extracted_digest == digest:
+                return
+
+            if manual.file_type != "pdf":
+                await ManualIngestionService._set_status(db, manual_id, file_url, ExtractionStatus.SKIPPED)
+                return
+
+            if not pdf_extractor.available:
+                # Queda pendiente: se reanuda al arrancar con pypdf instalado
+                return
+
+            if not await ManualIngestionService._claim(db, manual_id, file_url):
+                # Otro proceso la está haciendo (o ya terminó)
+                return
+
+            try:
+                # Las páginas de una ingesta anterior (otro fichero o interrumpida) se descartan
+                await db.execute(delete(ManualChunk).where(ManualChunk.manual_id == manual_id))
+
+                source_id = await db.scalar(
+                    select(Manual.id).where(
+                        Manual.file_url == file_url,
+                        Manual.extracted_digest == digest,
+                        Manual.extraction_status == ExtractionStatus.DONE.value,
+                        Manual.id != manual_id
+                    ).limit(1)
+                )
+                if source_id is not None:
+                    page_count = await ManualIngestionService._copy_pages(db, source_id, manual_id, file_url)
+                else:
+                    page_count = await ManualIngestionService._extract_pages(db, manual_id, file_url)
+
+                pages = (await db.scalars(
+                    select(ManualChunk.content)
+                    .where(ManualChunk.manual_id == manual_id)
+                    .order_by(ManualChunk.page_number)
+                )).all()
+
+                await ManualIngestionService._set_status(
+                    db, manual_id, file_url, ExtractionStatus.DONE,
+                    content=PAGE_SEPARATOR.join(page for page in pages if page),
+                    page_count=page_count,
+                    extracted_digest=digest
+                )
+            except IngestionSuperseded:
+                await db.rollback()
+            except Exception:
+                await db.rollback()
+                await ManualIngestionService._set_status(db, manual_id, file_url, ExtractionStatus.FAILED)
+                raise
+
+    @staticmethod
+    async def _copy_pages(db, source_id: int, manual_id: int, file_url: str) -> int:
+        """Mismo documento ya extraído para otro manual: INSERT ... SELECT sin volver a extraer"""
+        await ManualIngestionService._renew_claim(db, manual_id, file_url)
+        await db.execute(
+            insert(ManualChunk).from_select(
+                ["manual_id", "page_number", "content", "created_at", "updated_at"],
+                select(
+                    literal(manual_id), ManualChunk.page_number, ManualChunk.content,
+                    ManualChunk.created_at, ManualChunk.updated_at
+                ).where(ManualChunk.manual_id == source_id)
+            )
+        )
+        await db.commit()
+        return await db.scalar(select(Manual.page_count).where(Manual.id == source_id))
+
+    @staticmethod
+    async def _extract_pages(db, manual_id: int, file_url: str) -> int:
+        """Extrae el PDF lote a lote; cada lote se confirma antes de pedir el siguiente"""
+        path = str(absolute_path(file_url))
+        page_count = await pdf_extractor.page_count(path)
+        batch_pages = max(settings.PDF_EXTRACTION_BATCH_PAGES, 1)
+
+        for start in range(0, page_count, batch_pages):
+            texts = await pdf_extractor.extract(path, start, start + batch_pages)
+            await ManualIngestionService._renew_claim(db, manual_id, file_url)
+            await db.execute(
+                insert(ManualChunk),
+                [
+                    {"manual_id": manual_id, "page_number": start + offset + 1, "content": text}
+                    for offset, text in enumerate(texts)
+                ]
+            )
+            await db.commit()
+
+        return page_count
+
+    @staticmethod
+    async def shutdown() -> None:
+        """
+        Cancela las ingestas en curso y las devuelve a pending: las reanuda
+        (desde la primera página) cualquier worker en su siguiente arranque
+        """
+        manual_ids = list(_running)
+        tasks = list(_running.values())
+        _requeued.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if manual_ids:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Manual)
+                    .where(
+                        Manual.id.in_(manual_ids),
+                        Manual.extraction_status == ExtractionStatus.PROCESSING.value
+                    )
+                    .values(extraction_status=ExtractionStatus.PENDING.value)
+                )
+                await db.commit()
+
+    @staticmethod
+    def stats() -> dict:
+        return {**pdf_extractor.stats(), "manuals_in_progress": len(_running)}
@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, extract
+
+from app.models.failure import Failure, FailureStatus
+from app.models.machine import Machine
+
+
+ACTIVE_STATUSES = [FailureStatus.OPEN, FailureStatus.IN_PROGRESS]
+RESOLVED_STATUSES = [FailureStatus.RESOLVED, FailureStatus.CLOSED]
+
+
+def minutes_between(dialect_name: str, start, end):
+    """
+    Expresión SQL con los minutos transcurridos entre dos columnas DateTime
+    """
+    if dialect_name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 1440.0
+    # PostgreSQL
+    return extract("epoch", end - start) / 60.0
+
+
+def repair_totals(dialect_name: str):
+    """
+    Agregados (minutos de reparación, averías con tiempo de reparación)
+
+    El tiempo de reparación de una avería es downtime_minutes si se registró,
+    si no resolved_at - reported_at. En lugar de COALESCE por fila, se suma
+    downtime_minutes tal cual y la diferencia de fechas (cara en SQLite:
+    julianday sobre texto) solo se calcula, con FILTER, para las averías
+    resueltas sin downtime_minutes.
+    """
+    without_downtime = Failure.downtime_minutes.is_(None)
+    elapsed_minutes = func.sum(
+        minutes_between(dialect_name, Failure.reported_at, Failure.resolved_at)
+    ).filter(without_downtime, Failure.resolved_at.isnot(None))
+
+    return (
+        func.coalesce(func.sum(Failure.downtime_minutes), 0) + func.coalesce(elapsed_minutes, 0),
+        func.count(Failure.downtime_minutes) + func.count(Failure.resolved_at).filter(without_downtime)
+    )
+
+
+class ReliabilityService:
+    """Servicio para el cálculo de métricas de fiabilidad (MTTR, MTBF, disponibilidad)"""
+
+    @staticmethod
+    def compute(
+        db: Session,
+        machine_id: Optional[int] = None,
+        production_line_id: Optional[int] = None,
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None
+    ) -> dict:
+        """
+        Calcula las métricas de fiabilidad con una única consulta agregada
+
+        - mttr: media del tiempo de reparación (horas)
+        - mtbf: tiempo de funcionamiento del periodo / número de averías (horas)
+        - availability: MTBF / (MTBF + MTTR) en porcentaje
+
+        El periodo por defecto va desde la primera avería registrada hasta ahora.
+        """
+        repair_minutes, repaired = repair_totals(db.get_bind().dialect.name)
+
+        query = db.query(Failure).select_from(Failure)
+
+        if machine_id is not None:
+            query = query.filter(Failure.machine_id == machine_id)
+
+        if production_line_id is not None:
+            query = query.join(Machine, Machine.id == Failure.machine_id).filter(
+                Machine.production_line_id == production_line_id
+            )
+
+        if period_start is not None:
+            query = query.filter(Failure.reported_at >= period_start)
+
+        if period_end is not None:
+            query = query.filter(Failure.reported_at < period_end)
+
+        # Solo columnas de ix_failures_machine_reliability: sin leer las filas de la tabla
+        row = query.with_entities(
+            func.count().label("total_failures"),
+            func.count().filter(Failure.status.in_(ACTIVE_STATUSES)).label("active_failures"),
+            repair_minutes.label("downtime_minutes"),
+            repaired.label("repaired_failures")
+        ).one()
+
+        # Primera avería en consulta aparte: con máquina es una búsqueda en el índice
+        if period_start is None and row.total_failures:
+            period_start = query.with_entities(func.min(Failure.reported_at)).scalar()
+
+        return ReliabilityService.from_aggregates(
+            total_failures=row.total_failures,
+            active_failures=row.active_failures,
+            # Los estados activos y resueltos cubren todos los de FailureStatus
+            resolved_failures=row.total_failures - row.active_failures,
+            mttr_minutes=row.downtime_minutes / row.repaired_failures if row.repaired_failures else None,
+            downtime_minutes=row.downtime_minutes,
+            period_start=period_start,
+            period_end=period_end or datetime.utcnow()
+        )
+
+    @staticmethod
+    def from_aggregates(
+        total_failures: int,
+        active_failures: int,
+        mttr_minutes: Optional[float],
+        downtime_minutes: float,
+        period_start: Optional[datetime],
+        period_end: datetime,
+        resolved_failures: int = 0
+    ) -> dict:
+        """
+        Deriva MTTR, MTBF y disponibilidad a partir de los agregados del periodo
+        """
+        mttr = mtbf = availability = None
+
+        if mttr_minutes is not None:
+            mttr = float(mttr_minutes) / 60.0
+
+        if total_failures and period_start is not None:
+            period_minutes = max((period_end - period_start).total_seconds() / 60.0, 0.0)
+            uptime_minutes = max(period_minutes - float(downtime_minutes or 0), 0.0)
+            mtbf = uptime_minutes / total_failures / 60.0
+
+        if mtbf is not None and mttr is not None and (mtbf + mttr) > 0:
+            availability = mtbf / (mtbf + mttr) * 100.0
+
+        return {
+            "total_failures": int(total_failures or 0),
+            "active_failures": int(active_failures or 0),
+            "resolved_failures": int(resolved_failures or 0),
+            "total_downtime_minutes": int(round(float(downtime_minutes or 0))),
+            "mttr": round(mttr, 2) if mttr is not None else None,
+            "mtbf": round(mtbf, 2) if mtbf is not None else None,
+            "availability": round(availability, 2) if availability is not None else None
+        }
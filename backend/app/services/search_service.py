@@ -0,0 +1,208 @@
+import html
+import re
+from typing import Dict, Iterable
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, or_, desc, func, select, table, column, literal, literal_column, cast, exists, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.failure import (
+    Failure,
+    FAILURE_SEARCH_CONFIG,
+    FAILURE_FTS_TABLE,
+    failure_search_document
+)
+from app.models.manual import (
+    Manual,
+    MANUAL_SEARCH_CONFIG,
+    MANUAL_FTS_TABLE,
+    manual_search_document
+)
+
+# Marcas de resaltado de los fragmentos: caracteres de control que no aparecen
+# en el texto, sustituidos por <mark> después de escapar el HTML del documento
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+# Peso de cada columna de manuals_fts en bm25 (título, descripción, contenido)
+MANUAL_FTS_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Palabras de contexto por fragmento
+SNIPPET_WORDS = 24
+
+
+def fts5_query(term: str) -> str:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura
+    Cada palabra se busca como prefijo ("motor"*) y todas deben aparecer
+    """
+    words = re.findall(r"\w+", term, flags=re.UNICODE)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def format_snippet(snippet: str) -> str:
+    """Fragmento con el HTML escapado y los términos encontrados entre <mark>"""
+    return (
+        html.escape(snippet)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_END, "</mark>")
+    )
+
+
+class SearchService:
+    """Servicio de búsqueda de texto completo sobre averías y manuales"""
+
+    @staticmethod
+    def _sqlite_match(term: str) -> str:
+        match = fts5_query(term)
+        if not match:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Texto de búsqueda inválido"
+            )
+        return match
+
+    @staticmethod
+    def search_failures(db: AsyncSession, query: Select, term: str) -> Select:
+        """
+        Filtra la consulta de averías por texto y la ordena por relevancia
+
+        - PostgreSQL: tsvector + índice GIN (stemming en español), ts_rank
+        - SQLite: tabla virtual FTS5, bm25
+        - Otros motores: ILIKE sin ranking
+        """
+        dialect_name = db.get_bind().dialect.name
+
+        if dialect_name == "postgresql":
+            document = failure_search_document()
+            ts_query = func.websearch_to_tsquery(FAILURE_SEARCH_CONFIG, term)
+            return query.filter(document.op("@@")(ts_query)).order_by(
+                desc(func.ts_rank(document, ts_query))
+            )
+
+        if dialect_name == "sqlite":
+            fts = table(FAILURE_FTS_TABLE, column("rowid"))
+            fts_ref = literal_column(FAILURE_FTS_TABLE)
+            ranked = select(
+                fts.c.rowid.label("failure_id"),
+                func.bm25(fts_ref).label("rank")
+            ).select_from(fts).where(
+                fts_ref.op("MATCH")(SearchService._sqlite_match(term))
+            ).subquery()
+
+            # bm25: cuanto menor, más relevante
+            return query.join(ranked, ranked.c.failure_id == Failure.id).order_by(ranked.c.rank)
+
+        return query.filter(
+            or_(
+                Failure.title.ilike(f"%{term}%"),
+                Failure.description.ilike(f"%{term}%")
+            )
+        )
+
+    @staticmethod
+    def search_manuals(db: AsyncSession, query: Select, term: str) -> Select:
+        """
+        Filtra la consulta de manuales por texto y la ordena por relevancia
+        Añade la columna score (mayor = más relevante)
+
+        - PostgreSQL: tsvector ponderado + índice GIN, ts_rank
+        - SQLite: tabla virtual FTS5, bm25 con más peso para el título
+        - Otros motores: ILIKE sin ranking
+        """
+        dialect_name = db.get_bind().dialect.name
+
+        if dialect_name == "postgresql":
+            document = manual_search_document()
+            ts_query = func.websearch_to_tsquery(MANUAL_SEARCH_CONFIG, term)
+            score = func.ts_rank(document, ts_query)
+            return query.add_columns(score.label("score")).filter(
+                document.op("@@")(ts_query)
+            ).order_by(desc(score), Manual.id)
+
+        if dialect_name == "sqlite":
+            fts = table(MANUAL_FTS_TABLE, column("rowid"))
+            fts_ref = literal_column(MANUAL_FTS_TABLE)
+            ranked = select(
+                fts.c.rowid.label("manual_id"),
+                func.bm25(fts_ref, *MANUAL_FTS_WEIGHTS).label("rank")
+            ).select_from(fts).where(
+                fts_ref.op("MATCH")(SearchService._sqlite_match(term))
+            ).subquery()
+
+            # bm25: cuanto menor, más relevante
+            return query.add_columns((-ranked.c.rank).label("score")).join(
+                ranked, ranked.c.manual_id == Manual.id
+            ).order_by(ranked.c.rank, Manual.id)
+
+        pattern = f"%{term}%"
+        return query.add_columns(literal(None).label("score")).filter(
+            or_(
+                Manual.title.ilike(pattern),
+                Manual.description.ilike(pattern),
+                Manual.content.ilike(pattern)
+            )
+        ).order_by(desc(Manual.created_at), Manual.id)
+
+    @staticmethod
+    async def manual_snippets(db: AsyncSession, term: str, manual_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Fragmentos resaltados de los manuales ya paginados {id: html}
+
+        Se calculan en una consulta aparte solo para la página devuelta:
+        generar un fragmento recorre el texto del documento, así que no se
+        hace para todas las coincidencias sino para las que se muestran
+        """
+        manual_ids = list(manual_ids)
+        dialect_name = db.get_bind().dialect.name
+        if not manual_ids or dialect_name not in ("postgresql", "sqlite"):
+            return {}
+
+        if dialect_name == "postgresql":
+            ts_query = func.websearch_to_tsquery(MANUAL_SEARCH_CONFIG, term)
+            options = (
+                f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, "
+                f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, "
+                "MaxFragments=2, FragmentDelimiter=\" … \""
+            )
+            # Contenido extraído del documento; si aún no lo hay, la descripción o el título
+            text_column = func.coalesce(
+                func.nullif(Manual.content, ""), Manual.description, Manual.title
+            )
+            snippets = select(
+                Manual.id,
+                func.ts_headline(MANUAL_SEARCH_CONFIG, text_column, ts_query, options)
+            ).where(Manual.id.in_(manual_ids))
+        else:
+            fts = table(MANUAL_FTS_TABLE, column("rowid"))
+            fts_ref = literal_column(MANUAL_FTS_TABLE)
+            # Columna -1: FTS5 elige la columna con más coincidencias
+            snippets = select(
+                fts.c.rowid,
+                func.snippet(fts_ref, -1, HIGHLIGHT_START, HIGHLIGHT_END, "…", SNIPPET_WORDS)
+            ).select_from(fts).where(
+                fts_ref.op("MATCH")(SearchService._sqlite_match(term)),
+                fts.c.rowid.in_(manual_ids)
+            )
+
+        return {
+            manual_id: format_snippet(snippet)
+            for manual_id, snippet in (await db.execute(snippets)).all()
+            if snippet
+        }
+
+    @staticmethod
+    def filter_tags(db: AsyncSession, query: Select, tags: Iterable[str]) -> Select:
+        """Manuales que tienen todas las etiquetas indicadas (columna JSON)"""
+        dialect_name = db.get_bind().dialect.name
+
+        for tag in tags:
+            if dialect_name == "postgresql":
+                query = query.filter(cast(Manual.tags, JSONB).contains([tag]))
+            elif dialect_name == "sqlite":
+                values = func.json_each(Manual.tags).table_valued("value")
+                query = query.filter(exists(select(literal(1)).select_from(values).where(values.c.value == tag)))
+            else:
+                query = query.filter(cast(Manual.tags, String).like(f'%"{tag}"%'))
+
+        return query
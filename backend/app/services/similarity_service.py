@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.events import event_broker, RESYNC
+from app.core.similarity import SimilarFailureIndex
+from app.models.failure import Failure
+from app.models.solution import Solution
+from app.schemas.solution import SimilarFailure, SuggestedSolution
+
+logger = logging.getLogger(__name__)
+
+# Candidatos del índice por resultado pedido: una solución puede dejar de
+# constar como exitosa después de indexar su avería
+CANDIDATE_FACTOR = 2
+MIN_CANDIDATES = 10
+
+# Filas leídas por consulta al cargar el índice
+LOAD_BATCH_SIZE = 5000
+
+# Margen que se vuelve a leer antes de la última solución cargada: una
+# transacción que confirma tarde trae un updated_at anterior a otras ya leídas
+SOLUTION_SYNC_OVERLAP = timedelta(minutes=5)
+
+# Espera entre reintentos de la carga inicial si falla (segundos, con tope)
+RELOAD_RETRY_SECONDS = 5
+MAX_RELOAD_RETRY_SECONDS = 300
+
+# Estado del índice del proceso
+_index = SimilarFailureIndex()
+_ready = asyncio.Event()
+_sync_task: Optional[asyncio.Task] = None
+# updated_at de la última solución cargada
+_solutions_loaded_until: Optional[datetime] = None
+
+
+def _parse_frame(frame: str):
+    """(evento, datos) de un frame SSE del broker de eventos"""
+    event, data = None, {}
+    for line in frame.splitlines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+    return event, data
+
+
+class SimilarityService:
+    """
+    Búsqueda de averías históricas parecidas y de sus soluciones exitosas
+
+    Cada proceso mantiene en memoria un índice BM25 (SimilarFailureIndex)
+    con el título y la descripción de las averías que tienen alguna
+    solución con was_successful. Se carga al arrancar; las soluciones
+    exitosas nuevas o que pasan a serlo se añaden antes de cada búsqueda
+    (solutions.updated_at desde la última cargada, menos
+    SOLUTION_SYNC_OVERLAP, por ix_solutions_updated_at_id) y los cambios de
+    texto o las bajas de averías llegan por los eventos del broker, que con
+    EVENTS_BACKEND=postgres llegan a todos los workers. Las soluciones se
+    leen al consultar (índice de solutions.failure_id), así que nunca están
+    desactualizadas. Sin servicios externos.
+    """
+
+    @staticmethod
+    def _solved_failures(after: Optional[tuple]):
+        """Averías con soluciones exitosas posteriores a after (updated_at, id de la solución)"""
+        query = (
+            select(Solution.updated_at, Solution.id, Failure.id, Failure.title, Failure.description)
+            .join(Failure, Failure.id == Solution.failure_id)
+            .where(Solution.was_successful.is_(True))
+            .order_by(Solution.updated_at, Solution.id)
+            .limit(LOAD_BATCH_SIZE)
+        )
+        if after is not None:
+            query = query.where(tuple_(Solution.updated_at, Solution.id) > tuple_(*after))
+        return query
+
+    @staticmethod
+    async def _load_since(
+        db: AsyncSession, index: SimilarFailureIndex, updated_after: Optional[datetime]
+    ) -> Optional[datetime]:
+        """
+        Añade al índice las averías de las soluciones exitosas creadas o
+        modificadas desde updated_after (por lotes). Retorna el updated_at
+        de la última solución leída
+        """
+        after = None if updated_after is None else (updated_after, 0)
+        while True:
+            rows = (await db.execute(SimilarityService._solved_failures(after))).all()
+            if not rows:
+                return updated_after if after is None else after[0]
+            for _, _, failure_id, title, description in rows:
+                # Una avería con varias soluciones se indexa una vez
+                if failure_id not in index:
+                    index.upsert(failure_id, title, description)
+            after = tuple(rows[-1][:2])
+            # Cede el event loop entre lotes
+            await asyncio.sleep(0)
+
+    @staticmethod
+    async def _load_new_solutions(db: AsyncSession) -> None:
+        """
+        Soluciones exitosas registradas, o marcadas como exitosas, desde la
+        última carga (normalmente ninguna). Se vuelven a leer las de los
+        últimos SOLUTION_SYNC_OVERLAP: las ya indexadas no cuestan nada
+        """
+        global _solutions_loaded_until
+        since = _solutions_loaded_until
+        if since is not None:
+            since -= SOLUTION_SYNC_OVERLAP
+        loaded_until = await SimilarityService._load_since(db, _index, since)
+        if loaded_until is not None and (_solutions_loaded_until is None or loaded_until > _solutions_loaded_until):
+            _solutions_loaded_until = loaded_until
+
+    @staticmethod
+    async def reload() -> None:
+        """
+        Reconstruye el índice completo desde la base de datos
+        Se construye aparte y se sustituye al terminar: las búsquedas nunca ven un índice a medias
+        """
+        global _index, _solutions_loaded_until
+
+        index = SimilarFailureIndex()
+        async with AsyncSessionLocal() as db:
+            loaded_until = await SimilarityService._load_since(db, index, None)
+        await run_in_threadpool(index.reweight)
+        _index, _solutions_loaded_until = index, loaded_until
+        logger.info("Índice de averías parecidas cargado: %s", index.stats())
+
+    @staticmethod
+    async def _refresh_failure(failure_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(Failure.title, Failure.description).where(Failure.id == failure_id)
+            )).one_or_none()
+        if row is None:
+            _index.remove(failure_id)
+        else:
+            _index.upsert(failure_id, row.title, row.description)
+
+    @staticmethod
+    async def _apply(event: str, data: dict) -> None:
+        """
+        Aplica un evento de averías al índice
+        Solo afecta a las averías ya indexadas (con solución exitosa): las
+        averías nuevas o importadas entran al registrar su solución
+        """
+        failure_id = data.get("id")
+        if failure_id not in _index:
+            return
+
+        if event in ("failure.updated", "failure.resolved"):
+            if "title" in data:
+                _index.upsert(failure_id, data["title"], data.get("description"))
+            else:
+                # Evento truncado (NOTIFY con solo el id): se lee de la BD
+                await SimilarityService._refresh_failure(failure_id)
+        elif event == "failure.deleted":
+            _index.remove(failure_id)
+
+    @staticmethod
+    async def _sync() -> None:
+        # Suscrito antes de cargar: los cambios durante la carga se aplican después
+        subscription = event_broker.subscribe()
+        try:
+            retry_seconds = RELOAD_RETRY_SECONDS
+            while True:
+                try:
+                    await SimilarityService.reload()
+                    break
+                except Exception:
+                    logger.exception(
+                        "Error cargando el índice de averías parecidas; reintento en %s s", retry_seconds
+                    )
+                    # Las búsquedas no esperan a la carga: responden sin resultados mientras tanto
+                    _ready.set()
+                    await asyncio.sleep(retry_seconds)
+                    retry_seconds = min(retry_seconds * 2, MAX_RELOAD_RETRY_SECONDS)
+            _ready.set()
+
+            while True:
+                frame = await subscription.queue.get()
+                try:
+                    if frame is RESYNC:
+                        # Se perdieron eventos: se reconstruye el índice
+                        await SimilarityService.reload()
+                    else:
+                        await SimilarityService._apply(*_parse_frame(frame))
+                except Exception:
+                    logger.exception("Error actualizando el índice de averías parecidas")
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    @staticmethod
+    def start() -> None:
+        """Carga el índice en segundo plano y empieza a seguir los eventos"""
+        global _sync_task
+        if _sync_task is None or _sync_task.done():
+            _sync_task = asyncio.get_running_loop().create_task(SimilarityService._sync())
+
+    @staticmethod
+    async def stop() -> None:
+        global _sync_task
+        if _sync_task is not None:
+            _sync_task.cancel()
+            await asyncio.gather(_sync_task, return_exceptions=True)
+            _sync_task = None
+        _ready.clear()
+
+    @staticmethod
+    async def similar_failures(
+        db: AsyncSession,
+        title: str,
+        description: Optional[str] = None,
+        limit: int = 5,
+        exclude: Iterable[int] = ()
+    ) -> List[SimilarFailure]:
+        """
+        Averías parecidas con soluciones exitosas, de más a menos parecida
+
+        El índice solo contiene averías con soluciones exitosas; se piden
+        algunos candidatos de más por si alguna ya no tiene ninguna
+        """
+        SimilarityService.start()
+        await _ready.wait()
+        await SimilarityService._load_new_solutions(db)
+
+        index = _index
+        if index.needs_reweight():
+            # Recalcular los factores recorre todo el índice: fuera del event loop
+            index.apply_weights(await run_in_threadpool(index.compute_weights))
+
+        candidates = index.search(
+            title, description,
+            limit=max(limit * CANDIDATE_FACTOR, MIN_CANDIDATES),
+            exclude=exclude
+        )
+        if not candidates:
+            return []
+
+        rows = (await db.execute(
+            select(Solution, Failure.title, Failure.machine_id)
+            .join(Failure, Failure.id == Solution.failure_id)
+            .where(
+                Solution.failure_id.in_([failure_id for failure_id, _ in candidates]),
+                Solution.was_successful.is_(True)
+            )
+            .order_by(Solution.created_at)
+        )).all()
+
+        by_failure: Dict[int, SimilarFailure] = {}
+        for solution, failure_title, machine_id in rows:
+            similar = by_failure.get(solution.failure_id)
+            if similar is None:
+                similar = by_failure[solution.failure_id] = SimilarFailure(
+                    failure_id=solution.failure_id,
+                    title=failure_title,
+                    machine_id=machine_id,
+                    score=0.0
+                )
+            similar.solutions.append(SuggestedSolution.model_validate(solution))
+
+        results = []
+        for failure_id, score in candidates:
+            similar = by_failure.get(failure_id)
+            if similar is not None:
+                similar.score = score
+                results.append(similar)
+                if len(results) == limit:
+                    break
+        return results
+
+    @staticmethod
+    def stats() -> dict:
+        return {"ready": _ready.is_set(), **_index.stats()}
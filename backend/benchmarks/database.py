@@ -0,0 +1,26 @@
+"""
+Base de datos SQLite temporal para los benchmarks que consultan la BD
+
+Debe importarse antes que cualquier módulo de app: fija DATABASE_URL
+y crea el esquema con las migraciones de Alembic.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+_TMP_DIR = tempfile.mkdtemp(prefix="maintenance-benchmark-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/benchmark.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def create_schema() -> None:
+    # Sin el log de cada migración en la salida del benchmark
+    logging.disable(logging.INFO)
+    command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
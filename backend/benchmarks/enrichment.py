@@ -0,0 +1,126 @@
+"""
+Benchmark del enriquecimiento de una página de 100 averías y 100 máquinas
+
+Compara la construcción anterior (model_validate + model_dump + Schema(**dict),
+dos validaciones por fila) con la actual (atributos leídos una vez y una sola
+validación) y con model_construct, que en pydantic 2 es Python puro y no
+compensa. No accede a la base de datos: usa objetos ORM en memoria.
+
+    python -m benchmarks.enrichment
+"""
+import timeit
+from datetime import date, datetime, timedelta
+
+from app.api.failures import _to_failure_with_details
+from app.models.failure import Failure, FailureSeverity, FailureStatus
+from app.models.machine import Machine
+from app.models.production_line import ProductionLine
+from app.models.user import User
+from app.schemas.failure import Failure as FailureSchema, FailureWithDetails
+from app.schemas.machine import Machine as MachineSchema, MachineWithLine
+from app.services.machine_service import MachineService
+
+PAGE_SIZE = 100
+REPEAT = 200
+
+
+def build_rows():
+    """Averías con máquina, línea y reportero cargados, como tras los joinedload"""
+    now = datetime(2024, 6, 1, 8, 0)
+    lines = [ProductionLine(id=i, name=f"L{i}", description=f"Línea {i}") for i in range(1, 5)]
+    reporter = User(id=1, email="tecnico@planta.local", username="tecnico", full_name="Técnico")
+    machines = [
+        Machine(
+            id=i, code=f"M-{i:03d}", name=f"Máquina {i}", machine_type="llenadora",
+            manufacturer="Krones", model="Modulfill", installation_date=date(2018, 1, 1),
+            specifications={"velocidad": "30000 bph", "cabezales": 96},
+            production_line_id=lines[i % 4].id, production_line=lines[i % 4],
+            is_active=True, created_at=now
+        )
+        for i in range(1, PAGE_SIZE + 1)
+    ]
+    failures = [
+        Failure(
+            id=i, title=f"Atasco en cinta {i}", description="Ruido en rodamiento del eje " * 8,
+            machine_id=machines[i % PAGE_SIZE].id, machine=machines[i % PAGE_SIZE],
+            reported_by=reporter.id, reporter=reporter,
+            status=FailureStatus.RESOLVED, severity=FailureSeverity.HIGH,
+            reported_at=now - timedelta(hours=i), resolved_at=now - timedelta(hours=i - 1),
+            downtime_minutes=60, images=[f"uploads/failures/{i}/foto.jpg"]
+        )
+        for i in range(1, PAGE_SIZE + 1)
+    ]
+    return failures, machines, {line.id: line for line in lines}
+
+
+def failure_with_details_validated(failure: Failure) -> FailureWithDetails:
+    """Construcción anterior: validación, copia a dict y segunda validación"""
+    failure_dict = FailureSchema.model_validate(failure).model_dump()
+    machine = failure.machine
+    failure_dict['machine_code'] = machine.code
+    failure_dict['machine_name'] = machine.name
+    failure_dict['production_line_code'] = machine.production_line.name
+    failure_dict['reporter_name'] = failure.reporter.full_name
+    failure_dict['has_solution'] = False
+    return FailureWithDetails(**failure_dict)
+
+
+def machine_with_line_validated(machine: Machine, lines: dict) -> MachineWithLine:
+    machine_dict = MachineSchema.model_validate(machine).model_dump()
+    line = lines[machine.production_line_id]
+    machine_dict['production_line_code'] = line.name
+    machine_dict['production_line_name'] = line.description
+    return MachineWithLine(**machine_dict)
+
+
+def failure_with_details_constructed(failure: Failure) -> FailureWithDetails:
+    """Sin validar: los mismos datos con model_construct"""
+    data = {name: getattr(failure, name) for name in FailureSchema.model_fields}
+    data['status'] = failure.status.value
+    data['severity'] = failure.severity.value
+    machine = failure.machine
+    data['machine_code'] = machine.code
+    data['machine_name'] = machine.name
+    data['production_line_code'] = machine.production_line.name
+    data['reporter_name'] = failure.reporter.full_name
+    return FailureWithDetails.model_construct(**data)
+
+
+def per_page_ms(func) -> float:
+    return min(timeit.repeat(func, number=REPEAT, repeat=3)) / REPEAT * 1000
+
+
+def report(name: str, before_ms: float, **variants: float) -> None:
+    print(name)
+    print(f"  validando dos veces      {before_ms:8.3f} ms")
+    for label, elapsed in variants.items():
+        print(f"  {label:<24} {elapsed:8.3f} ms   {elapsed - before_ms:+.3f} ms (x{before_ms / elapsed:.1f})")
+
+
+def main():
+    failures, machines, lines = build_rows()
+
+    # Mismo resultado con la construcción anterior y la actual
+    assert [failure_with_details_validated(f).model_dump() for f in failures] == \
+        [_to_failure_with_details(f).model_dump() for f in failures]
+    assert [machine_with_line_validated(m, lines).model_dump() for m in machines] == \
+        [MachineWithLine(**MachineService.to_machine_with_line(m, lines)).model_dump() for m in machines]
+
+    print(f"CPU por página de {PAGE_SIZE} filas")
+    report(
+        "FailureWithDetails",
+        per_page_ms(lambda: [failure_with_details_validated(f) for f in failures]),
+        una_validacion=per_page_ms(lambda: [_to_failure_with_details(f) for f in failures]),
+        model_construct=per_page_ms(lambda: [failure_with_details_constructed(f) for f in failures])
+    )
+    report(
+        "MachineWithLine",
+        per_page_ms(lambda: [machine_with_line_validated(m, lines) for m in machines]),
+        una_validacion=per_page_ms(lambda: [
+            MachineWithLine(**MachineService.to_machine_with_line(m, lines)) for m in machines
+        ])
+    )
+
+
+if __name__ == "__main__":
+    main()
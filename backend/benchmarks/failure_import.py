@@ -0,0 +1,101 @@
+"""
+Benchmark de la importación masiva de averías con y sin recálculo de KPIs
+
+Importa N_ROWS averías NDJSON de 40 máquinas repartidas en tres años sobre
+una base de datos SQLite temporal: sin recalcular KPIs, recalculándolos con
+las filas en orden cronológico (exportación habitual) y con las fechas al
+azar (peor caso: cada lote toca cientos de días y miles de buckets). Con
+refresh_kpis=true cada lote hace una consulta GROUP BY y un upsert por nivel.
+
+    python -m benchmarks.failure_import
+"""
+from benchmarks.database import create_schema
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.core.database import SessionLocal, AsyncSessionLocal
+from app.models.machine import Machine
+from app.models.production_line import ProductionLine
+from app.models.user import User
+from app.services.import_service import FailureImportService, NDJSON_FORMAT
+
+N_ROWS = 20_000
+MACHINES = 40
+CHUNK_SIZE = 64 * 1024
+
+
+def seed() -> int:
+    """Usuario, 4 líneas y MACHINES máquinas; retorna el id del usuario"""
+    with SessionLocal() as db:
+        user = User(email="bench@planta.local", username="bench", hashed_password="x",
+                    full_name="Benchmark", role="admin")
+        lines = [ProductionLine(name=f"L{index}") for index in range(4)]
+        db.add(user)
+        db.add_all(lines)
+        db.flush()
+        db.add_all([
+            Machine(code=f"M{index}", name=f"Máquina {index}", machine_type="llenadora",
+                    production_line_id=lines[index % len(lines)].id)
+            for index in range(MACHINES)
+        ])
+        db.commit()
+        return user.id
+
+
+def build_body(seed_value: int, chronological: bool) -> bytes:
+    rng = random.Random(seed_value)
+    start = datetime(2021, 1, 1)
+    minutes = [rng.randrange(3 * 365 * 24 * 60) for _ in range(N_ROWS)]
+    if chronological:
+        minutes.sort()
+    return b"".join(
+        orjson.dumps({
+            "machine_code": f"M{rng.randrange(MACHINES)}",
+            "title": "Atasco en la cinta",
+            "description": "Importada desde el sistema anterior",
+            "status": rng.choice(["open", "resolved"]),
+            "reported_at": (start + timedelta(minutes=offset)).isoformat(),
+            "downtime_minutes": rng.randint(5, 240),
+        }) + b"\n"
+        for offset in minutes
+    )
+
+
+async def import_rows(body: bytes, reported_by: int, refresh_kpis: bool) -> float:
+    async def chunks():
+        for offset in range(0, len(body), CHUNK_SIZE):
+            yield body[offset:offset + CHUNK_SIZE]
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        result = await FailureImportService.import_failures(
+            db, chunks(), NDJSON_FORMAT, reported_by, refresh_kpis=refresh_kpis
+        )
+        elapsed = time.perf_counter() - started
+    assert result.imported == N_ROWS and not result.failed
+    return result.imported / elapsed
+
+
+def main():
+    create_schema()
+    reported_by = seed()
+
+    print(f"Importación de {N_ROWS} averías en {MACHINES} máquinas y tres años")
+    scenarios = [
+        ("sin KPIs", False, True),
+        ("KPIs, orden cronológico", True, True),
+        ("KPIs, fechas al azar", True, False),
+    ]
+    for seed_value, (label, refresh_kpis, chronological) in enumerate(scenarios):
+        body = build_body(seed_value, chronological)
+        rows_per_second = asyncio.run(import_rows(body, reported_by, refresh_kpis))
+        print(f"  {label:<24} {rows_per_second:8.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark de ReliabilityService.compute (estadísticas de una máquina)
+
+Crea en una base de datos SQLite temporal N_FAILURES averías de una misma
+máquina (más FAILURES_PER_OTHER_MACHINE de cada una de otras 9), con
+descripciones realistas, y mide la consulta agregada de MTTR, MTBF y
+disponibilidad de esa máquina: todo el histórico y los últimos 30 días.
+Muestra el plan de la consulta (el índice que usa).
+
+    python -m benchmarks.reliability
+"""
+from benchmarks.database import create_schema
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, text
+
+from app.core.database import SessionLocal
+from app.models.failure import Failure, FailureSeverity, FailureStatus
+from app.models.machine import Machine
+from app.models.production_line import ProductionLine
+from app.models.user import User
+from app.services.reliability_service import ReliabilityService
+
+N_FAILURES = 300_000
+FAILURES_PER_OTHER_MACHINE = 10_000
+BATCH_SIZE = 20_000
+REPEAT = 5
+
+STATUSES = list(FailureStatus)
+
+
+def seed(db) -> int:
+    """Averías de diez máquinas; retorna el id de la máquina medida"""
+    user = User(email="bench@planta.local", username="bench", hashed_password="x",
+                full_name="Benchmark", role="admin")
+    line = ProductionLine(name="L1")
+    db.add_all([user, line])
+    db.flush()
+    machines = [
+        Machine(code=f"M{index}", name=f"Máquina {index}", machine_type="llenadora", production_line_id=line.id)
+        for index in range(10)
+    ]
+    db.add_all(machines)
+    db.flush()
+
+    rng = random.Random(7)
+    start = datetime(2016, 1, 1)
+    counts = [N_FAILURES] + [FAILURES_PER_OTHER_MACHINE] * 9
+    for machine, count in zip(machines, counts):
+        for offset in range(0, count, BATCH_SIZE):
+            rows = []
+            for _ in range(min(BATCH_SIZE, count - offset)):
+                reported_at = start + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60))
+                status = rng.choice(STATUSES)
+                resolved = status in (FailureStatus.RESOLVED, FailureStatus.CLOSED)
+                rows.append({
+                    "title": "Atasco en la cinta transportadora",
+                    "description": "Ruido anómalo en el rodamiento del eje principal " * 4,
+                    "machine_id": machine.id,
+                    "reported_by": user.id,
+                    "status": status,
+                    "severity": FailureSeverity.MEDIUM,
+                    "reported_at": reported_at,
+                    "resolved_at": reported_at + timedelta(minutes=rng.randint(5, 600)) if resolved else None,
+                    "downtime_minutes": rng.choice([None, rng.randint(5, 300)]),
+                    "images": [],
+                })
+            db.execute(insert(Failure), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+    return machines[0].id
+
+
+def best_ms(func) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def query_plan(db, compute) -> str:
+    """Plan de la consulta que lanza compute(), tal como la genera SQLAlchemy"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        compute()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = statements[0]
+    cursor = db.connection().connection.cursor()
+    return " / ".join(row[-1] for row in cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+
+def main():
+    create_schema()
+    with SessionLocal() as db:
+        machine_id = seed(db)
+        period_end = datetime(2026, 1, 1)
+
+        print(f"ReliabilityService.compute de una máquina con {N_FAILURES} averías")
+        for label, period_start in (("histórico completo", None), ("últimos 30 días", period_end - timedelta(days=30))):
+            def compute():
+                return ReliabilityService.compute(
+                    db, machine_id=machine_id, period_start=period_start,
+                    period_end=period_end if period_start else None
+                )
+
+            elapsed = best_ms(compute)
+            per_100k = f"   ({elapsed / N_FAILURES * 100_000:.1f} ms / 100k filas)" if period_start is None else ""
+            print(f"  {label:<20} {elapsed:8.1f} ms{per_100k}")
+            print(f"    plan: {query_plan(db, compute)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de serialización y compresión de una página de 100 FailureWithDetails
+
+Compara json.dumps (JSONResponse) con orjson (ORJSONResponse) y el tamaño
+del cuerpo sin comprimir, con gzip y con brotli.
+
+    python -m benchmarks.responses
+"""
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import compression
+from app.core.responses import ORJSONResponse
+from app.schemas.failure import FailureWithDetails
+
+PAGE_SIZE = 100
+REPEAT = 200
+
+WORDS = (
+    "rodamiento vibración motor sensor temperatura presión válvula cinta "
+    "transportadora atasco ruido fuga aceite correa desgaste alineación "
+    "eje reductor encoder variador sobrecorriente parada emergencia turno"
+).split()
+
+
+def build_page() -> list:
+    """Página realista: descripciones de 40-120 palabras y 0-4 imágenes por avería"""
+    rng = random.Random(42)
+    now = datetime(2024, 6, 1, 8, 0)
+    page = []
+    for i in range(PAGE_SIZE):
+        reported_at = now - timedelta(hours=7 * i)
+        resolved = i % 3 == 0
+        page.append(FailureWithDetails(
+            id=10_000 + i,
+            machine_id=rng.randint(1, 60),
+            title=" ".join(rng.choices(WORDS, k=5)).capitalize(),
+            description=" ".join(rng.choices(WORDS, k=rng.randint(40, 120))),
+            severity=rng.choice(["critical", "high", "medium", "low"]),
+            reported_by=rng.randint(1, 20),
+            status="resolved" if resolved else "open",
+            reported_at=reported_at,
+            resolved_at=reported_at + timedelta(minutes=95) if resolved else None,
+            downtime_minutes=95 if resolved else None,
+            images=[f"uploads/failures/{10_000 + i}/foto_{n}.jpg" for n in range(rng.randint(0, 4))],
+            machine_code=f"M-{rng.randint(100, 999)}",
+            machine_name=f"Máquina {rng.randint(1, 60)}",
+            production_line_code=f"Línea {rng.randint(1, 8)}",
+            reporter_name="Técnico de mantenimiento",
+        ))
+    return page
+
+
+def per_page_ms(func) -> float:
+    return min(timeit.repeat(func, number=REPEAT, repeat=3)) / REPEAT * 1000
+
+
+def main():
+    page = build_page()
+    # Lo que recibe la clase de respuesta tras validar el response_model
+    content = jsonable_encoder(page)
+
+    json_ms = per_page_ms(lambda: JSONResponse(content).body)
+    orjson_ms = per_page_ms(lambda: ORJSONResponse(content).body)
+
+    print(f"Serialización de {PAGE_SIZE} FailureWithDetails por página")
+    print(f"  json.dumps (JSONResponse)   {json_ms:8.3f} ms")
+    print(f"  orjson (ORJSONResponse)     {orjson_ms:8.3f} ms   x{json_ms / orjson_ms:.1f}")
+
+    body = ORJSONResponse(content).body
+    print()
+    print("Bytes enviados por página")
+    print(f"  sin comprimir               {len(body):8d} B")
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        compressed = compression.compress(body, encoding)
+        elapsed = per_page_ms(lambda: compression.compress(body, encoding))
+        print(
+            f"  {encoding:<6}                      {len(compressed):8d} B"
+            f"   -{100 - len(compressed) * 100 / len(body):.0f}%   ({elapsed:.3f} ms)"
+        )
+    if compression.brotli is None:
+        print("  br                          (paquete brotli no instalado)")
+
+
+if __name__ == "__main__":
+    main()
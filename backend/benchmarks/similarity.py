@@ -0,0 +1,75 @@
+"""
+Benchmark de SimilarFailureIndex.search con 200.000 averías indexadas
+
+Textos sintéticos con un vocabulario de 20.000 términos de frecuencias de
+Zipf (unos pocos términos en casi todas las averías, como "motor" o
+"fallo"), título de 5 palabras y descripción de 15; cada consulta es el
+texto de una avería nueva. Compara la búsqueda con la puntuación exacta
+(todos los términos sobre todas sus filas) y muestra cuántos de los 10
+primeros resultados coinciden con ella. No accede a la base de datos.
+
+    python -m benchmarks.similarity
+"""
+import heapq
+import itertools
+import math
+import random
+import statistics
+import time
+from operator import itemgetter
+
+from app.core.similarity import SimilarFailureIndex
+
+N_FAILURES = 200_000
+VOCABULARY = 20_000
+N_QUERIES = 200
+LIMIT = 10
+
+_rng = random.Random(3)
+_words = [f"termino{index}" for index in range(VOCABULARY)]
+_cumulative = list(itertools.accumulate(1 / rank for rank in range(1, VOCABULARY + 1)))
+
+
+def text(words: int) -> str:
+    return " ".join(_rng.choices(_words, cum_weights=_cumulative, k=words))
+
+
+def exact_search(index: SimilarFailureIndex, title: str, description: str):
+    """Puntuación BM25 de todos los términos de la consulta sobre todas sus filas"""
+    documents = len(index)
+    scores = {}
+    for term, query_count in index._document_terms(title, description).items():
+        term_id = index._terms.get(term)
+        if term_id is None:
+            continue
+        rows = index._postings[term_id]
+        weight = math.log(1 + (documents - len(rows) + 0.5) / (len(rows) + 0.5)) * query_count * (index.K1 + 1)
+        for row, impact in zip(rows, index._impacts[term_id]):
+            scores[row] = scores.get(row, 0.0) + weight * impact
+    best = heapq.nlargest(LIMIT, scores.items(), key=itemgetter(1))
+    return [index._failure_ids[row] for row, _ in best]
+
+
+def main():
+    index = SimilarFailureIndex()
+    for failure_id in range(1, N_FAILURES + 1):
+        index.upsert(failure_id, text(5), text(15))
+    index.reweight()
+    queries = [(text(5), text(15)) for _ in range(N_QUERIES)]
+
+    timings, matches = [], 0
+    for title, description in queries:
+        started = time.perf_counter()
+        results = index.search(title, description, limit=LIMIT)
+        timings.append((time.perf_counter() - started) * 1000)
+        exact = exact_search(index, title, description)
+        matches += len({failure_id for failure_id, _ in results} & set(exact))
+
+    timings.sort()
+    print(f"SimilarFailureIndex.search con {N_FAILURES} averías ({index.stats()['postings']} ocurrencias)")
+    print(f"  p50 {statistics.median(timings):6.1f} ms   p90 {timings[int(len(timings) * 0.9)]:6.1f} ms")
+    print(f"  resultados en el top {LIMIT} exacto: {matches / (len(queries) * LIMIT):.1%}")
+
+
+if __name__ == "__main__":
+    main()
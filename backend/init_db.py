@@ -3,10 +3,11 @@ Script para inicializar la base de datos
 Crea todas las tablas y datos de prueba
 """
 from app.core.database import engine, Base
-from app.models import user, production_line, machine, failure
+from app.models import user, production_line, machine, failure, kpi
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.services.auth_service import AuthService
+from app.services.kpi_service import KPIService
 from datetime import datetime, timedelta
 
 def init_db():
@@ -159,6 +160,11 @@ def create_sample_data():
         db.commit()
         print("✅ Averías creadas")
 
+        # Materializar KPIs diarios de las averías de ejemplo
+        print("📊 Calculando KPIs...")
+        KPIService.rebuild(db)
+        print("✅ KPIs calculados")
+
         print("\n✨ Datos de ejemplo creados exitosamente!")
         print("\n📝 Usuarios de prueba:")
         print("   Admin:      admin@maintenance.com / admin123")
@@ -0,0 +1,101 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Base de datos SQLite temporal: debe fijarse antes de importar la aplicación
+_TMP_DIR = tempfile.mkdtemp(prefix="maintenance-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["UPLOAD_DIR"] = f"{_TMP_DIR}/uploads"
+# Hash y extracción en hilos: sin arrancar procesos durante los tests
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["PDF_EXTRACTION_WORKERS"] = "0"
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.core.database import SessionLocal, async_engine
+from app.core.dependencies import get_current_active_user
+from app.models.user import User
+from app.models.production_line import ProductionLine
+from app.models.machine import Machine
+from app.models.failure import Failure, FailureStatus, FailureSeverity
+from app.schemas import CurrentUser
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def alembic_config():
+    return Config(str(BACKEND_DIR / "alembic.ini"))
+
+
+@pytest.fixture(scope="session")
+def database(alembic_config):
+    """Esquema creado con las migraciones de Alembic y datos de ejemplo"""
+    command.upgrade(alembic_config, "head")
+
+    db = SessionLocal()
+    user = User(
+        email="admin@example.com", username="admin", hashed_password="x",
+        full_name="Administrador", role="admin"
+    )
+    db.add(user)
+    db.flush()
+
+    lines = [ProductionLine(name=f"L{index}", description=f"Línea {index}") for index in range(3)]
+    db.add_all(lines)
+    db.flush()
+
+    machines = [
+        Machine(code=f"M{index}", name=f"Máquina {index}", machine_type="llenadora",
+                production_line_id=lines[index % len(lines)].id)
+        for index in range(6)
+    ]
+    db.add_all(machines)
+    db.flush()
+
+    now = datetime.utcnow()
+    db.add_all([
+        Failure(
+            title=f"Avería {index}",
+            description="Ruido en el rodamiento del motor",
+            machine_id=machines[index % len(machines)].id,
+            reported_by=user.id,
+            status=FailureStatus.OPEN if index % 3 else FailureStatus.RESOLVED,
+            severity=FailureSeverity.MEDIUM,
+            reported_at=now - timedelta(hours=index),
+            images=[]
+        )
+        for index in range(120)
+    ])
+    db.commit()
+
+    current_user = CurrentUser.model_validate(user)
+    db.close()
+    return current_user
+
+
+@pytest.fixture
+def client(database):
+    app.dependency_overrides[get_current_active_user] = lambda: database
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def statements():
+    """Sentencias SQL (con sus parámetros) que ejecuta la API durante el test"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
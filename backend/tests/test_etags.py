@@ -0,0 +1,62 @@
+from app.core.database import SessionLocal
+from app.models.failure import Failure
+from app.models.machine import Machine
+
+FAILURES_URL = "/api/failures/"
+MACHINES_URL = "/api/machines/"
+
+
+def _etag(client, url, **params) -> str:
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_not_modified_list_reads_only_table_versions(client, statements):
+    """El 304 de un listado no recorre la tabla de averías (ni COUNT ni max(updated_at))"""
+    etag = _etag(client, FAILURES_URL, limit=5)
+
+    statements.clear()
+    response = client.get(FAILURES_URL, params={"limit": 5}, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert len(statements) == 1
+    assert "FROM table_versions" in statements[0][0]
+    assert "failures" not in statements[0][0].replace("'failures'", "")
+
+
+def test_list_etag_changes_on_every_kind_of_write(client, database):
+    etag = _etag(client, FAILURES_URL, limit=5)
+
+    # Baja de una avería que no es la última (no cambia max(updated_at))
+    with SessionLocal() as db:
+        db.delete(db.query(Failure).order_by(Failure.id).first())
+        db.commit()
+    deleted = _etag(client, FAILURES_URL, limit=5)
+    assert deleted != etag
+
+    # Inserción masiva (INSERT ... executemany, sin objetos ORM)
+    response = client.post("/api/failures/import", headers={"Content-Type": "application/x-ndjson"}, content=(
+        b'{"machine_code": "M1", "title": "Importada para el ETag", "description": "x", '
+        b'"reported_at": "2020-01-01T00:00:00"}\n'
+    ))
+    assert response.json()["imported"] == 1
+    imported = _etag(client, FAILURES_URL, limit=5)
+    assert imported != deleted
+
+    # Cambio en una tabla de los detalles
+    with SessionLocal() as db:
+        db.get(Machine, 1).name = "Renombrada para el ETag"
+        db.commit()
+    assert _etag(client, FAILURES_URL, limit=5) != imported
+
+
+def test_machine_list_etag_changes_when_a_machine_changes(client):
+    etag = _etag(client, MACHINES_URL)
+    assert client.get(MACHINES_URL, headers={"If-None-Match": etag}).status_code == 304
+
+    with SessionLocal() as db:
+        db.get(Machine, 2).manufacturer = "Krones"
+        db.commit()
+
+    assert _etag(client, MACHINES_URL) != etag
@@ -0,0 +1,80 @@
+import asyncio
+import io
+
+from PIL import Image
+from starlette.requests import Request
+
+from app.api import failures
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.storage import absolute_path, thumbnail_path
+from app.core.thumbnails import thumbnail_worker
+from app.models.failure import Failure
+
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_oversized_upload_is_rejected_before_parsing_the_body(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_MB", 1)
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_FILES", 1)
+    parsed = []
+    form = Request.form
+    monkeypatch.setattr(Request, "form", lambda self, **kwargs: parsed.append(self) or form(self, **kwargs))
+
+    photo = _png() + b"\0" * (2 * 1024 * 1024)
+    response = client.post("/api/failures/1/images", files={"files": ("foto.png", photo, "image/png")})
+
+    assert response.status_code == 413
+    assert parsed == []
+
+
+def test_chunked_upload_without_content_length_is_limited_while_received(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_MB", 1)
+    monkeypatch.setattr(settings, "MAX_IMAGE_UPLOAD_FILES", 1)
+
+    def body():
+        yield b'--limite\r\nContent-Disposition: form-data; name="files"; filename="foto.png"\r\n'
+        yield b"Content-Type: image/png\r\n\r\n" + _png()
+        for _ in range(8):
+            yield b"\0" * (512 * 1024)
+        yield b"\r\n--limite--\r\n"
+
+    response = client.post(
+        "/api/failures/1/images", content=body(),
+        headers={"Content-Type": "multipart/form-data; boundary=limite"}
+    )
+
+    assert response.status_code == 413
+
+
+def test_only_generated_thumbnails_are_listed(client, monkeypatch):
+    monkeypatch.setattr(thumbnail_worker, "available", False)
+
+    response = client.post("/api/failures/2/images", files={"files": ("foto.png", _png(), "image/png")})
+    assert response.status_code == 200
+    image = response.json()["images"][-1]
+    assert client.get("/api/failures/2").json()["thumbnails"] == []
+
+    thumbnail = thumbnail_path(image)
+    absolute_path(thumbnail).parent.mkdir(parents=True, exist_ok=True)
+    absolute_path(thumbnail).write_bytes(b"RIFF")
+    assert client.get("/api/failures/2").json()["thumbnails"] == [thumbnail]
+
+
+def test_generated_thumbnails_change_the_failure_etag(database):
+    with SessionLocal() as db:
+        updated_at = db.get(Failure, 3).updated_at
+
+    async def generated():
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(True)
+        await failures._touch_when_thumbnails_ready(3, [done])
+
+    asyncio.run(generated())
+
+    with SessionLocal() as db:
+        assert db.get(Failure, 3).updated_at > updated_at
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import orjson
+
+from app.core.database import SessionLocal
+from app.models.failure import Failure
+from app.services.import_service import FailureImportService
+
+IMPORT_URL = "/api/failures/import"
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _ndjson(*rows) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+def _row(title, **fields):
+    return {"machine_code": "M1", "title": title, "description": "Importada", **fields}
+
+
+def _imported(title):
+    with SessionLocal() as db:
+        return db.query(Failure).filter(Failure.title == title).one()
+
+
+def test_import_converts_datetimes_to_naive_utc(client):
+    response = client.post(IMPORT_URL, headers=NDJSON, content=_ndjson(
+        _row("Importada con offset", reported_at="2024-02-01T10:00:00+02:00",
+             resolved_at="2024-02-01T09:30:00Z", status="resolved"),
+    ))
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    failure = _imported("Importada con offset")
+    assert failure.reported_at == datetime(2024, 2, 1, 8, 0)
+    assert failure.resolved_at == datetime(2024, 2, 1, 9, 30)
+
+
+def test_import_compares_aware_and_naive_datetimes(client):
+    response = client.post(IMPORT_URL, headers=NDJSON, content=_ndjson(
+        _row("Aware y naive", reported_at="2024-03-01T10:00:00Z", resolved_at="2024-03-01T09:00:00"),
+        _row("Aware y naive válida", reported_at="2024-03-01T10:00:00Z", resolved_at="2024-03-01T11:00:00"),
+    ))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 1
+    assert [error["row"] for error in body["errors"]] == [1]
+
+
+def test_database_errors_are_reported_per_row(client, monkeypatch):
+    to_insert_row = FailureImportService.to_insert_row
+
+    def reject_second_row(raw, machine_ids, reported_by):
+        row = to_insert_row(raw, machine_ids, reported_by)
+        if raw["title"] == "Rechazada por la BD":
+            row["machine_id"] = None
+        return row
+
+    monkeypatch.setattr(FailureImportService, "to_insert_row", staticmethod(reject_second_row))
+    response = client.post(IMPORT_URL, headers=NDJSON, content=_ndjson(
+        _row("Lote con error 1", reported_at="2024-04-01T10:00:00"),
+        _row("Rechazada por la BD", reported_at="2024-04-01T11:00:00"),
+        _row("Lote con error 3", reported_at="2024-04-01T12:00:00"),
+    ))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 2
+    assert body["failed"] == 1
+    assert body["errors"][0]["row"] == 2
+    assert body["errors"][0]["error"].startswith("Error de base de datos")
+    assert _imported("Lote con error 3").machine_id is not None
+
+
+def test_csv_quote_inside_unquoted_field_is_a_literal(client):
+    """Solo un campo entre comillas continúa en la línea siguiente"""
+    response = client.post(IMPORT_URL, headers={"Content-Type": "text/csv"}, content=(
+        "machine_code,title,description,reported_at\n"
+        'M1,Tubo 2" roto,Sin comillas,2024-05-01T10:00:00\n'
+        'M1,Junta rota,"Dos líneas\ncon ""comillas""",2024-05-01T11:00:00\n'
+        "M1,Tras la comilla,Normal,2024-05-01T12:00:00\n"
+    ).encode())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["imported"] == 3
+    assert body["errors"] == []
+    assert _imported('Tubo 2" roto').description == "Sin comillas"
+    assert _imported("Junta rota").description == 'Dos líneas\ncon "comillas"'
+    assert _imported("Tras la comilla").reported_at == datetime(2024, 5, 1, 12, 0)
@@ -0,0 +1,69 @@
+import pytest
+
+from app.core.database import engine
+
+FAILURES_URL = "/api/failures/"
+HISTORY_URL = "/api/failures/machine/1/history"
+
+
+def _page_statement(statements):
+    """Consulta de la página: la única con LIMIT sobre failures"""
+    pages = [(sql, params) for sql, params in statements if "FROM failures" in sql and "LIMIT" in sql]
+    assert len(pages) == 1
+    return pages[0]
+
+
+def _failures_plan(sql, params) -> str:
+    """Paso de EXPLAIN QUERY PLAN (SQLite) que lee la tabla failures"""
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+    details = [row[-1] for row in rows]
+    assert not any("TEMP B-TREE" in detail for detail in details), details
+    steps = [detail for detail in details if detail.split()[1:2] == ["failures"]]
+    assert len(steps) == 1, details
+    return steps[0]
+
+
+@pytest.fixture
+def cursor(client):
+    return client.get(FAILURES_URL, params={"limit": 5}).headers["X-Next-Cursor"]
+
+
+@pytest.mark.parametrize("url, params, index", [
+    (FAILURES_URL, {}, "ix_failures_reported_at_id"),
+    (FAILURES_URL, {"cursor": True}, "ix_failures_reported_at_id"),
+    (FAILURES_URL, {"reported_after": "2020-01-01T00:00:00"}, "ix_failures_reported_at_id"),
+    (FAILURES_URL, {"machine_id": 1}, "ix_failures_machine_reliability"),
+    (HISTORY_URL, {}, "ix_failures_machine_reliability"),
+    (HISTORY_URL, {"cursor": True}, "ix_failures_machine_reliability"),
+])
+def test_failure_pages_use_indexes(client, statements, cursor, url, params, index):
+    """
+    Listado e histórico leen failures por índice, en el orden del índice
+    (sin ordenación temporal) y sin recorrer la tabla
+    """
+    if params.get("cursor"):
+        params = {**params, "cursor": cursor}
+
+    statements.clear()
+    assert client.get(url, params={"limit": 20, **params}).status_code == 200
+
+    step = _failures_plan(*_page_statement(statements))
+    assert f"USING INDEX {index}" in step or f"USING COVERING INDEX {index}" in step
+    if params:
+        # Con filtros o cursor se busca un rango del índice, no se recorre entero
+        assert step.startswith("SEARCH")
+
+
+@pytest.mark.parametrize("params", [{}, {"period_start": "2020-01-01T00:00:00", "period_end": "2030-01-01T00:00:00"}])
+def test_machine_stats_read_only_the_covering_index(client, statements, params):
+    """Las métricas de fiabilidad de una máquina no leen las filas de failures"""
+    statements.clear()
+    response = client.get("/api/machines/1/stats", params=params)
+    assert response.status_code == 200
+    assert response.json()["total_failures"] > 0
+
+    queries = [(sql, parameters) for sql, parameters in statements if "FROM failures" in sql]
+    assert queries
+    for sql, parameters in queries:
+        assert "USING COVERING INDEX ix_failures_machine_reliability" in _failures_plan(sql, parameters)
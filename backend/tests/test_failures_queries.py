@@ -0,0 +1,63 @@
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.solution import Solution
+
+FAILURES_URL = "/api/failures/"
+
+
+def _count_list_queries(client, statements, **params) -> int:
+    statements.clear()
+    response = client.get(FAILURES_URL, params=params)
+    assert response.status_code == 200
+    assert len(response.json()) == params["limit"]
+    return len(statements)
+
+
+@pytest.mark.parametrize("filters", [{}, {"production_line_id": 1}, {"status": "OPEN"}])
+def test_list_failures_query_count_does_not_depend_on_page_size(client, statements, filters):
+    """Máquina, línea y reportero se cargan con la página: sin consultas por fila"""
+    single = _count_list_queries(client, statements, limit=1, **filters)
+    page = _count_list_queries(client, statements, limit=30 if filters else 50, **filters)
+
+    assert single == page
+    # Versión para el ETag + página con sus detalles
+    assert page == 2
+
+
+def test_list_failures_returns_details(client):
+    failure = client.get(FAILURES_URL, params={"limit": 1}).json()[0]
+
+    assert failure["machine_code"].startswith("M")
+    assert failure["production_line_code"].startswith("L")
+    assert failure["reporter_name"] == "Administrador"
+
+
+def test_next_cursor_only_in_keyset_mode(client):
+    keyset = client.get(FAILURES_URL, params={"limit": 5})
+    cursor = keyset.headers["X-Next-Cursor"]
+    assert client.get(FAILURES_URL, params={"limit": 5, "cursor": cursor}).status_code == 200
+
+    search = client.get(FAILURES_URL, params={"limit": 5, "search": "rodamiento"})
+    assert search.status_code == 200
+    assert len(search.json()) == 5
+    assert "X-Next-Cursor" not in search.headers
+
+
+def test_has_solution_is_computed_with_the_page(client, database, statements):
+    """has_solution sale de un EXISTS en la consulta de la página, sin consultas por fila"""
+    failure_id = client.get(FAILURES_URL, params={"limit": 1}).json()[0]["id"]
+    etag = client.get(FAILURES_URL, params={"limit": 1}).headers["ETag"]
+    assert client.get(f"{FAILURES_URL}{failure_id}").json()["has_solution"] is False
+
+    with SessionLocal() as db:
+        db.add(Solution(title="Cambiar el rodamiento", description="Rodamiento nuevo",
+                        failure_id=failure_id, created_by=database.id))
+        db.commit()
+
+    statements.clear()
+    response = client.get(FAILURES_URL, params={"limit": 1}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["has_solution"] is True
+    assert len(statements) == 2
+    assert client.get(f"{FAILURES_URL}{failure_id}").json()["has_solution"] is True
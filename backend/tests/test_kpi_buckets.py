@@ -0,0 +1,121 @@
+import threading
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import SessionLocal
+from app.models.failure import Failure
+from app.models.kpi import KPI
+from app.services.kpi_service import KPIService, KPI_LOCK_NAMESPACE, LOCK_KPI_DAYS
+from app.services.reliability_service import ReliabilityService
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    session.close()
+
+
+def _bucket_rows(db, day):
+    return db.query(KPI.machine_id, KPI.production_line_id).filter(KPI.date == day).all()
+
+
+def test_refresh_writes_one_row_per_bucket(db):
+    failure = db.query(Failure).order_by(Failure.id).first()
+    day = failure.reported_at.date()
+
+    for _ in range(3):
+        KPIService.refresh_for(db, failure.reported_at, failure.machine_id)
+
+    rows = _bucket_rows(db, day)
+    assert len(rows) == len(set(rows)) == 3
+    global_kpi = db.query(KPI).filter(
+        KPI.date == day, KPI.machine_id.is_(None), KPI.production_line_id.is_(None)
+    ).one()
+    period_start, period_end = KPIService._day_bounds(day)
+    assert global_kpi.total_failures == db.query(Failure).filter(
+        Failure.reported_at >= period_start, Failure.reported_at < period_end
+    ).count()
+
+
+@pytest.mark.parametrize("machine_id, production_line_id", [(1, 1), (None, 1), (None, None)])
+def test_duplicate_bucket_is_rejected(db, machine_id, production_line_id):
+    day = datetime(2000, 1, 1).date()
+    db.add(KPI(date=day, machine_id=machine_id, production_line_id=production_line_id))
+    db.flush()
+
+    db.add(KPI(date=day, machine_id=machine_id, production_line_id=production_line_id))
+    with pytest.raises(IntegrityError):
+        db.flush()
+
+
+def test_refresh_many_matches_per_bucket_metrics(db):
+    """Los buckets calculados en bloque coinciden con ReliabilityService.compute de cada bucket"""
+    failures = db.query(Failure).order_by(Failure.id).limit(60).all()
+    KPIService.refresh_many(db, [(failure.reported_at.date(), failure.machine_id) for failure in failures])
+
+    kpis = db.query(KPI).filter(KPI.date.in_({failure.reported_at.date() for failure in failures})).all()
+    assert len(kpis) > 3
+    for kpi in kpis:
+        period_start, period_end = KPIService._day_bounds(kpi.date)
+        filters = {"machine_id": kpi.machine_id} if kpi.machine_id else {"production_line_id": kpi.production_line_id}
+        metrics = ReliabilityService.compute(db, period_start=period_start, period_end=period_end, **filters)
+        assert (kpi.total_failures, kpi.open_failures, kpi.resolved_failures, kpi.total_downtime_minutes,
+                kpi.mttr, kpi.mtbf, kpi.availability_percentage) == (
+            metrics["total_failures"], metrics["active_failures"], metrics["resolved_failures"],
+            metrics["total_downtime_minutes"], metrics["mttr"], metrics["mtbf"], metrics["availability"]
+        )
+
+
+def _global_total(db, day):
+    return db.query(KPI.total_failures).filter(
+        KPI.date == day, KPI.machine_id.is_(None), KPI.production_line_id.is_(None)
+    ).scalar()
+
+
+def test_concurrent_writers_do_not_lose_bucket_updates(database):
+    """Dos transacciones con averías del mismo día: el bucket global cuenta las dos"""
+    reported_at = datetime(2001, 1, 1, 10, 0)
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        first.add(Failure(title="Concurrente 1", description="x", machine_id=1,
+                          reported_by=database.id, reported_at=reported_at, images=[]))
+        first.flush()
+
+        def write_second():
+            second.add(Failure(title="Concurrente 2", description="x", machine_id=2,
+                               reported_by=database.id, reported_at=reported_at, images=[]))
+            second.flush()
+            KPIService.refresh_for(second, reported_at, 2)
+            second.commit()
+
+        thread = threading.Thread(target=write_second)
+        thread.start()
+        KPIService.refresh_for(first, reported_at, 1)
+        first.commit()
+        thread.join()
+    finally:
+        first.close()
+        second.close()
+
+    with SessionLocal() as db:
+        assert _global_total(db, reported_at.date()) == 2
+
+
+def test_postgresql_locks_each_day_in_order():
+    executed = []
+    db = SimpleNamespace(
+        get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+        execute=lambda statement, params: executed.append((statement, params))
+    )
+
+    KPIService._lock_days(db, {date(2024, 3, 2), date(2024, 3, 1), date(2023, 12, 31)})
+
+    assert executed == [(LOCK_KPI_DAYS, {
+        "namespace": KPI_LOCK_NAMESPACE,
+        "days": [date(2023, 12, 31).toordinal(), date(2024, 3, 1).toordinal(), date(2024, 3, 2).toordinal()]
+    })]
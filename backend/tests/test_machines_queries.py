@@ -0,0 +1,6 @@
+def test_get_machine_runs_one_query(client, statements):
+    response = client.get("/api/machines/1")
+
+    assert response.status_code == 200
+    assert response.json()["production_line_code"] == "L0"
+    assert len(statements) == 1
@@ -0,0 +1,82 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from pypdf import PdfWriter
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.storage import store_document
+from app.models.manual import Manual, ManualType, ExtractionStatus
+from app.models.manual_chunk import ManualChunk
+from app.services.manual_ingestion_service import ManualIngestionService
+
+PAGES = 5
+
+
+@pytest.fixture
+def manual_id(database):
+    writer = PdfWriter()
+    for _ in range(PAGES):
+        writer.add_blank_page(width=612, height=792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    stored = store_document(buffer, "manual.pdf")
+
+    with SessionLocal() as db:
+        manual = Manual(
+            title="Manual de prueba", content="", manual_type=ManualType.MAINTENANCE,
+            machine_id=1, created_by=database.id, file_url=stored.path, file_type="pdf",
+            extraction_status=ExtractionStatus.PENDING.value
+        )
+        db.add(manual)
+        db.commit()
+        return manual.id
+
+
+def _manual(manual_id):
+    with SessionLocal() as db:
+        manual = db.get(Manual, manual_id)
+        chunks = db.query(ManualChunk).filter(ManualChunk.manual_id == manual_id).count()
+        return manual.extraction_status, manual.page_count, chunks
+
+
+async def _claim_twice(manual_id, file_url):
+    async def claim():
+        async with AsyncSessionLocal() as db:
+            return await ManualIngestionService._claim(db, manual_id, file_url)
+
+    return await asyncio.gather(claim(), claim())
+
+
+def test_only_one_worker_claims_a_manual(manual_id):
+    with SessionLocal() as db:
+        file_url = db.get(Manual, manual_id).file_url
+
+    assert sorted(asyncio.run(_claim_twice(manual_id, file_url))) == [False, True]
+
+
+def test_stale_processing_manual_can_be_claimed_again(manual_id):
+    with SessionLocal() as db:
+        manual = db.get(Manual, manual_id)
+        manual.extraction_status = ExtractionStatus.PROCESSING.value
+        manual.updated_at = datetime.utcnow() - timedelta(minutes=settings.PDF_EXTRACTION_STALE_MINUTES + 1)
+        db.commit()
+        file_url = manual.file_url
+
+    assert sorted(asyncio.run(_claim_twice(manual_id, file_url))) == [False, True]
+
+
+def test_concurrent_ingestions_of_the_same_manual(manual_id):
+    """Dos workers reanudando el mismo manual: uno lo extrae y el otro no hace nada"""
+    async def ingest_twice():
+        await asyncio.gather(
+            ManualIngestionService.ingest(manual_id),
+            ManualIngestionService.ingest(manual_id)
+        )
+
+    asyncio.run(ingest_twice())
+
+    assert _manual(manual_id) == (ExtractionStatus.DONE, PAGES, PAGES)
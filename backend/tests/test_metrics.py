@@ -0,0 +1,26 @@
+from prometheus_client import REGISTRY
+
+from app.core.storage import IMAGES_DIR, THUMBNAILS_DIR, absolute_path
+
+
+def _route_labels() -> set:
+    return {
+        sample.labels["route"]
+        for metric in REGISTRY.collect() if metric.name == "http_requests"
+        for sample in metric.samples if "route" in sample.labels
+    }
+
+
+def test_route_labels_use_route_templates(client):
+    """Los ficheros estáticos (incluidos 404 al azar) no crean una serie cada uno"""
+    for directory in (IMAGES_DIR, THUMBNAILS_DIR):
+        absolute_path(directory).mkdir(parents=True, exist_ok=True)
+
+    for path in ("/uploads/images/no-existe-1.jpg", "/uploads/images/no-existe-2.jpg",
+                 "/uploads/thumbnails/ab/cd.webp", "/api/failures/1", "/api/failures/2"):
+        client.get(path)
+
+    labels = _route_labels()
+    assert {"/uploads/images/{path}", "/uploads/thumbnails/{path}", "/api/failures/{failure_id}"} <= labels
+    assert not any("no-existe" in label or label.endswith(".webp") for label in labels)
+    assert "/api/failures/1" not in labels
@@ -0,0 +1,6 @@
+from alembic import command
+
+
+def test_migrations_match_models(database, alembic_config):
+    """alembic check sin diferencias (las tablas FTS5 y sus shadow tables se ignoran)"""
+    command.check(alembic_config)
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hashing import PasswordHasherPool
+
+
+class _FailingExecutor:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+    def submit(self, fn, *args):
+        raise self.error
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.mark.parametrize("error, expected", [
+    (RuntimeError("cannot schedule new futures after shutdown"), HTTPException),
+    (MemoryError(), MemoryError),
+])
+def test_slot_is_released_when_submit_fails(monkeypatch, error, expected):
+    pool = PasswordHasherPool(workers=0, max_pending=1, retry_after_seconds=1)
+    monkeypatch.setattr(pool, "_get_executor", lambda: _FailingExecutor(error))
+
+    with pytest.raises(expected):
+        asyncio.run(pool._run(abs, -1))
+
+    monkeypatch.undo()
+    assert asyncio.run(pool._run(abs, -1)) == 1
+    assert pool.stats()["in_flight"] == 0
+    pool.shutdown()
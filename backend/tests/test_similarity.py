@@ -0,0 +1,164 @@
+import asyncio
+from datetime import timedelta
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.similarity import SimilarFailureIndex
+from app.models.failure import Failure
+from app.models.solution import Solution
+from app.services import similarity_service
+from app.services.similarity_service import SimilarityService
+
+
+def test_weights_computed_while_the_index_changes_are_discarded():
+    index = SimilarFailureIndex()
+    index.upsert(1, "Fuga de aceite", "Junta de la bomba")
+    weights = index.compute_weights()
+    index.upsert(2, "Motor sobrecalentado", "Ventilador averiado con mucho ruido")
+
+    assert not index.apply_weights(weights)
+    assert index.apply_weights(index.compute_weights())
+    assert [failure_id for failure_id, _ in index.search("fuga aceite")] == [1]
+
+
+
+def test_common_terms_only_rank_the_rare_term_candidates():
+    """Un término en muchas averías no aporta candidatos, pero sí desempata a los de los términos raros"""
+    index = SimilarFailureIndex()
+    for failure_id in range(1, 1501):
+        index.upsert(failure_id, "Motor averiado", "Ventilador del motor")
+    index.upsert(2001, "Rodamiento gastado", "Cambio del rodamiento del motor")
+    index.upsert(2002, "Rodamiento gastado", "Cambio del rodamiento del eje")
+    index.reweight()
+
+    assert [failure_id for failure_id, _ in index.search("rodamiento del motor")] == [2001, 2002]
+    assert len(index.search("motor", limit=3)) == 3
+
+def test_search_does_not_hang_when_the_index_fails_to_load(database, monkeypatch):
+    async def broken_reload():
+        raise RuntimeError("base de datos no disponible")
+
+    monkeypatch.setattr(SimilarityService, "reload", staticmethod(broken_reload))
+    monkeypatch.setattr(similarity_service, "_index", SimilarFailureIndex())
+    monkeypatch.setattr(similarity_service, "_ready", asyncio.Event())
+    monkeypatch.setattr(similarity_service, "_sync_task", None)
+
+    async def search():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await asyncio.wait_for(SimilarityService.similar_failures(db, "fuga de aceite"), 5)
+            finally:
+                await SimilarityService.stop()
+
+    assert asyncio.run(search()) == []
+
+
+def test_solved_failures_are_found_among_many_unsolved(database, monkeypatch):
+    """Aunque las averías parecidas sin resolver sean muchas más, se encuentran las resueltas"""
+    with SessionLocal() as db:
+        db.add_all([
+            Failure(title="Fuga de aceite en la bomba hidráulica", description="Fuga de aceite",
+                    machine_id=1, reported_by=database.id, images=[])
+            for _ in range(200)
+        ])
+        solved = Failure(title="Pérdida de aceite", description="Goteo en la bomba",
+                         machine_id=2, reported_by=database.id, images=[])
+        db.add(solved)
+        db.flush()
+        db.add_all([
+            Solution(title="Cambiar la junta", description="Junta tórica nueva", failure_id=solved.id,
+                     created_by=database.id, was_successful=True),
+            Solution(title="Reapretar", description="No sirvió", failure_id=solved.id,
+                     created_by=database.id, was_successful=False),
+        ])
+        db.commit()
+        solved_id = solved.id
+
+    monkeypatch.setattr(similarity_service, "_index", SimilarFailureIndex())
+    monkeypatch.setattr(similarity_service, "_ready", asyncio.Event())
+    monkeypatch.setattr(similarity_service, "_sync_task", None)
+    monkeypatch.setattr(similarity_service, "_solutions_loaded_until", None)
+
+    async def search():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await SimilarityService.similar_failures(db, "Fuga de aceite en la bomba", limit=3)
+            finally:
+                await SimilarityService.stop()
+
+    results = asyncio.run(search())
+
+    assert [result.failure_id for result in results] == [solved_id]
+    assert [solution.title for solution in results[0].solutions] == ["Cambiar la junta"]
+
+
+def _search_twice(monkeypatch, between, title):
+    """Dos búsquedas con el mismo índice; between() modifica la base de datos entre ellas"""
+    monkeypatch.setattr(similarity_service, "_index", SimilarFailureIndex())
+    monkeypatch.setattr(similarity_service, "_ready", asyncio.Event())
+    monkeypatch.setattr(similarity_service, "_sync_task", None)
+    monkeypatch.setattr(similarity_service, "_solutions_loaded_until", None)
+
+    async def search():
+        try:
+            async with AsyncSessionLocal() as db:
+                await SimilarityService.similar_failures(db, title)
+            between()
+            async with AsyncSessionLocal() as db:
+                return await SimilarityService.similar_failures(db, title)
+        finally:
+            await SimilarityService.stop()
+
+    return [result.failure_id for result in asyncio.run(search())]
+
+
+def test_solutions_marked_successful_later_are_indexed(database, monkeypatch):
+    with SessionLocal() as db:
+        failure = Failure(title="Cojinete gripado en el reductor", description="Vibraciones",
+                          machine_id=1, reported_by=database.id, images=[])
+        db.add(failure)
+        db.flush()
+        solution = Solution(title="Engrasar", description="Engrase del reductor", failure_id=failure.id,
+                            created_by=database.id, was_successful=False)
+        db.add(solution)
+        db.flush()
+        # Otra solución exitosa posterior: la última cargada ya es más reciente
+        other = Failure(title="Correa destensada", description="Patina la correa",
+                        machine_id=1, reported_by=database.id, images=[])
+        db.add(other)
+        db.flush()
+        db.add(Solution(title="Tensar", description="Tensado de la correa", failure_id=other.id,
+                        created_by=database.id, was_successful=True))
+        db.commit()
+        failure_id, solution_id = failure.id, solution.id
+
+    def mark_successful():
+        with SessionLocal() as db:
+            db.get(Solution, solution_id).was_successful = True
+            db.commit()
+
+    assert _search_twice(monkeypatch, mark_successful, "Cojinete gripado") == [failure_id]
+
+
+def test_solutions_committed_late_are_indexed(database, monkeypatch):
+    """Una solución con id y updated_at anteriores a la última cargada (transacción que confirma tarde)"""
+    with SessionLocal() as db:
+        failures = [
+            Failure(title=title, description="Parada de la línea", machine_id=1, reported_by=database.id, images=[])
+            for title in ("Sensor inductivo desajustado", "Sensor capacitivo desajustado")
+        ]
+        db.add_all(failures)
+        db.flush()
+        first = Solution(id=50_000, title="Ajustar", description="Ajuste de la distancia",
+                         failure_id=failures[0].id, created_by=database.id, was_successful=True)
+        db.add(first)
+        db.commit()
+        failure_ids, first_updated_at = [failure.id for failure in failures], first.updated_at
+
+    def commit_late():
+        with SessionLocal() as db:
+            db.add(Solution(id=49_999, title="Ajustar", description="Ajuste de la distancia",
+                            failure_id=failure_ids[1], created_by=database.id, was_successful=True,
+                            created_at=first_updated_at, updated_at=first_updated_at - timedelta(seconds=30)))
+            db.commit()
+
+    assert sorted(_search_twice(monkeypatch, commit_late, "Sensor desajustado")) == failure_ids
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.security import create_access_token
+from app.models.user import User
+from app.services.auth_service import AuthService, user_cache
+
+
+def _current_user(token: str):
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return await AuthService.get_current_user_from_token(db, token)
+    return asyncio.run(read())
+
+
+def test_snapshot_cached_before_commit_is_evicted_on_commit(database):
+    """Otra petición lee y cachea la fila anterior entre el flush y el commit del cambio"""
+    with SessionLocal() as db:
+        user = User(email="cache@example.com", username="cache", hashed_password="x",
+                    full_name="Nombre anterior", role="technician")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    token = create_access_token(data={"sub": str(user_id)})
+    user_cache.invalidate(user_id)
+
+    with SessionLocal() as db:
+        db.get(User, user_id).full_name = "Nombre nuevo"
+        db.flush()
+        assert _current_user(token).full_name == "Nombre anterior"
+        db.commit()
+
+    assert _current_user(token).full_name == "Nombre nuevo"
+
+
+def test_rolled_back_changes_keep_the_cached_snapshot(database):
+    with SessionLocal() as db:
+        user = User(email="rollback@example.com", username="rollback", hashed_password="x",
+                    full_name="Técnico", role="technician")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    token = create_access_token(data={"sub": str(user_id)})
+    cached = _current_user(token)
+
+    with SessionLocal() as db:
+        db.get(User, user_id).full_name = "Descartado"
+        db.flush()
+        db.rollback()
+        db.commit()
+
+    assert user_cache.get(user_id) is cached